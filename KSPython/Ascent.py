@@ -0,0 +1,450 @@
+"""
+
+This submodule simulates the ascent of a rocket, step by step in time.
+
+The rocket flies in the equatorial plane of a rotating body, pushed by its engines and pulled by gravity and drag.
+Thrust and fuel flow of the engines are interpolated between their atmospheric and vacuum values by the pressure
+around the rocket.
+
+Staging follows the same rules as the rest of the library: engines of a stage fire when the stage starts, or earlier
+if set with schedule_engine, and fuel flows from a stage to the next one unless removed with rem_fuel_flow. Each
+burning engine draws fuel from the lowest attached stage it is connected to that still has fuel. A stage is dropped
+as soon as its fuel runs out, or if no engine draws fuel from it.
+
+Once the apoapsis reaches the target, engines are cut off and the rocket coasts up to it, burning again if drag pulls
+the apoapsis back down. At the apoapsis it burns holding its altitude, with just enough of the thrust upwards to make up
+for gravity, until the orbit stops getting rounder.
+
+Example
+    -------
+    >>> result = simulate_ascent(rocket, profile=GravityTurn(start_altitude=1000, end_altitude=40000))
+    >>> result.in_orbit, result.apoapsis, result.periapsis, result.drag_loss, result.gravity_loss
+
+"""
+
+from math import sqrt, hypot, exp, sin, cos, asin, radians, degrees, inf, pi
+
+from KSPython.KSPython import KerbalException, _number_check
+from KSPython.Atmosphere import KERBIN_ATMOSPHERE
+
+G0 = 9.81 # standard gravity used for ISP [m/s²]
+
+
+class Body:
+    """Celestial body with an exponential or tabulated atmosphere.
+
+    Parameters
+        ----------
+        name - `string`
+            Name of the body.
+        radius - `float`
+            Radius of the body [m].
+        mu - `float`
+            Gravitational parameter of the body [m³/s²].
+        rotation_period - `float`
+            Sidereal rotation period [s].
+        atmosphere_height - `float`
+            Altitude where the atmosphere ends [m].
+        surface_pressure - `float`
+            Pressure at sea level [atm].
+        surface_density - `float`
+            Air density at sea level [kg/m³].
+        scale_height - `float`
+            Altitude over which pressure and density drop by a factor of e [m].
+        table - `AtmosphereTable`
+            Tabulated atmosphere used instead of the exponential one. Ends at the atmosphere height.
+
+    """
+    def __init__(self, name, radius, mu, rotation_period, atmosphere_height=0.0, surface_pressure=0.0,
+                 surface_density=0.0, scale_height=1.0, table=None):
+        self.name = name
+        self.radius = _number_check(radius)
+        self.mu = _number_check(mu)
+        self.rotation_period = _number_check(rotation_period)
+        self.atmosphere_height = _number_check(atmosphere_height)
+        self.surface_pressure = _number_check(surface_pressure)
+        self.surface_density = _number_check(surface_density)
+        self.scale_height = _number_check(scale_height)
+        self.table = table
+
+    def atmosphere(self, altitude):
+        """
+        Pressure and density of the atmosphere.
+
+        Parameters
+            ----------
+            altitude - `float`
+                Altitude above sea level [m].
+
+        Return
+            ----------
+            pressure - `float`
+                Pressure [atm].
+            density - `float`
+                Air density [kg/m³].
+
+        """
+        if altitude >= self.atmosphere_height:
+            return 0.0, 0.0
+        if self.table is not None:
+            return self.table.pressure(altitude), self.table.density(altitude)
+        factor = exp(-max(altitude, 0.0)/self.scale_height)
+        return self.surface_pressure*factor, self.surface_density*factor
+
+
+KERBIN = Body('Kerbin', 600000, 3.5316e12, 21549.425, atmosphere_height=70000, surface_pressure=1.0,
+              surface_density=1.225, scale_height=5600, table=KERBIN_ATMOSPHERE)
+
+
+class GravityTurn:
+    """Pitch program of a gravity turn.
+
+    The rocket climbs vertically up to start_altitude, then pitches over towards final_pitch, reached at end_altitude.
+    In between, the pitch follows ((altitude - start_altitude)/(end_altitude - start_altitude))**shape, so shapes
+    below 1 turn faster at the start.
+
+    Any function taking the altitude [m] and the speed relative to the surface [m/s], and returning the pitch above
+    the horizon [degrees], can be used instead.
+
+    Parameters
+        ----------
+        start_altitude - `float`
+            Altitude where the turn starts [m].
+        end_altitude - `float`
+            Altitude where the turn ends [m].
+        final_pitch - `float`
+            Pitch above the horizon at the end of the turn [degrees].
+        shape - `float`
+            Exponent of the turn.
+
+    """
+    def __init__(self, start_altitude=1000, end_altitude=45000, final_pitch=0, shape=0.5):
+        self.start_altitude = _number_check(start_altitude)
+        self.end_altitude = _number_check(end_altitude)
+        self.final_pitch = _number_check(final_pitch)
+        self.shape = _number_check(shape)
+        if self.end_altitude <= self.start_altitude:
+            raise KerbalException('The gravity turn must end above the altitude where it starts.')
+
+    def __call__(self, altitude, speed):
+        if altitude <= self.start_altitude:
+            return 90.0
+        if altitude >= self.end_altitude:
+            return self.final_pitch
+        progress = ((altitude - self.start_altitude)/(self.end_altitude - self.start_altitude))**self.shape
+        return 90.0 - (90.0 - self.final_pitch)*progress
+
+
+class AscentResult:
+    """Result of an ascent simulation.
+
+    Attributes
+        ----------
+        status - `{'orbit', 'target', 'fuel', 'crash', 'timeout'}`
+            Why the simulation ended: orbit circularized at the target apoapsis, target apoapsis reached without
+            circularizing, no fuel left, rocket fell back to the ground or maximum time reached.
+        in_orbit - `bool`
+            True if the final orbit is closed and its periapsis clears the atmosphere of the body.
+        time, altitude, speed, pitch, mass, stage - `list`
+            Time [s], altitude [m], orbital speed [m/s], pitch [degrees], mass [ton] and current stage at every
+            step. Empty if the steps were not recorded.
+        events - `list of tuples`
+            (time, stage_num, altitude) of each stage dropped.
+        final_time, final_altitude, final_speed, final_mass - `float`
+            State of the rocket at the end of the simulation.
+        apoapsis, periapsis - `float`
+            Altitude of the apoapsis and periapsis at the end of the simulation [m]. Apoapsis is inf on an escape
+            trajectory.
+        dV_spent - `float`
+            Delta V given by the engines [m/s].
+        gravity_loss, drag_loss - `float`
+            Delta V lost to gravity and drag while the engines burn, and to drag while coasting [m/s].
+        fuel - `list`
+            Fuel left in each stage [ton].
+
+    """
+    def __init__(self):
+        self.status = None
+        self.in_orbit = False
+        self.time = []
+        self.altitude = []
+        self.speed = []
+        self.pitch = []
+        self.mass = []
+        self.stage = []
+        self.events = []
+        self.final_time = 0.0
+        self.final_altitude = 0.0
+        self.final_speed = 0.0
+        self.final_mass = 0.0
+        self.apoapsis = 0.0
+        self.periapsis = 0.0
+        self.dV_spent = 0.0
+        self.gravity_loss = 0.0
+        self.drag_loss = 0.0
+        self.fuel = []
+
+    def __repr__(self):
+        return (f'AscentResult(status={self.status!r}, in_orbit={self.in_orbit}, time={self.final_time:.1f}, apoapsis={self.apoapsis:.0f}, '
+                f'periapsis={self.periapsis:.0f}, dV_spent={self.dV_spent:.1f})')
+
+
+def _orbit(x, y, vx, vy, mu, radius):
+    """Apoapsis and periapsis altitudes of the orbit through a state."""
+    r = hypot(x, y)
+    energy = (vx*vx + vy*vy)/2 - mu/r
+    momentum = x*vy - y*vx
+    eccentricity = sqrt(max(1 + 2*energy*momentum*momentum/(mu*mu), 0.0))
+    if energy >= 0:
+        return inf, momentum*momentum/(mu*(1 + eccentricity)) - radius
+    axis = -mu/(2*energy)
+    return axis*(1 + eccentricity) - radius, axis*(1 - eccentricity) - radius
+
+
+def _engine_sources(stage_num, num_stages, fire_stage, restricted, thrust, relative_isp, fuel):
+    """
+    Engines burning during a stage, grouped by the stage they draw fuel from.
+
+    Return
+        ----------
+        sources - `list of lists`
+            [tank, thrust_atm, thrust_vac, relative_isp_atm, relative_isp_vac] for every stage fuel is drawn from.
+
+    """
+    sources = {}
+    for engine in range(stage_num, num_stages):
+        if thrust['vac'][engine] <= 0 or (engine != stage_num and fire_stage[engine] > stage_num):
+            continue
+        lowest = stage_num
+        for restriction in range(stage_num, engine):
+            if restriction in restricted:
+                lowest = restriction + 1
+        tank = next((tank for tank in range(lowest, engine + 1) if fuel[tank] > 0), None)
+        if tank is None:
+            continue
+        source = sources.setdefault(tank, [tank, 0.0, 0.0, 0.0, 0.0])
+        source[1] += thrust['atm'][engine]
+        source[2] += thrust['vac'][engine]
+        source[3] += relative_isp['atm'][engine]
+        source[4] += relative_isp['vac'][engine]
+    return list(sources.values())
+
+
+def simulate_ascent(rocket, profile=None, dt=0.1, integrator='rk4', target_apoapsis=80000, drag_area=1.0,
+                    body=KERBIN, max_time=1500, record=True, circularize=True):
+    """
+    Simulates the ascent of a rocket from the surface to orbit: up to the target apoapsis, then coasting to it and
+    circularizing there.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be simulated, launched from the equator towards the east.
+        profile - `callable`
+            Pitch program, taking the altitude [m] and the surface speed [m/s] and returning the pitch above the
+            horizon [degrees]. Defaults to GravityTurn().
+        dt - `float`
+            Time step [s]. Steps are shortened so that stages are dropped exactly when their fuel runs out.
+        integrator - `{'rk4', 'euler'}`
+            Fourth order Runge-Kutta, or semi-implicit Euler.
+        target_apoapsis - `float`
+            Engines are cut off once the apoapsis reaches this altitude [m].
+        drag_area - `float`
+            Drag coefficient times reference area of the rocket [m²].
+        body - `Body`
+            Body the rocket is launched from (default Kerbin).
+        max_time - `float`
+            Maximum simulated time [s].
+        record - `bool`
+            If True, the state of the rocket is recorded at every step.
+        circularize - `bool`
+            If True, the rocket coasts to the apoapsis and circularizes there. Otherwise the simulation ends as soon
+            as the apoapsis reaches the target.
+
+    Return
+        ----------
+        result - `AscentResult`
+            Trajectory, staging events, final orbit and delta V losses.
+
+    """
+    if integrator not in ('rk4', 'euler'):
+        raise KerbalException(f"integrator can only be 'rk4' or 'euler', and not {integrator}.")
+    dt = _number_check(dt)
+    if dt <= 0:
+        raise KerbalException('Time step must be positive.')
+    num_stages = rocket.num_stages()
+    if num_stages == 0:
+        raise KerbalException('Rocket has no stages.')
+    profile = GravityTurn() if profile is None else profile
+
+    fire_stage = rocket.timeline().fire_stage
+    restricted = set(rocket.restric_fuel_flow)
+    empty_mass = [stage.calculate_empty_mass() for stage in rocket.stages]
+    fuel = [stage.calculate_full_mass() - stage.calculate_empty_mass() for stage in rocket.stages]
+    thrust = {'atm': [], 'vac': []}
+    relative_isp = {'atm': [], 'vac': []}
+    for stage in rocket.stages:
+        for loc in ('atm', 'vac'):
+            stage_thrust, stage_relative_isp = stage._engine_totals(loc)
+            thrust[loc].append(stage_thrust)
+            relative_isp[loc].append(stage_relative_isp)
+
+    radius = body.radius
+    mu = body.mu
+    omega = 2*pi/body.rotation_period
+    atmosphere = body.atmosphere
+    x, y = 0.0, radius # launched from the top of the body, east is towards -x
+    vx, vy = -omega*radius, 0.0
+
+    result = AscentResult()
+    stage_num = 0
+    sources = []
+    payload = rocket.payload
+    t = 0.0
+    lifted = False
+    phase = 'ascent' # then 'coast' to the apoapsis and 'circularize' there
+    burn_pitch = None # pitch of the circularization burn, instead of the profile
+    eccentricity_gap = inf # apoapsis minus periapsis, while circularizing
+
+    def acceleration(x, y, vx, vy, mass, engine_thrust):
+        """Acceleration of the rocket, along with its pitch, drag and gravity."""
+        r = hypot(x, y)
+        up_x, up_y = x/r, y/r
+        altitude = r - radius
+        air_x, air_y = vx + omega*y, vy - omega*x
+        air_speed = hypot(air_x, air_y)
+        gravity = mu/(r*r)
+        ax, ay = -gravity*up_x, -gravity*up_y
+        pitch = profile(altitude, air_speed) if burn_pitch is None else burn_pitch
+        if engine_thrust > 0:
+            angle = radians(pitch)
+            push = engine_thrust/mass # kN/ton = m/s²
+            ax += push*(cos(angle)*-up_y + sin(angle)*up_x)
+            ay += push*(cos(angle)*up_x + sin(angle)*up_y)
+        drag = 0.0
+        if air_speed > 0 and altitude < body.atmosphere_height:
+            drag = 0.5*atmosphere(altitude)[1]*air_speed*air_speed*drag_area/1000/mass
+            ax -= drag*air_x/air_speed
+            ay -= drag*air_y/air_speed
+        return ax, ay, pitch, drag, gravity
+
+    tank_emptied = True
+    while True:
+        if tank_emptied:
+            # engines only change source when a tank runs out. Stages without fuel, or that no engine draws from,
+            # are dropped
+            tank_emptied = False
+            sources = []
+            while stage_num < num_stages:
+                sources = _engine_sources(stage_num, num_stages, fire_stage, restricted, thrust, relative_isp, fuel)
+                if fuel[stage_num] > 0 and any(source[0] == stage_num for source in sources):
+                    break
+                result.events.append((t, stage_num, hypot(x, y) - radius))
+                stage_num += 1
+                sources = []
+        mass = payload + sum(empty_mass[stage_num:]) + sum(fuel[stage_num:])
+
+        altitude = hypot(x, y) - radius
+        if not sources and phase != 'coast':
+            result.status = 'fuel'
+            break
+        if t >= max_time:
+            result.status = 'timeout'
+            break
+
+        pressure = atmosphere(altitude)[0]
+        engine_thrust = 0.0
+        flows = []
+        for tank, thrust_atm, thrust_vac, relative_isp_atm, relative_isp_vac in (sources if phase != 'coast' else ()):
+            engine_thrust += thrust_vac + (thrust_atm - thrust_vac)*pressure
+            flows.append((tank, (relative_isp_vac + (relative_isp_atm - relative_isp_vac)*pressure)/G0))
+        mass_flow = sum(flow for _, flow in flows)
+        step = dt
+        for tank, flow in flows:
+            if flow > 0:
+                step = min(step, fuel[tank]/flow)
+
+        if phase == 'circularize' and engine_thrust > 0:
+            # hold the altitude: the upwards thrust makes up for gravity less the centrifugal acceleration, and damps
+            # the vertical speed over 10 s
+            r = hypot(x, y)
+            radial = (vx*x + vy*y)/r
+            horizontal = (x*vy - y*vx)/r
+            lift = mu/(r*r) - horizontal*horizontal/r - radial/10
+            burn_pitch = degrees(asin(max(-1.0, min(1.0, lift*mass/engine_thrust))))
+        ax, ay, pitch, drag, gravity = acceleration(x, y, vx, vy, mass, engine_thrust)
+        if record:
+            result.time.append(t)
+            result.altitude.append(altitude)
+            result.speed.append(hypot(vx, vy))
+            result.pitch.append(pitch)
+            result.mass.append(mass)
+            result.stage.append(stage_num)
+
+        if not lifted and (ax*x + ay*y)/hypot(x, y) <= 0:
+            # still on the launch pad, turning with the body
+            angle = omega*step
+            x, y = x*cos(angle) - y*sin(angle), x*sin(angle) + y*cos(angle)
+            vx, vy = -omega*y, omega*x
+        else:
+            lifted = True
+            speed = hypot(vx, vy)
+            result.dV_spent += engine_thrust/mass*step
+            result.drag_loss += drag*step
+            if speed > 0 and engine_thrust > 0:
+                result.gravity_loss += gravity*(vx*x + vy*y)/(speed*hypot(x, y))*step
+            if integrator == 'euler':
+                vx += ax*step
+                vy += ay*step
+                x += vx*step
+                y += vy*step
+            else:
+                half = step/2
+                k2 = acceleration(x + vx*half, y + vy*half, vx + ax*half, vy + ay*half, mass - mass_flow*half, engine_thrust)
+                k3 = acceleration(x + (vx + ax*half)*half, y + (vy + ay*half)*half, vx + k2[0]*half, vy + k2[1]*half,
+                                  mass - mass_flow*half, engine_thrust)
+                k4 = acceleration(x + (vx + k2[0]*half)*step, y + (vy + k2[1]*half)*step, vx + k3[0]*step, vy + k3[1]*step,
+                                  mass - mass_flow*step, engine_thrust)
+                x += step*(vx + (step/6)*(ax + k2[0] + k3[0]))
+                y += step*(vy + (step/6)*(ay + k2[1] + k3[1]))
+                vx += (step/6)*(ax + 2*k2[0] + 2*k3[0] + k4[0])
+                vy += (step/6)*(ay + 2*k2[1] + 2*k3[1] + k4[1])
+
+        t += step
+        for tank, flow in flows:
+            fuel[tank] -= flow*step
+            if fuel[tank] <= 1e-12*(1 + flow*step):
+                fuel[tank] = 0.0
+                tank_emptied = True
+
+        if lifted and hypot(x, y) < radius:
+            result.status = 'crash'
+            break
+        if not lifted:
+            continue
+        apoapsis, periapsis = _orbit(x, y, vx, vy, mu, radius)
+        if phase == 'ascent' and apoapsis >= target_apoapsis:
+            if not circularize:
+                result.status = 'target'
+                break
+            phase = 'coast'
+        elif phase == 'coast':
+            if apoapsis < target_apoapsis and hypot(x, y) - radius < body.atmosphere_height:
+                phase = 'ascent' # drag pulled the apoapsis down, burn again
+            elif vx*x + vy*y <= 0: # at the apoapsis
+                phase = 'circularize'
+        elif phase == 'circularize':
+            # the orbit gets rounder until the periapsis passes the rocket, then the apoapsis runs away
+            if apoapsis - periapsis >= eccentricity_gap or apoapsis - periapsis <= 1e-3*(radius + periapsis):
+                result.status = 'orbit'
+                break
+            eccentricity_gap = apoapsis - periapsis
+
+    result.final_time = t
+    result.final_altitude = hypot(x, y) - radius
+    result.final_speed = hypot(vx, vy)
+    result.final_mass = payload + sum(empty_mass[stage_num:]) + sum(fuel[stage_num:])
+    result.apoapsis, result.periapsis = _orbit(x, y, vx, vy, mu, radius)
+    result.in_orbit = result.apoapsis < inf and result.periapsis >= body.atmosphere_height
+    result.fuel = fuel
+    return result
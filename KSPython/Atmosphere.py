@@ -0,0 +1,220 @@
+"""
+
+This submodule holds the atmosphere of Kerbin, and evaluates rockets at any pressure or altitude.
+
+Kerbin's atmosphere is tabulated every 100 m from the 1976 US Standard Atmosphere, compressed so that it ends at
+70 km as Kerbin's does, which is how the game builds it. Pressure and density are interpolated exponentially between
+the points of the table.
+
+Engines give their ISP and thrust at any pressure by interpolating linearly between vacuum (0 atm) and sea level
+(1 atm), as the game does, which matches the 'vac' and 'atm' values exactly at both ends.
+
+Example
+    -------
+    >>> KERBIN_ATMOSPHERE.pressure(np.linspace(0, 70000, 1000))
+    >>> rocket.calculate_stage_dV(0, altitude=np.linspace(0, 70000, 1000))
+
+"""
+
+from bisect import bisect_right
+from math import exp, log
+
+from KSPython.KSPython import KerbalException, Engine
+
+# 1976 US Standard Atmosphere layers: base altitude [m], base temperature [K], lapse rate [K/m], base pressure [Pa]
+_LAYERS = ((0, 288.15, -0.0065, 101325.0),
+           (11000, 216.65, 0.0, 22632.1),
+           (20000, 216.65, 0.001, 5474.89),
+           (32000, 228.65, 0.0028, 868.019),
+           (47000, 270.65, 0.0, 110.906),
+           (51000, 270.65, -0.0028, 66.9389),
+           (71000, 214.65, -0.002, 3.95642))
+_EARTH_GRAVITY = 9.80665
+_AIR_CONSTANT = 287.053 # specific gas constant of air [J/(kg K)]
+_EARTH_ATMOSPHERE_HEIGHT = 86000
+_SEA_LEVEL_PRESSURE = 101325.0
+
+
+def _standard_atmosphere(altitude):
+    """Pressure [Pa] and temperature [K] of the 1976 US Standard Atmosphere."""
+    for base, temperature, lapse, pressure in reversed(_LAYERS):
+        if altitude >= base:
+            break
+    height = altitude - base
+    if lapse == 0:
+        return pressure*exp(-_EARTH_GRAVITY*height/(_AIR_CONSTANT*temperature)), temperature
+    top_temperature = temperature + lapse*height
+    return pressure*(temperature/top_temperature)**(_EARTH_GRAVITY/(_AIR_CONSTANT*lapse)), top_temperature
+
+
+class AtmosphereTable:
+    """Tabulated atmosphere, with pressure and density interpolated at any altitude.
+
+    Scalars are interpolated with a binary search in plain Python, fast enough for step by step simulations. Arrays
+    are interpolated all at once with NumPy.
+
+    Parameters
+        ----------
+        altitude - `list of float`
+            Altitudes of the table, in increasing order [m]. The atmosphere ends at the last one.
+        pressure - `list of float`
+            Pressure at each altitude [atm]. Must be positive.
+        density - `list of float`
+            Air density at each altitude [kg/m³]. Must be positive.
+
+    """
+    def __init__(self, altitude, pressure, density):
+        self.altitude = [float(value) for value in altitude]
+        if len(self.altitude) < 2 or any(low >= high for low, high in zip(self.altitude, self.altitude[1:])):
+            raise KerbalException('Table altitudes must be at least two, in increasing order.')
+        if len(pressure) != len(self.altitude) or len(density) != len(self.altitude):
+            raise KerbalException('Table pressure and density must have one value per altitude.')
+        self._log_pressure = [log(value) for value in pressure]
+        self._log_density = [log(value) for value in density]
+        self._arrays = None
+        self.height = self.altitude[-1]
+
+    def _interpolate(self, values, altitude):
+        if hasattr(altitude, '__len__'):
+            import numpy as np # only needed for arrays
+            if self._arrays is None:
+                self._arrays = np.array(self.altitude)
+            altitude = np.asarray(altitude, dtype=float)
+            result = np.exp(np.interp(altitude, self._arrays, values))
+            return np.where(altitude >= self.height, 0.0, result)
+        if altitude >= self.height:
+            return 0.0
+        altitude = max(altitude, self.altitude[0])
+        index = min(bisect_right(self.altitude, altitude), len(self.altitude) - 1)
+        low, high = self.altitude[index - 1], self.altitude[index]
+        weight = (altitude - low)/(high - low)
+        return exp(values[index - 1] + (values[index] - values[index - 1])*weight)
+
+    def pressure(self, altitude):
+        """
+        Pressure of the atmosphere, zero above its end.
+
+        Parameters
+            ----------
+            altitude - `float/array`
+                Altitude above sea level [m].
+
+        Return
+            ----------
+            pressure - `float/array`
+                Pressure [atm].
+
+        """
+        return self._interpolate(self._log_pressure, altitude)
+
+    def density(self, altitude):
+        """
+        Air density of the atmosphere, zero above its end.
+
+        Parameters
+            ----------
+            altitude - `float/array`
+                Altitude above sea level [m].
+
+        Return
+            ----------
+            density - `float/array`
+                Air density [kg/m³].
+
+        """
+        return self._interpolate(self._log_density, altitude)
+
+
+def _kerbin_table(height=70000, step=100):
+    altitude = range(0, height + step, step)
+    pressure = []
+    density = []
+    for value in altitude:
+        earth_pressure, temperature = _standard_atmosphere(value*_EARTH_ATMOSPHERE_HEIGHT/height)
+        pressure.append(earth_pressure/_SEA_LEVEL_PRESSURE)
+        density.append(earth_pressure/(_AIR_CONSTANT*temperature))
+    return AtmosphereTable(altitude, pressure, density)
+
+
+KERBIN_ATMOSPHERE = _kerbin_table()
+
+
+def _stage_performance(stage, pressure):
+    """Total thrust and sum of thrust/isp of the engines of a stage, at every pressure."""
+    import numpy as np
+    thrust = np.zeros(pressure.shape)
+    relative_isp = np.zeros(pressure.shape)
+    for part, count in stage.part_counts.items():
+        if isinstance(part, Engine):
+            engine_thrust = part.thrust_at(pressure)
+            engine_isp = part.isp_at(pressure)
+            thrust += count*engine_thrust
+            relative_isp += count*np.divide(engine_thrust, engine_isp, out=np.zeros(pressure.shape), where=engine_isp > 0)
+    return thrust, relative_isp
+
+
+def pressure_batch(rocket, pressure=None, altitude=None, atmosphere=KERBIN_ATMOSPHERE):
+    """
+    Packs a rocket into a RocketBatch with one design per pressure, each one with the engine performance at that
+    pressure. The batch is evaluated with loc='atm'.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be evaluated.
+        pressure - `float/array`
+            Pressures [atm].
+        altitude - `float/array`
+            Altitudes [m], used instead of pressure.
+        atmosphere - `AtmosphereTable`
+            Atmosphere used for the altitudes (default Kerbin).
+
+    Return
+        ----------
+        batch - `RocketBatch`
+            Batch with one design per pressure, flattened.
+        shape - `tuple`
+            Shape of the pressures given.
+
+    """
+    import numpy as np
+    from KSPython.Batch import RocketBatch
+    if (pressure is None) == (altitude is None):
+        raise KerbalException('Either a pressure or an altitude must be given.')
+    if altitude is not None:
+        pressure = atmosphere.pressure(np.asarray(altitude, dtype=float))
+    pressure = np.asarray(pressure, dtype=float)
+    if np.any(pressure < 0):
+        raise KerbalException('Pressure cannot be negative.')
+    shape = pressure.shape
+    pressure = pressure.ravel()
+
+    single = RocketBatch.from_rockets([rocket])
+    num_points = pressure.size
+    num_stages = rocket.num_stages()
+    thrust = np.zeros((num_points, num_stages))
+    relative_isp = np.zeros((num_points, num_stages))
+    for stage_num, stage in enumerate(rocket.stages):
+        thrust[:, stage_num], relative_isp[:, stage_num] = _stage_performance(stage, pressure)
+
+    def tile(values):
+        return np.repeat(values, num_points, axis=0)
+
+    batch = RocketBatch(tile(single.full_mass), tile(single.empty_mass), tile(single.cost),
+                        {'atm': thrust, 'vac': thrust}, {'atm': relative_isp, 'vac': relative_isp},
+                        payload=tile(single.payload), fire_stage=tile(single.fire_stage),
+                        restricted=tile(single.restricted), mask=tile(single.mask))
+    return batch, shape
+
+
+def _profile(rocket, stage_num, values, pressure, altitude):
+    """Stage values of a pressure batch, in the shape of the pressures. Raises if a single point is invalid."""
+    if not 0 <= stage_num < rocket.num_stages():
+        raise KerbalException(f'Stage {stage_num} is not part of the rocket.')
+    batch, shape = pressure_batch(rocket, pressure=pressure, altitude=altitude)
+    result = values(batch)[:, stage_num].reshape(shape)
+    if shape == ():
+        if not batch.valid('atm')[0]:
+            raise KerbalException('Rocket cannot be evaluated, a stage loses all its fuel before being staged.')
+        return float(result)
+    return result
@@ -0,0 +1,499 @@
+"""
+
+This submodule evaluates many rocket designs at once.
+
+Designs are packed into NumPy arrays, one row per design and one column per stage. Designs with fewer stages are
+padded at the top and masked out. The staging model is the same as Rocket's: engines scheduled to fire early,
+fuel flow restrictions and the fuel lost before staging are all taken into account.
+
+Example
+    -------
+    >>> batch = RocketBatch.from_rockets([rocket1, rocket2, rocket3])
+    >>> batch.adjusted_dV()
+
+"""
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, Rocket, _adjusted_dV, _loc_check
+
+GRADIENTS = ('stage_dV', 'dV', 'adjusted_dV', 'twr', 'burn_time', 'total_mass', 'total_cost')
+
+
+class RocketBatch:
+    """Struct-of-arrays collection of rocket designs, evaluated with vectorized kernels.
+
+    All per stage arrays have shape (num_designs, max_stages). Stages are ordered as in Rocket, from first to last.
+
+    Parameters
+        ----------
+        full_mass - `array`
+            Mass of each stage when full [ton].
+        empty_mass - `array`
+            Mass of each stage when empty [ton].
+        cost - `array`
+            Cost of each stage.
+        thrust - `dict of arrays`
+            Thrust of all engines of each stage {'atm': thrust, 'vac': thrust} [kN].
+        relative_isp - `dict of arrays`
+            Sum of thrust/ISP of all engines of each stage {'atm': values, 'vac': values} [kN/s].
+        payload - `array`
+            Payload of each design [ton]. Defaults to no payload.
+        fire_stage - `array of int`
+            Stage where the engines of each stage fire. Defaults to their own stage.
+        restricted - `array of bool`
+            True where fuel cannot flow between a stage and the next one. Defaults to no restriction.
+        mask - `array of bool`
+            True for stages that are part of the design. Defaults to every stage.
+        tangents - `dict`
+            Derivatives of the inputs with respect to each design parameter, with the parameters as last axis:
+            full_mass, empty_mass and cost with shape (num_designs, max_stages, num_parameters), thrust and
+            relative_isp as {'atm': array, 'vac': array} with that same shape, and payload with shape
+            (num_designs, num_parameters). If given, derivatives are evaluated along with the values, see gradient.
+
+    Attributes
+        ----------
+        parameters - `list`
+            Design parameters of the derivatives, when the batch was built by from_rockets with parameters.
+
+    """
+    def __init__(self, full_mass, empty_mass, cost, thrust, relative_isp, payload=None, fire_stage=None, restricted=None, mask=None, tangents=None):
+        self.full_mass = np.asarray(full_mass, dtype=float)
+        if self.full_mass.ndim != 2:
+            raise KerbalException('Stage arrays must have shape (num_designs, max_stages).')
+        shape = self.full_mass.shape
+        num_designs, max_stages = shape
+        self.empty_mass = np.asarray(empty_mass, dtype=float)
+        self.cost = np.asarray(cost, dtype=float)
+        self.thrust = {loc: np.asarray(thrust[loc], dtype=float) for loc in ('atm', 'vac')}
+        self.relative_isp = {loc: np.asarray(relative_isp[loc], dtype=float) for loc in ('atm', 'vac')}
+        self.payload = np.zeros(num_designs) if payload is None else np.asarray(payload, dtype=float)
+        if fire_stage is None:
+            fire_stage = np.broadcast_to(np.arange(max_stages), shape)
+        self.fire_stage = np.asarray(fire_stage, dtype=int)
+        self.restricted = np.zeros(shape, dtype=bool) if restricted is None else np.asarray(restricted, dtype=bool)
+        self.mask = np.ones(shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        for name in ('empty_mass', 'cost', 'fire_stage', 'restricted', 'mask'):
+            if getattr(self, name).shape != shape:
+                raise KerbalException(f'{name} must have shape {shape}.')
+        if self.payload.shape != (num_designs,):
+            raise KerbalException(f'payload must have shape ({num_designs},).')
+        if np.any(self.fire_stage > np.arange(max_stages)):
+            raise KerbalException('Engines can only be scheduled to fire before their stage.')
+        self.tangents = None if tangents is None else self._check_tangents(tangents)
+        self.parameters = None
+        self._results = {}
+
+    def _check_tangents(self, tangents):
+        num_designs, max_stages = self.full_mass.shape
+        payload = np.asarray(tangents['payload'], dtype=float)
+        if payload.ndim != 2 or payload.shape[0] != num_designs:
+            raise KerbalException(f'payload tangents must have shape ({num_designs}, num_parameters).')
+        shape = (num_designs, max_stages, payload.shape[1])
+        checked = {'payload': payload}
+        for name in ('full_mass', 'empty_mass', 'cost', 'thrust', 'relative_isp'):
+            values = tangents[name]
+            if name in ('thrust', 'relative_isp'):
+                values = {loc: np.asarray(values[loc], dtype=float) for loc in ('atm', 'vac')}
+                shapes = [value.shape for value in values.values()]
+            else:
+                values = np.asarray(values, dtype=float)
+                shapes = [values.shape]
+            if any(value_shape != shape for value_shape in shapes):
+                raise KerbalException(f'{name} tangents must have shape {shape}.')
+            checked[name] = values
+        return checked
+
+    @classmethod
+    def from_rockets(cls, rockets, parameters=None):
+        """
+        Packs rocket designs into a batch.
+
+        Parameters
+            ----------
+            rockets - `list of rockets`
+                Rockets to be packed.
+            parameters - `list`
+                Design parameters whose derivatives are evaluated along with the values, as described in
+                KSPython.Sensitivity. Defaults to none.
+
+        Return
+            ----------
+            batch - `RocketBatch`
+                Batch with one design per rocket, in the same order.
+
+        """
+        rockets = list(rockets)
+        for rocket in rockets:
+            if not isinstance(rocket, Rocket):
+                raise KerbalException('Only rockets can be added to a batch.')
+        num_designs = len(rockets)
+        max_stages = max([rocket.num_stages() for rocket in rockets], default=0)
+        shape = (num_designs, max_stages)
+        full_mass = np.zeros(shape)
+        empty_mass = np.zeros(shape)
+        cost = np.zeros(shape)
+        thrust = {'atm': np.zeros(shape), 'vac': np.zeros(shape)}
+        relative_isp = {'atm': np.zeros(shape), 'vac': np.zeros(shape)}
+        payload = np.zeros(num_designs)
+        fire_stage = np.tile(np.arange(max_stages), (num_designs, 1))
+        restricted = np.zeros(shape, dtype=bool)
+        mask = np.zeros(shape, dtype=bool)
+        for design, rocket in enumerate(rockets):
+            num_stages = rocket.num_stages()
+            for stage_num, stage in enumerate(rocket.stages):
+                full_mass[design, stage_num] = stage.calculate_full_mass()
+                empty_mass[design, stage_num] = stage.calculate_empty_mass()
+                cost[design, stage_num] = stage.calculate_cost()
+                for loc in ('atm', 'vac'):
+                    thrust[loc][design, stage_num], relative_isp[loc][design, stage_num] = stage._engine_totals(loc)
+            payload[design] = rocket.payload
+            mask[design, :num_stages] = True
+            graph = rocket.graph
+            fire_stage[design, :num_stages] = [graph.fire_stage(stage_num) for stage_num in range(num_stages)]
+            restricted[design, :num_stages] = [graph.is_restricted(stage_num) for stage_num in range(num_stages)]
+        tangents = None
+        if parameters is not None:
+            from KSPython.Sensitivity import parameter_tangents
+            parameters, tangents = parameter_tangents(rockets, parameters, max_stages)
+        batch = cls(full_mass, empty_mass, cost, thrust, relative_isp, payload=payload,
+                    fire_stage=fire_stage, restricted=restricted, mask=mask, tangents=tangents)
+        batch.parameters = parameters
+        return batch
+
+    def num_designs(self):
+        """
+        Number of designs in the batch.
+
+        Return
+            ----------
+            num_designs - `int`
+                Number of designs.
+
+        """
+        return self.full_mass.shape[0]
+
+    def _evaluate(self, loc):
+        """Runs the staging model for every design at once, and caches the results for the location."""
+        _loc_check(loc)
+        if loc in self._results:
+            return self._results[loc]
+        num_designs, max_stages = self.full_mass.shape
+        designs = np.arange(num_designs)
+        stages = np.arange(max_stages)
+        stage_thrust = np.where(self.mask, self.thrust[loc], 0.0)
+        stage_relative_isp = np.where(self.mask, self.relative_isp[loc], 0.0)
+        full_mass = np.where(self.mask, self.full_mass, 0.0)
+        empty_mass = np.where(self.mask, self.empty_mass, 0.0)
+
+        # firing[d, k, p]: engines of stage p are burning during stage k
+        firing = (stages[None, :, None] == stages[None, None, :]) | (
+            (stages[None, None, :] > stages[None, :, None]) & (self.fire_stage[:, None, :] <= stages[None, :, None]))
+        # closest stage with restricted fuel flow at or above each stage, engines above it do not burn its fuel
+        stage_max = np.full((num_designs, max_stages), max_stages)
+        for stage_num in range(max_stages - 1, -1, -1):
+            above = stage_max[:, stage_num + 1] if stage_num + 1 < max_stages else max_stages
+            stage_max[:, stage_num] = np.where(self.restricted[:, stage_num], stage_num, above)
+        group = firing & (stages[None, None, :] <= stage_max[:, :, None])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            thrust = (firing * stage_thrust[:, None, :]).sum(axis=2)
+            relative_isp = (firing * stage_relative_isp[:, None, :]).sum(axis=2)
+            isp = thrust / relative_isp
+            group_thrust = (group * stage_thrust[:, None, :]).sum(axis=2)
+            group_relative_isp = (group * stage_relative_isp[:, None, :]).sum(axis=2)
+            group_isp = group_thrust / group_relative_isp
+            mass_flow = group_thrust / (group_isp*9.81)
+
+            restricted_below = np.zeros((num_designs, max_stages), dtype=bool)
+            restricted_below[:, 1:] = self.restricted[:, :-1]
+            leaking = restricted_below & (self.fire_stage < stages) & self.mask
+            fuel = full_mass - empty_mass
+            valid = np.all(np.isfinite(mass_flow) | ~self.mask, axis=1) # stages without engines cannot burn
+            staging_time = np.zeros((num_designs, max_stages + 1))
+            prestage_mass_loss = np.zeros((num_designs, max_stages))
+            burn_time = np.zeros((num_designs, max_stages))
+            for stage_num in range(max_stages):
+                elapsed = staging_time[:, stage_num] - staging_time[designs, self.fire_stage[:, stage_num]]
+                mass_loss = np.where(leaking[:, stage_num], mass_flow[:, stage_num] * elapsed, 0.0)
+                valid &= ~(mass_loss > fuel[:, stage_num])
+                burn = np.where(self.mask[:, stage_num], (fuel[:, stage_num] - mass_loss) / mass_flow[:, stage_num], 0.0)
+                prestage_mass_loss[:, stage_num] = mass_loss
+                burn_time[:, stage_num] = burn
+                staging_time[:, stage_num + 1] = staging_time[:, stage_num] + burn
+
+            # fuel lost by every leaking stage still attached at the start of each stage
+            events = np.arange(max_stages + 1)[None, :, None]
+            fire_time = np.take_along_axis(staging_time, self.fire_stage, axis=1)
+            lost = leaking[:, None, :] & (stages[None, None, :] >= events) & (self.fire_stage[:, None, :] < events)
+            total_prestage_mass_loss = (np.where(lost, mass_flow[:, None, :] * (staging_time[:, :, None] - fire_time[:, None, :]), 0.0)).sum(axis=2)
+
+            upper_full = np.zeros((num_designs, max_stages))
+            upper_full[:, :-1] = np.cumsum(full_mass[:, :0:-1], axis=1)[:, ::-1]
+            upper_mass = upper_full + self.payload[:, None]
+            start_mass = full_mass + upper_mass - total_prestage_mass_loss[:, :-1]
+            end_mass = empty_mass + upper_mass - total_prestage_mass_loss[:, 1:]
+            stage_dV = np.log(start_mass/end_mass)*isp*9.81
+
+            if self.tangents is not None:
+                derivatives = self._propagate_tangents(loc, {
+                    'firing': firing, 'group': group, 'thrust': thrust, 'relative_isp': relative_isp, 'isp': isp,
+                    'mass_flow': mass_flow, 'leaking': leaking, 'burn_time': burn_time, 'staging_time': staging_time,
+                    'fire_time': fire_time, 'lost': lost, 'start_mass': start_mass, 'end_mass': end_mass})
+
+        invalid = ~self.mask | ~valid[:, None]
+        self._results[loc] = {
+            'valid': valid,
+            'thrust': np.where(invalid, np.nan, thrust),
+            'isp': np.where(invalid, np.nan, isp),
+            'burn_time': np.where(invalid, np.nan, burn_time),
+            'prestage_mass_loss': np.where(invalid, np.nan, prestage_mass_loss),
+            'start_mass': np.where(invalid, np.nan, start_mass),
+            'end_mass': np.where(invalid, np.nan, end_mass),
+            'stage_dV': np.where(~self.mask, 0.0, np.where(valid[:, None], stage_dV, np.nan)),
+        }
+        if self.tangents is not None:
+            invalid = invalid[:, :, None]
+            for name, values in derivatives.items():
+                if name == 'd_stage_dV':
+                    values = np.where(~self.mask[:, :, None], 0.0, np.where(valid[:, None, None], values, np.nan))
+                else:
+                    values = np.where(invalid, np.nan, values)
+                self._results[loc][name] = values
+        return self._results[loc]
+
+    def _propagate_tangents(self, loc, model):
+        """
+        Forward mode derivatives of the staging model, from the values evaluated by _evaluate. Every derivative has the
+        parameters as last axis.
+
+        """
+        num_designs, max_stages = self.full_mass.shape
+        designs = np.arange(num_designs)
+        mask = self.mask[:, :, None]
+        d_stage_thrust = np.where(mask, self.tangents['thrust'][loc], 0.0)
+        d_stage_relative_isp = np.where(mask, self.tangents['relative_isp'][loc], 0.0)
+        d_full_mass = np.where(mask, self.tangents['full_mass'], 0.0)
+        d_empty_mass = np.where(mask, self.tangents['empty_mass'], 0.0)
+        firing = model['firing'].astype(float)
+        group = model['group'].astype(float)
+        mass_flow = model['mass_flow']
+        burn_time = model['burn_time']
+        staging_time = model['staging_time']
+
+        d_thrust = np.einsum('dkp,dpq->dkq', firing, d_stage_thrust)
+        d_relative_isp = np.einsum('dkp,dpq->dkq', firing, d_stage_relative_isp)
+        d_isp = (d_thrust - model['isp'][:, :, None]*d_relative_isp) / model['relative_isp'][:, :, None]
+        d_mass_flow = np.einsum('dkp,dpq->dkq', group, d_stage_relative_isp) / 9.81 # mass flow is the group relative ISP/g
+
+        d_fuel = d_full_mass - d_empty_mass
+        d_staging_time = np.zeros((num_designs, max_stages + 1, d_fuel.shape[2]))
+        d_burn_time = np.zeros(d_fuel.shape)
+        for stage_num in range(max_stages):
+            fire_stage = self.fire_stage[:, stage_num]
+            elapsed = staging_time[:, stage_num] - staging_time[designs, fire_stage]
+            d_elapsed = d_staging_time[:, stage_num] - d_staging_time[designs, fire_stage]
+            d_mass_loss = np.where(model['leaking'][:, stage_num, None],
+                                   d_mass_flow[:, stage_num]*elapsed[:, None] + mass_flow[:, stage_num, None]*d_elapsed, 0.0)
+            d_burn = np.where(mask[:, stage_num], (d_fuel[:, stage_num] - d_mass_loss - burn_time[:, stage_num, None]*d_mass_flow[:, stage_num])
+                              / mass_flow[:, stage_num, None], 0.0)
+            d_burn_time[:, stage_num] = d_burn
+            d_staging_time[:, stage_num + 1] = d_staging_time[:, stage_num] + d_burn
+
+        lost = model['lost']
+        lost_flow = np.where(lost, mass_flow[:, None, :], 0.0)
+        lost_time = np.where(lost, staging_time[:, :, None] - model['fire_time'][:, None, :], 0.0)
+        d_fire_time = np.take_along_axis(d_staging_time, self.fire_stage[:, :, None], axis=1)
+        d_total_prestage_mass_loss = (np.einsum('djc,dcq->djq', lost_time, d_mass_flow)
+                                      + lost_flow.sum(axis=2)[:, :, None]*d_staging_time
+                                      - np.einsum('djc,dcq->djq', lost_flow, d_fire_time))
+
+        d_upper_mass = np.zeros(d_full_mass.shape)
+        d_upper_mass[:, :-1] = np.cumsum(d_full_mass[:, :0:-1], axis=1)[:, ::-1]
+        d_upper_mass += self.tangents['payload'][:, None, :]
+        d_start_mass = d_full_mass + d_upper_mass - d_total_prestage_mass_loss[:, :-1]
+        d_end_mass = d_empty_mass + d_upper_mass - d_total_prestage_mass_loss[:, 1:]
+        start_mass = model['start_mass'][:, :, None]
+        end_mass = model['end_mass'][:, :, None]
+        d_stage_dV = 9.81*(model['isp'][:, :, None]*(d_start_mass/start_mass - d_end_mass/end_mass)
+                           + np.log(start_mass/end_mass)*d_isp)
+        return {'d_thrust': d_thrust, 'd_burn_time': d_burn_time, 'd_start_mass': d_start_mass, 'd_stage_dV': d_stage_dV}
+
+    def gradient(self, quantity, loc='atm', g=9.81, dV_out=2500):
+        """
+        Derivatives of a quantity of every design with respect to each design parameter, evaluated along with the
+        values. Requires a batch built with tangents, as by from_rockets with parameters.
+
+        Parameters
+            ----------
+            quantity - `{'stage_dV', 'dV', 'adjusted_dV', 'twr', 'burn_time', 'total_mass', 'total_cost'}`
+                Quantity to be derived, as given by calculate_stage_dV, calculate_dV, adjusted_dV, calculate_twr,
+                engine_burn_time, calculate_total_mass and calculate_total_cost.
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed. Not used by adjusted_dV, total_mass and total_cost.
+            g - `float`
+                Gravity used for the thrust to weight ratio (default for Kerbin).
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+
+        Return
+            ----------
+            gradient - `array`
+                Derivatives, with the parameters as last axis: shape (num_designs, max_stages, num_parameters) for
+                per stage quantities and (num_designs, num_parameters) for the others.
+
+        """
+        if self.tangents is None:
+            raise KerbalException('The batch has no tangents, build it with parameters to evaluate derivatives.')
+        if quantity not in GRADIENTS:
+            raise KerbalException(f'quantity can only be one of {", ".join(GRADIENTS)}, and not {quantity}.')
+        if quantity == 'total_mass':
+            return np.where(self.mask[:, :, None], self.tangents['full_mass'], 0.0).sum(axis=1) + self.tangents['payload']
+        if quantity == 'total_cost':
+            return np.where(self.mask[:, :, None], self.tangents['cost'], 0.0).sum(axis=1)
+        if quantity == 'adjusted_dV':
+            dV_atm = self.calculate_dV(loc = 'atm')[:, None]
+            dV_vac = self.calculate_dV(loc = 'vac')[:, None]
+            return (dV_out*dV_vac/dV_atm**2)*self.gradient('dV', 'atm') + ((dV_atm - dV_out)/dV_atm)*self.gradient('dV', 'vac')
+        results = self._evaluate(loc)
+        if quantity == 'stage_dV':
+            return results['d_stage_dV']
+        if quantity == 'dV':
+            return results['d_stage_dV'].sum(axis=1)
+        if quantity == 'burn_time':
+            return results['d_burn_time']
+        start_mass = results['start_mass'][:, :, None]
+        return results['d_thrust']/(g*start_mass) - (results['thrust'][:, :, None]/(g*start_mass))*results['d_start_mass']/start_mass
+
+    def valid(self, loc='atm'):
+        """
+        Designs that can be evaluated. Designs whose stages lose all their fuel before being staged are not valid,
+        and their results are NaN.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            valid - `array of bool`
+                True for valid designs.
+
+        """
+        return self._evaluate(loc)['valid']
+
+    def calculate_stage_dV(self, loc='atm'):
+        """
+        Calculates the delta-V of every stage of every design. Padded stages have no delta-V.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of each stage [m/s].
+
+        """
+        return self._evaluate(loc)['stage_dV']
+
+    def calculate_dV(self, loc='atm'):
+        """
+        Calculates the delta-V of every design.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of each design [m/s].
+
+        """
+        return self.calculate_stage_dV(loc).sum(axis=1)
+
+    def adjusted_dV(self, dV_out=2500):
+        """
+        Calculates the true delta-V of every design, by adjusting for the total required for leaving atmosphere.
+
+        Parameters
+            ----------
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+                    * 2500 - Kerbin
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of each design [m/s].
+
+        """
+        dV_atm = self.calculate_dV(loc = 'atm')
+        dV_vac = self.calculate_dV(loc = 'vac')
+        return _adjusted_dV(dV_atm, dV_vac, dV_out)
+
+    def calculate_twr(self, g=9.81, loc='atm'):
+        """
+        Calculates the thrust to weight ratio at the start of every stage of every design.
+
+        Parameters
+            ----------
+            g - `float`
+                Gravity (default for Kerbin).
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            twr - `array`
+                Thrust to weight ratio of each stage.
+
+        """
+        results = self._evaluate(loc)
+        return results['thrust']/(g*results['start_mass'])
+
+    def engine_burn_time(self, loc='atm'):
+        """
+        Calculates the time every stage of every design spends burning at maximum thrust.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            burn_time - `array`
+                Burn time of each stage [s].
+
+        """
+        return self._evaluate(loc)['burn_time']
+
+    def calculate_total_mass(self):
+        """
+        Total mass of every design when full, payload included.
+
+        Return
+            ----------
+            total_mass - `array`
+                Total mass of each design [ton].
+
+        """
+        return np.where(self.mask, self.full_mass, 0.0).sum(axis=1) + self.payload
+
+    def calculate_total_cost(self):
+        """
+        Total cost of every design.
+
+        Return
+            ----------
+            total_cost - `array`
+                Total cost of each design.
+
+        """
+        return np.where(self.mask, self.cost, 0.0).sum(axis=1)
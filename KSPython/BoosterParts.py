@@ -31,15 +31,20 @@ Note:
 """
 
 from KSPython import SolidEngine
+from KSPython.KSPython import _lazy_parts
 
 # name, mass_full, mass_empty, cost, thrust_atm, thrust_vac, isp_atm, isp_vac): 
 
-RT5 = SolidEngine('RT-5 "Flea" Solid Fuel Booster', 1.5, 0.45, 200, 162.91, 192, 140, 165)
-RT10 = SolidEngine('RT-10 "Hammer" Solid Fuel Booster', 3.56, 0.75, 400, 197.9, 227, 170, 195)
-BACC = SolidEngine('BACC "Thumper" Solid Fuel Booster', 7.65, 1.5, 850, 250, 300, 175, 210)
-S1 = SolidEngine('S1 SRB-KD25k "Kickback" Solid Fuel Booster', 24, 4.5, 2700, 593.86, 670, 195, 220)
-Sepratron = SolidEngine('Sepratron I', 0.1, 0, 75, 13.79, 18, 118, 154)
-FM1 = SolidEngine('FM1 "Mite" Solid Fuel Booster', 0.375, 0.075, 75, 11.012, 12.5, 185, 210)
-F3S0 = SolidEngine('F3S0 "Shrimp" Solid Fuel Booster', 0.875, 0.155, 150, 26.512, 30, 195, 215)
-S217 = SolidEngine('S2-17 "Thoroughbred" Solid Fuel Booster', 70, 10, 9000, 1515.217, 1700, 205, 230)
-FM1 = SolidEngine('FM1 "Mite" Solid Fuel Booster', 144, 21, 18500, 2948.936, 3300, 210, 235)
\ No newline at end of file
+_PARTS = { # parts are only built when they are imported
+    'RT5': ('RT-5 "Flea" Solid Fuel Booster', 1.5, 0.45, 200, 162.91, 192, 140, 165),
+    'RT10': ('RT-10 "Hammer" Solid Fuel Booster', 3.56, 0.75, 400, 197.9, 227, 170, 195),
+    'BACC': ('BACC "Thumper" Solid Fuel Booster', 7.65, 1.5, 850, 250, 300, 175, 210),
+    'S1': ('S1 SRB-KD25k "Kickback" Solid Fuel Booster', 24, 4.5, 2700, 593.86, 670, 195, 220),
+    'Sepratron': ('Sepratron I', 0.1, 0, 75, 13.79, 18, 118, 154),
+    'FM1': ('FM1 "Mite" Solid Fuel Booster', 0.375, 0.075, 75, 11.012, 12.5, 185, 210),
+    'F3S0': ('F3S0 "Shrimp" Solid Fuel Booster', 0.875, 0.155, 150, 26.512, 30, 195, 215),
+    'S217': ('S2-17 "Thoroughbred" Solid Fuel Booster', 70, 10, 9000, 1515.217, 1700, 205, 230),
+    'FM1': ('FM1 "Mite" Solid Fuel Booster', 144, 21, 18500, 2948.936, 3300, 210, 235),
+}
+
+__all__, __getattr__, __dir__ = _lazy_parts(globals(), SolidEngine, _PARTS)
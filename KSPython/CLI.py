@@ -0,0 +1,313 @@
+"""
+
+This submodule is the kspython command, which evaluates design files from the shell.
+
+Designs are read from JSONL files, one design per line as written by Serialization.dumps, or from JSON files holding
+a single design or a list of them. '-' reads JSONL from the standard input. Designs are processed in chunks and
+results are written as soon as each chunk is done, in the order of the input, so files of any size can be piped
+through it.
+
+Commands:
+
+* eval - delta V, TWR and burn time of every design, as JSONL (the full report) or CSV (one row per design).
+* sweep - delta V of every design for a range of payloads and stage extra masses, one row per point.
+* report - the text report of every design, as printed by Rocket.generate_report, or JSONL.
+
+Example
+    -------
+    $ kspython eval designs.jsonl --jobs 4 -o results.jsonl
+    $ kspython sweep design.json --payload 0:50:51 --format csv
+    $ cat designs.jsonl | kspython report - --profile
+
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from KSPython.KSPython import KerbalException
+
+COMMANDS = ('eval', 'sweep', 'report')
+FORMATS = {'eval': ('jsonl', 'csv'), 'sweep': ('jsonl', 'csv'), 'report': ('text', 'jsonl')}
+EVAL_COLUMNS = ('file', 'line', 'name', 'mass', 'cost', 'payload', 'adjusted_dV', 'dV_atm', 'dV_vac', 'error')
+SWEEP_COLUMNS = ('file', 'line', 'name', 'payload', 'adjusted_dV', 'dV_atm', 'dV_vac', 'error')
+
+
+def _read(path):
+    """(path, line_number, text) of every design of a file, without loading JSONL files whole."""
+    if path == '-':
+        for line_number, line in enumerate(sys.stdin, 1):
+            yield path, line_number, line
+    elif path.endswith('.jsonl'):
+        with open(path) as lines:
+            for line_number, line in enumerate(lines, 1):
+                yield path, line_number, line
+    else:
+        with open(path) as file:
+            try:
+                designs = json.load(file)
+            except ValueError as error:
+                raise KerbalException(f'{path} is not valid JSON: {error}')
+        for number, design in enumerate(designs if isinstance(designs, list) else [designs], 1):
+            yield path, number, json.dumps(design)
+
+
+def _chunks(paths, chunk_size):
+    """Designs in chunks of consecutive lines of the same file."""
+    for path in paths:
+        designs = _read(path)
+        while True:
+            chunk = list(islice(designs, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+
+def _parse_range(text):
+    """Values of start:stop:num (evenly spaced, both ends included) or of a comma separated list."""
+    if ':' in text:
+        import numpy as np
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return [float(value) for value in text.split(',')]
+
+
+def _error_record(path, line_number, error):
+    message = error.message if isinstance(error, KerbalException) else f'Design cannot be evaluated ({error}).'
+    return {'file': path, 'line': line_number, 'error': message}
+
+
+def _evaluate(chunk, options):
+    from KSPython.Serialization import evaluate_designs
+    path, start = chunk[0][0], chunk[0][1]
+    records = []
+    for line_number, report in evaluate_designs([text for _, _, text in chunk], batch_size=len(chunk), g=options['g'],
+                                                dV_out=options['dV_out'], errors='keep', start=start):
+        if isinstance(report, KerbalException):
+            records.append(_error_record(path, line_number, report))
+        else:
+            records.append(dict({'file': path, 'line': line_number}, **report.to_dict()))
+    return records
+
+
+def _sweep(chunk, options):
+    import numpy as np
+    from KSPython.Serialization import loads
+    records = []
+    for path, line_number, text in chunk:
+        if not text.strip():
+            continue
+        try:
+            rocket = loads(text)
+            if not rocket.num_stages():
+                raise KerbalException('Design cannot be evaluated, it has no stages or no delta V.')
+            result = rocket.sweep(payload=options['payload'], extra_mass=options['extra_mass'], grid=options['grid'],
+                                  g=options['g'])
+        except (KerbalException, ArithmeticError) as error: # stages without engines divide by zero
+            records.append(_error_record(path, line_number, error))
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns = {'dV_atm': result.dV('atm'), 'dV_vac': result.dV('vac'),
+                       'adjusted_dV': result.adjusted_dV(options['dV_out'])}
+        payload = np.broadcast_to(result.payload, result.shape)
+        extra_mass = {stage_num: np.broadcast_to(value, result.shape) for stage_num, value in result.extra_mass.items()}
+        for index in np.ndindex(result.shape):
+            record = {'file': path, 'line': line_number, 'name': rocket.name, 'payload': float(payload[index])}
+            for stage_num, value in extra_mass.items():
+                record[f'extra_mass_{stage_num}'] = float(value[index])
+            for name, values in columns.items():
+                value = float(values[index])
+                record[name] = value if np.isfinite(value) else None # NaN is not valid JSON
+            records.append(record)
+    return records
+
+
+def _report(chunk, options):
+    from KSPython.Serialization import loads
+    records = []
+    for path, line_number, text in chunk:
+        if not text.strip():
+            continue
+        try:
+            report = loads(text).report(g=options['g'], dV_out=options['dV_out'])
+        except (KerbalException, ArithmeticError) as error: # stages without engines divide by zero
+            records.append(_error_record(path, line_number, error))
+            continue
+        record = dict({'file': path, 'line': line_number}, **report.to_dict())
+        if options['format'] == 'text':
+            record['text'] = report.to_text()
+        records.append(record)
+    return records
+
+
+_PROCESS = {'eval': _evaluate, 'sweep': _sweep, 'report': _report}
+
+
+def _process(command, chunk, options):
+    """Records of a chunk of designs. Runs in the worker processes, so it only takes and returns plain values."""
+    return _PROCESS[command](chunk, options)
+
+
+class _Output:
+    """Writes records as they come, flushing after every chunk."""
+    def __init__(self, file, command, options):
+        self.file = file
+        self.format = options['format']
+        self.errors = options['errors']
+        self.failed = None
+        self.count = 0
+        self.writer = None
+        if self.format == 'csv':
+            columns = EVAL_COLUMNS if command == 'eval' else SWEEP_COLUMNS
+            if command == 'sweep':
+                stages = [f'extra_mass_{stage_num}' for stage_num in sorted(options['extra_mass'])]
+                columns = columns[:4] + tuple(stages) + columns[4:]
+            self.writer = csv.DictWriter(file, columns, extrasaction='ignore', lineterminator='\n')
+            self.writer.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if 'error' in record:
+                if self.errors == 'raise':
+                    self.failed = record
+                    break
+                if self.errors == 'skip':
+                    continue
+            self.count += 1
+            if self.writer is not None:
+                self.writer.writerow(record)
+            elif self.format == 'text':
+                if 'error' in record:
+                    self.file.write(f'{record["file"]}:{record["line"]}: {record["error"]}\n')
+                else:
+                    self.file.write(record['text'] + '\n')
+            else:
+                self.file.write(json.dumps({key: value for key, value in record.items() if key != 'text'}) + '\n')
+        self.file.flush()
+        return self.failed is None
+
+
+def _run(args, options, output):
+    chunks = _chunks(args.files, args.chunk_size)
+    if args.jobs == 1:
+        for chunk in chunks:
+            if not output.write(_process(args.command, chunk, options)):
+                return
+        return
+    with ProcessPoolExecutor(args.jobs) as pool:
+        pending = deque() # at most two chunks per worker are held at a time, results are written in order
+        for chunk in chunks:
+            pending.append(pool.submit(_process, args.command, chunk, options))
+            if len(pending) >= 2*args.jobs and not output.write(pending.popleft().result()):
+                break
+        while pending and output.failed is None:
+            output.write(pending.popleft().result())
+        for future in pending:
+            future.cancel()
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='kspython', description='Evaluate KSPython rocket designs from JSON and JSONL files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('eval', 'delta V, TWR and burn time of every design'),
+                               ('sweep', 'delta V of every design for ranges of payloads and stage extra masses'),
+                               ('report', 'report of every design')):
+        subparser = commands.add_parser(command, help=help_text, description=help_text.capitalize() + '.')
+        subparser.add_argument('files', nargs='+', help="design files, .jsonl for one design per line, .json for a "
+                                                        "design or a list of designs, '-' for JSONL from stdin")
+        subparser.add_argument('-o', '--output', help='file where results are written (default stdout)')
+        subparser.add_argument('-f', '--format', choices=FORMATS[command], default=FORMATS[command][0],
+                               help=f'output format (default {FORMATS[command][0]})')
+        subparser.add_argument('-j', '--jobs', type=int, default=1, help='worker processes, 0 for one per CPU (default 1)')
+        subparser.add_argument('--chunk-size', type=int, default=1000, help='designs processed at a time (default 1000)')
+        subparser.add_argument('--errors', choices=('raise', 'skip', 'keep'), default='raise',
+                               help='designs that cannot be read or evaluated stop the command, are skipped or are '
+                                    'written with their error (default raise)')
+        subparser.add_argument('--g', type=float, default=9.81, help='gravity for the TWR (default 9.81)')
+        subparser.add_argument('--dV-out', type=float, default=2500, help='delta V to leave the atmosphere (default 2500)')
+        subparser.add_argument('--profile', action='store_true',
+                               help='print the run time and, with a single job, the time spent in each method to stderr')
+        if command == 'sweep':
+            subparser.add_argument('--payload', type=_parse_range,
+                                   help='payloads [ton], as start:stop:num or a comma separated list (default the design payload)')
+            subparser.add_argument('--extra-mass', action='append', default=[], metavar='STAGE=RANGE',
+                                   help='extra mass added to a stage [ton], as 1=0:5:11, can be repeated')
+            subparser.add_argument('--grid', action='store_true', help='evaluate every combination of the ranges')
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the kspython command.
+
+    Parameters
+        ----------
+        argv - `list of strings`
+            Command line arguments. Defaults to sys.argv.
+
+    Return
+        ----------
+        status - `int`
+            0 if every design was processed, 1 if a design stopped the command.
+
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 0 or args.chunk_size < 1:
+        parser.error('--jobs cannot be negative and --chunk-size must be at least 1')
+    args.jobs = args.jobs or os.cpu_count() or 1
+    options = {'g': args.g, 'dV_out': args.dV_out, 'format': args.format, 'errors': args.errors}
+    if args.command == 'sweep':
+        extra_mass = {}
+        for value in args.extra_mass:
+            stage_num, _, values = value.partition('=')
+            try:
+                extra_mass[int(stage_num)] = _parse_range(values)
+            except ValueError:
+                parser.error(f'--extra-mass must be given as STAGE=RANGE, and not {value}')
+        sizes = {len(values) for values in [args.payload] + list(extra_mass.values()) if values is not None}
+        if not args.grid and len(sizes - {1}) > 1:
+            parser.error('--payload and --extra-mass ranges must have the same number of values, or use --grid')
+        options.update(payload=args.payload, extra_mass=extra_mass, grid=args.grid)
+
+    file = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+    start = time.perf_counter()
+    try:
+        output = _Output(file, args.command, options)
+        if args.profile and args.jobs == 1:
+            from KSPython.Profiler import profile
+            with profile() as profiler:
+                _run(args, options, output)
+        else:
+            profiler = None
+            _run(args, options, output)
+    except BrokenPipeError: # output closed early, as when piped to head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (KerbalException, OSError) as error:
+        print(f'kspython: {error}', file=sys.stderr)
+        return 1
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+    if args.profile:
+        elapsed = time.perf_counter() - start
+        print(f'{output.count} results in {elapsed:.3f} s ({output.count/elapsed:.1f} per second), '
+              f'{args.jobs} job{"s" if args.jobs > 1 else ""}', file=sys.stderr)
+        if profiler is not None:
+            print(profiler.table(limit=20), file=sys.stderr)
+    if output.failed is not None:
+        print(f'kspython: {output.failed["file"]}:{output.failed["line"]}: {output.failed["error"]}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
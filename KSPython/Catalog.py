@@ -0,0 +1,307 @@
+"""
+
+This submodule gathers parts into a catalog that can be queried by their stats.
+
+Stats are kept in columnar arrays, one entry per part, along with a sorted index of every column. A query looks up
+each range with a binary search on the sorted indexes, and only checks the parts inside the narrowest range against
+the other conditions, so most of the catalog is never visited.
+
+Columns:
+
+* mass, mass_empty, cost, thrust_atm, thrust_vac, isp_atm, isp_vac - stats of the part. mass_empty is the same as mass
+  for parts without fuel, and thrusts and ISPs are NaN for parts without an engine.
+* fuel_mass - mass - mass_empty.
+* thrust_mass_atm, thrust_mass_vac - thrust divided by mass.
+
+Kinds:
+
+* liquid - LiquidEngine parts.
+* solid - SolidEngine parts.
+* tank - RocketFuelTank parts.
+* engine - liquid and solid parts.
+* other - any other part.
+
+Example
+    -------
+    >>> catalog = PartCatalog()
+    >>> catalog.query(kind='liquid', isp_vac=(300, None), thrust_atm=(200, None), sort_by='thrust_mass_atm', descending=True)
+
+"""
+
+import importlib
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, Part, Engine, LiquidEngine, SolidEngine, RocketFuelTank
+
+DEFAULT_MODULES = ('KSPython.LiquidEngineParts', 'KSPython.BoosterParts', 'KSPython.RocketFuelTankParts')
+
+COLUMNS = ('mass', 'mass_empty', 'cost', 'thrust_atm', 'thrust_vac', 'isp_atm', 'isp_vac',
+           'fuel_mass', 'thrust_mass_atm', 'thrust_mass_vac')
+
+KINDS = ('liquid', 'solid', 'tank', 'engine', 'other')
+
+
+def _part_kind(part):
+    if isinstance(part, LiquidEngine):
+        return 'liquid'
+    if isinstance(part, SolidEngine):
+        return 'solid'
+    if isinstance(part, RocketFuelTank):
+        return 'tank'
+    return 'other'
+
+
+def _part_stats(part):
+    mass_empty = getattr(part, 'mass_empty', part.mass)
+    if isinstance(part, Engine):
+        engine = (part.thrust_atm, part.thrust_vac, part.isp_atm, part.isp_vac)
+    else:
+        engine = (np.nan,)*4
+    return (part.mass, mass_empty, part.cost) + engine
+
+
+class PartCatalog:
+    """Collection of parts indexed by their stats.
+
+    Parameters
+        ----------
+        modules - `list of strings`
+            Modules whose parts are added to the catalog, with their variable names as ids. Defaults to
+            LiquidEngineParts, BoosterParts and RocketFuelTankParts. An empty list gives an empty catalog.
+
+    Example
+        -------
+        >>> catalog = PartCatalog()
+        >>> catalog.add_part(RocketFuelTank('Custom Tank', 10, 1.25, 2000), 'CustomTank')
+        >>> catalog.query(kind='tank', fuel_mass=(5, 20), sort_by='cost')
+
+    """
+    def __init__(self, modules=DEFAULT_MODULES):
+        self.parts = []
+        self.ids = []
+        self._id_index = {}
+        self._part_ids = {} # first id of each part {part: part_id}
+        self._kinds = []
+        self._stats = []
+        self._columns = None
+        self._sorted = {}
+        for module_name in modules:
+            module = importlib.import_module(module_name)
+            names = getattr(module, '__all__', [name for name in vars(module) if not name.startswith('_')])
+            for name in names:
+                part = getattr(module, name)
+                if isinstance(part, Part):
+                    self.add_part(part, name)
+
+    def __len__(self):
+        return len(self.parts)
+
+    def add_part(self, part, part_id=None):
+        """
+        Adds a part to the catalog.
+
+        Parameters
+            ----------
+            part - `part`
+                Part to be added.
+            part_id - `string`
+                Id of the part in the catalog. Defaults to the name of the part.
+
+        """
+        if not isinstance(part, Part):
+            raise KerbalException('Only parts can be added to a catalog.')
+        part_id = part.name if part_id is None else part_id
+        if part_id in self._id_index:
+            raise KerbalException(f'Part id {part_id} is already in the catalog.')
+        self._id_index[part_id] = len(self.parts)
+        self._part_ids.setdefault(part, part_id)
+        self.parts.append(part)
+        self.ids.append(part_id)
+        self._kinds.append(_part_kind(part))
+        self._stats.append(_part_stats(part))
+        self._columns = None # columns and indexes are rebuilt on the next query
+        self._sorted = {}
+
+    def add_parts(self, parts):
+        """
+        Adds parts to the catalog.
+
+        Parameters
+            ----------
+            parts - `list of parts/dict`
+                Parts to be added, or a dictionary {part_id: part}.
+
+        """
+        if isinstance(parts, dict):
+            for part_id, part in parts.items():
+                self.add_part(part, part_id)
+        else:
+            for part in parts:
+                self.add_part(part)
+
+    def get(self, part_id):
+        """
+        Part with the given id.
+
+        Parameters
+            ----------
+            part_id - `string`
+                Id of the part.
+
+        Return
+            ----------
+            part - `part`
+                Part with that id.
+
+        """
+        if part_id not in self._id_index:
+            raise KerbalException(f'Part id {part_id} is not in the catalog.')
+        return self.parts[self._id_index[part_id]]
+
+    def part_id(self, part):
+        """
+        Id of a part in the catalog.
+
+        Parameters
+            ----------
+            part - `part`
+                Part to be looked up. Only the same part object is found, not a copy with the same stats.
+
+        Return
+            ----------
+            part_id - `string`
+                Id of the part, or None if it is not in the catalog.
+
+        """
+        return self._part_ids.get(part)
+
+    def column(self, name):
+        """
+        Values of a column for every part, in the order they were added.
+
+        Parameters
+            ----------
+            name - `string`
+                Name of the column.
+
+        Return
+            ----------
+            values - `array`
+                Values of the column.
+
+        """
+        if name not in COLUMNS:
+            raise KerbalException(f'{name} is not a catalog column. Columns are {", ".join(COLUMNS)}.')
+        return self._build()[name]
+
+    def _build(self):
+        if self._columns is None:
+            stats = np.array(self._stats, dtype=float).reshape(len(self._stats), 7)
+            columns = dict(zip(COLUMNS[:7], stats.T))
+            columns['fuel_mass'] = columns['mass'] - columns['mass_empty']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns['thrust_mass_atm'] = columns['thrust_atm'] / columns['mass']
+                columns['thrust_mass_vac'] = columns['thrust_vac'] / columns['mass']
+            kinds = np.array(self._kinds, dtype=object)
+            self._kind_index = {kind: np.flatnonzero(kinds == kind) for kind in KINDS}
+            self._kind_index['engine'] = np.flatnonzero((kinds == 'liquid') | (kinds == 'solid'))
+            self._columns = columns
+        return self._columns
+
+    def _sorted_index(self, name):
+        """Positions of the parts sorted by a column, and the sorted values. NaN values are left out."""
+        if name not in self._sorted:
+            values = self._build()[name]
+            order = np.argsort(values, kind='stable')
+            order = order[~np.isnan(values[order])]
+            self._sorted[name] = (order, values[order])
+        return self._sorted[name]
+
+    def _select(self, kind, sort_by, descending, limit, ranges):
+        columns = self._build()
+        if kind is not None and kind not in KINDS:
+            raise KerbalException(f'kind can only be one of {", ".join(KINDS)}, and not {kind}.')
+        for name in list(ranges) + ([sort_by] if sort_by is not None else []):
+            if name not in COLUMNS:
+                raise KerbalException(f'{name} is not a catalog column. Columns are {", ".join(COLUMNS)}.')
+        for name, value in ranges.items():
+            if not isinstance(value, (tuple, list)) or len(value) != 2:
+                raise KerbalException(f'The range of {name} must be given as (low, high).')
+
+        # narrowest range first, found by binary search on the sorted indexes
+        candidates = None if kind is None else self._kind_index[kind]
+        bounds = {}
+        for name, (low, high) in ranges.items():
+            order, values = self._sorted_index(name)
+            start = 0 if low is None else np.searchsorted(values, low, side='left')
+            stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+            bounds[name] = order[start:stop]
+        if bounds:
+            narrowest = min(bounds, key=lambda name: len(bounds[name]))
+            selection = np.sort(bounds[narrowest])
+            if candidates is not None:
+                selection = selection[np.isin(selection, candidates, assume_unique=True)]
+            candidates = selection
+        elif candidates is None:
+            candidates = np.arange(len(self.parts))
+
+        for name, (low, high) in ranges.items():
+            if len(candidates) == 0:
+                break
+            values = columns[name][candidates]
+            keep = ~np.isnan(values)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            candidates = candidates[keep]
+
+        if sort_by is not None:
+            values = columns[sort_by][candidates]
+            order = np.argsort(-values if descending else values, kind='stable') # NaN values last
+            candidates = candidates[order]
+        if limit is not None:
+            candidates = candidates[:limit]
+        return candidates
+
+    def query(self, kind=None, sort_by=None, descending=False, limit=None, **ranges):
+        """
+        Parts that meet every condition.
+
+        Parameters
+            ----------
+            kind - `{'liquid', 'solid', 'tank', 'engine', 'other'}`
+                Kind of part. Defaults to every kind.
+            sort_by - `string`
+                Column used to sort the parts. Defaults to the order they were added.
+            descending - `bool`
+                If True, parts are sorted from the highest value to the lowest.
+            limit - `int`
+                Maximum number of parts returned.
+            ranges
+                Range of each column as column=(low, high), both ends included. None leaves that end open.
+
+        Return
+            ----------
+            parts - `list of parts`
+                Parts that meet the conditions.
+
+        Example
+            -------
+            >>> catalog.query(kind='engine', isp_vac=(300, None), thrust_atm=(200, None), sort_by='thrust_mass_atm')
+
+        """
+        return [self.parts[i] for i in self._select(kind, sort_by, descending, limit, ranges)]
+
+    def query_ids(self, kind=None, sort_by=None, descending=False, limit=None, **ranges):
+        """
+        Ids of the parts that meet every condition. Takes the same parameters as query.
+
+        Return
+            ----------
+            part_ids - `list of strings`
+                Ids of the parts that meet the conditions.
+
+        """
+        return [self.ids[i] for i in self._select(kind, sort_by, descending, limit, ranges)]
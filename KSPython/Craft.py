@@ -0,0 +1,459 @@
+"""
+
+This submodule imports KSP .craft files as rockets.
+
+Craft files are read line by line, and only what the rocket needs is kept from each part: its name, when it is
+staged, the parts attached below it, its modules and its fuel lines. The rest of the file, such as positions, events
+and module settings, is skipped as it is read, so large crafts never have their whole tree in memory.
+
+Parts are mapped onto the catalog through CRAFT_PARTS, from their internal KSP names (as 'liquidEngine2' for the
+LV-T45) to catalog ids. Other parts are not modeled by the library: they are listed as unknown, and their mass and
+cost can be given with extra_parts.
+
+Stages are derived from the decouplers. The root part (usually the command pod) is taken as the top of the rocket,
+so everything below a decoupler is dropped with it when it fires, and parts dropped at the same time make a stage:
+
+* Stages are ordered by the moment they are dropped. Parts never dropped make the last stage, or the payload if they
+  have no engines or fuel.
+* Engines that are activated before the stage below them is dropped are scheduled with schedule_engine.
+* Fuel flow to the next stage is removed unless a fuel line leaves the stage or one of its decouplers has crossfeed
+  enabled.
+
+Example
+    -------
+    >>> craft = read_craft('Ships/VAB/Kerbal X.craft')
+    >>> craft.rocket.generate_report()
+    >>> craft.unknown_parts
+    >>> crafts = import_crafts('Ships/VAB', workers=4)
+
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from KSPython.KSPython import KerbalException, Engine, Stage, Rocket, _part_types
+
+# internal KSP part names and the catalog ids they are built from, some parts are made of more than one
+CRAFT_PARTS = {
+    # liquid engines
+    'microEngine': 'LV1', 'microEngine.v2': 'LV1',
+    'radialEngineMini': 'LV1R', 'radialEngineMini.v2': 'LV1R',
+    'smallRadialEngine': 'E2477', 'smallRadialEngine.v2': 'E2477',
+    'radialLiquidEngine1-2': 'Mk55',
+    'liquidEngineMini': 'E487S', 'liquidEngineMini.v2': 'E487S',
+    'liquidEngine3': 'LV909', 'liquidEngine3.v2': 'LV909',
+    'liquidEngine': 'LVT30',
+    'liquidEngine2': 'LVT45', 'liquidEngine2.v2': 'LVT45',
+    'SSME': 'S3KS25',
+    'toroidalAerospike': 'T1',
+    'nuclearEngine': 'LVN',
+    'liquidEngine2-2': 'REL10', 'liquidEngine2-2.v2': 'REL10',
+    'engineLargeSkipper': 'REI5', 'engineLargeSkipper.v2': 'REI5',
+    'liquidEngine1-2': 'REM3', 'liquidEngineMainsail.v2': 'REM3',
+    'Size2LFB': ('KR12_e', 'KR12_ft'),
+    'Size3AdvancedEngine': 'KR2L',
+    'Size3EngineCluster': 'S3KS254',
+    'RAPIER': 'CR7',
+    # solid boosters
+    'solidBooster.sm': 'RT5', 'solidBooster.sm.v2': 'RT5',
+    'solidBooster': 'RT10', 'solidBooster.v2': 'RT10',
+    'solidBooster1-1': 'BACC',
+    'MassiveBooster': 'S1',
+    'sepMotor1': 'Sepratron',
+    'Shrimp': 'F3S0',
+    'Thoroughbred': 'S217',
+    # fuel tanks
+    'externalTankRound': 'R4', 'externalTankCapsule': 'R11', 'externalTankToroid': 'R12',
+    'miniFuelTank': 'OscarB',
+    'fuelTankSmallFlat': 'FLT100', 'fuelTankSmall': 'FLT200', 'fuelTank': 'FLT400', 'fuelTank.long': 'FLT800',
+    'Rockomax8BW': 'X2008', 'Rockomax16.BW': 'X20016', 'Rockomax32.BW': 'X20032', 'Rockomax64.BW': 'Jumbo64',
+    'Size3SmallTank': 'S33600', 'Size3MediumTank': 'S37200', 'Size3LargeTank': 'S314400',
+    'mk2FuselageShortLFO': 'Mk2RS', 'mk2FuselageLongLFO': 'Mk2R',
+    'mk3FuselageLFO.25': 'Mk3RS', 'mk3FuselageLFO.50': 'Mk3R', 'mk3FuselageLFO.100': 'Mk3RL',
+    'adapterSize2-Size1': 'C7BA', 'adapterSize2-Size1Slant': 'C7BAS',
+    'mk2SpacePlaneAdapter': 'Mk2125', 'mk2_1m_AdapterLong': 'Mk2125L', 'mk2_1m_Bicoupler': 'Mk2Bi',
+    'adapterSize2-Mk2': 'A25Mk2', 'adapterMk3-Mk2': 'Mk3Mk2', 'adapterMk3-Size2': 'Mk325',
+    'adapterMk3-Size2Slant': 'Mk325S', 'adapterSize3-Mk3': 'Mk3375', 'Size3To2Adapter': 'ADTP23',
+}
+
+DECOUPLER_MODULES = ('ModuleDecouple', 'ModuleAnchoredDecoupler')
+FUEL_LINE_MODULES = ('CModuleFuelLine',)
+
+
+class CraftPart:
+    """Part of a craft file, with only the values used to build the rocket."""
+    __slots__ = ('part_id', 'name', 'persistent_id', 'stage', 'children', 'modules', 'crossfeed', 'target')
+
+    def __init__(self, part_id):
+        self.part_id = part_id # as written in the file, internal name followed by a number
+        self.name = part_id.rsplit('_', 1)[0]
+        self.persistent_id = None
+        self.stage = None # inverse stage where the part is activated, the highest one fires first
+        self.children = []
+        self.modules = set()
+        self.crossfeed = False
+        self.target = None # persistent id of the part a fuel line feeds
+
+
+def _node_lines(file):
+    """Stripped lines of a craft file without comments, with braces on their own lines."""
+    for line in file:
+        line = line.split('//', 1)[0].strip()
+        while line:
+            position = min([index for index in (line.find('{'), line.find('}')) if index >= 0], default=-1)
+            if position < 0:
+                yield line
+                break
+            if line[:position].strip():
+                yield line[:position].strip()
+            yield line[position]
+            line = line[position+1:].strip()
+
+
+def parse_craft(file):
+    """
+    Reads the parts of a craft file, one line at a time.
+
+    Parameters
+        ----------
+        file - `string/file`
+            Path or open file, or any iterable of lines.
+
+    Return
+        ----------
+        ship - `string`
+            Name of the craft.
+        parts - `list of CraftPart`
+            Parts in the order of the file, the first one being the root.
+
+    """
+    if isinstance(file, str):
+        with open(file, encoding='utf-8-sig') as lines:
+            return parse_craft(lines)
+    ship = None
+    parts = []
+    nodes = [] # names of the open nodes
+    node_name = None
+    part = None
+    module = None
+    for line in _node_lines(file):
+        if line == '{':
+            nodes.append(node_name)
+            if nodes == ['PART']:
+                part = None
+            node_name = None
+            continue
+        if line == '}':
+            if not nodes:
+                raise KerbalException('Craft file has an unmatched closing brace.')
+            closed = nodes.pop()
+            if closed == 'PART' and not nodes:
+                if part is None:
+                    raise KerbalException('Craft file has a part without a name.')
+                parts.append(part)
+                part = None
+            elif closed == 'MODULE':
+                module = None
+            continue
+        key, equals, value = line.partition('=')
+        if not equals:
+            node_name = line
+            continue
+        key = key.strip()
+        value = value.strip()
+        depth = len(nodes)
+        if depth == 0:
+            if key == 'ship':
+                ship = value
+        elif nodes[0] != 'PART':
+            continue
+        elif depth == 1:
+            if key == 'part':
+                part = CraftPart(value)
+            elif part is None:
+                continue
+            elif key == 'persistentId':
+                part.persistent_id = value
+            elif key == 'istg':
+                part.stage = int(value)
+            elif key == 'link':
+                part.children.append(value)
+        elif part is None:
+            continue
+        elif depth == 2 and nodes[1] == 'MODULE' and key == 'name':
+            module = value
+            part.modules.add(value)
+        elif depth == 2 and nodes[1] == 'MODULE' and module == 'ModuleToggleCrossfeed' and key == 'crossfeedStatus':
+            part.crossfeed = value.lower() == 'true'
+        elif depth == 2 and nodes[1] == 'PARTDATA' and key == 'tgt':
+            part.target = value
+    if nodes:
+        raise KerbalException('Craft file ended inside a node.')
+    return ship, parts
+
+
+class CraftImport:
+    """Rocket built from a craft file.
+
+    Attributes
+        ----------
+        rocket - `rocket`
+            Rocket built from the craft, named after it.
+        unknown_parts - `dict`
+            Parts that are not in the catalog, nor in extra_parts {name: count}. Their mass is missing from the rocket.
+        warnings - `list of strings`
+            Approximations made when building the rocket.
+
+    """
+    def __init__(self, rocket, unknown_parts, warnings):
+        self.rocket = rocket
+        self.unknown_parts = unknown_parts
+        self.warnings = warnings
+
+    def __repr__(self):
+        return (f'CraftImport(rocket={self.rocket.name!r}, stages={self.rocket.num_stages()}, '
+                f'unknown_parts={sum(self.unknown_parts.values())}, warnings={len(self.warnings)})')
+
+
+def _catalog(catalog):
+    from KSPython.Serialization import _catalog as default_catalog
+    return default_catalog(catalog)
+
+
+def build_rocket(ship, parts, catalog=None, part_map=None, extra_parts=None, strict=False):
+    """
+    Builds a rocket from the parts of a craft file, as given by parse_craft.
+
+    Parameters
+        ----------
+        ship - `string`
+            Name of the rocket.
+        parts - `list of CraftPart`
+            Parts of the craft, the first one being the root.
+        catalog - `PartCatalog`
+            Catalog where the parts are looked up. Defaults to every part of the library.
+        part_map - `dict`
+            Internal part names and their catalog ids, on top of CRAFT_PARTS {name: part_id/tuple of part_ids}.
+        extra_parts - `dict`
+            Mass and cost of parts that are not in the catalog, added as extra mass and cost {name: (mass, cost)}.
+        strict - `bool`
+            If True, unknown parts raise an exception instead of being listed.
+
+    Return
+        ----------
+        craft - `CraftImport`
+            Rocket, unknown parts and warnings.
+
+    """
+    if not parts:
+        raise KerbalException('Craft has no parts.')
+    catalog = _catalog(catalog)
+    part_map = dict(CRAFT_PARTS, **(part_map or {}))
+    extra_parts = extra_parts or {}
+    warnings = []
+    unknown_parts = {}
+    by_id = {part.part_id: part for part in parts}
+    by_persistent_id = {part.persistent_id: part for part in parts if part.persistent_id is not None}
+
+    # every part is dropped by the earliest decoupler between it and the root
+    drop = {}
+    pending = [(parts[0], None)]
+    while pending:
+        part, dropped = pending.pop()
+        if part.part_id in drop:
+            continue
+        if part.modules.intersection(DECOUPLER_MODULES) and part.stage is not None:
+            dropped = part.stage if dropped is None else max(dropped, part.stage)
+        drop[part.part_id] = dropped
+        for child_id in part.children:
+            child = by_id.get(child_id)
+            if child is None:
+                warnings.append(f'{part.name} is linked to {child_id}, which is not part of the craft.')
+                continue
+            pending.append((child, dropped))
+    if len(drop) < len(parts):
+        warnings.append(f'{len(parts) - len(drop)} parts are not attached to the root and were left out.')
+
+    drop_stages = sorted({value for value in drop.values() if value is not None}, reverse=True)
+    groups = {value: index for index, value in enumerate(drop_stages)}
+    groups[None] = len(drop_stages)
+    contents = [{'parts': [], 'extra_mass': 0.0, 'extra_cost': 0.0, 'engines': [], 'feeds': False}
+                for _ in range(len(drop_stages) + 1)]
+
+    for part in parts:
+        if part.part_id not in drop:
+            continue
+        group = contents[groups[drop[part.part_id]]]
+        if part.modules.intersection(DECOUPLER_MODULES) and part.crossfeed:
+            group['feeds'] = True
+        if part.modules.intersection(FUEL_LINE_MODULES):
+            target = by_persistent_id.get(part.target) or (by_id.get(part.children[0]) if part.children else None)
+            if target is not None and target.part_id in drop and groups[drop[target.part_id]] > groups[drop[part.part_id]]:
+                group['feeds'] = True
+        part_ids = part_map.get(part.name)
+        if part_ids is None:
+            if part.name in extra_parts:
+                mass, cost = extra_parts[part.name]
+                group['extra_mass'] += mass
+                group['extra_cost'] += cost
+            elif strict:
+                raise KerbalException(f'Part {part.name} is not in the catalog.')
+            else:
+                unknown_parts[part.name] = unknown_parts.get(part.name, 0) + 1
+            continue
+        for part_id in (part_ids,) if isinstance(part_ids, str) else part_ids:
+            catalog_part = catalog.get(part_id)
+            group['parts'].append(catalog_part)
+            if isinstance(catalog_part, Engine):
+                group['engines'].append(part.stage)
+
+    # groups without engines or fuel are dropped with the stage above them
+    merged = []
+    for index, group in enumerate(contents):
+        if index < len(contents) - 1 and not any(_part_types(part) != (None, None) for part in group['parts']):
+            upper = contents[index + 1]
+            upper['parts'] += group['parts']
+            upper['extra_mass'] += group['extra_mass']
+            upper['extra_cost'] += group['extra_cost']
+            if group['parts'] or group['extra_mass']:
+                warnings.append(f'Parts dropped at stage {drop_stages[index]} have no engines or fuel, they are kept '
+                                'until the next stage is dropped.')
+            continue
+        merged.append((drop_stages[index] if index < len(drop_stages) else None, group))
+
+    rocket = Rocket(ship)
+    last_group = merged[-1][1] # never merged, as nothing is above it
+    if not any(_part_types(part) != (None, None) for part in last_group['parts']):
+        merged.pop()
+        payload = last_group['extra_mass'] + sum([part.mass for part in last_group['parts']])
+        if payload:
+            rocket.change_payload(payload)
+
+    drops = [dropped for dropped, _ in merged]
+    for stage_num, (_, group) in enumerate(merged):
+        stage = Stage()
+        for part in group['parts']:
+            try:
+                stage.add_part(part)
+            except KerbalException:
+                if strict:
+                    raise
+                warnings.append(f'{part.name} cannot share stage {stage_num} with its other parts, it is added as '
+                                'extra mass.')
+                group['extra_mass'] += part.mass
+                group['extra_cost'] += part.cost
+        if group['extra_mass']:
+            stage.add_extra_mass(group['extra_mass'])
+        if group['extra_cost']:
+            stage.add_extra_cost(group['extra_cost'])
+        rocket.add_stage(stage)
+
+    for stage_num, (_, group) in enumerate(merged):
+        fired = {engine_stage for engine_stage in group['engines'] if engine_stage is not None}
+        if not fired:
+            continue
+        # stage that is running when the engines are activated, drops at the same moment happen first
+        fire_stage = sum(1 for value in drops if value is not None and value >= max(fired))
+        if len(fired) > 1:
+            warnings.append(f'Engines of stage {stage_num} are activated at different times, they all fire with the first.')
+        if fire_stage < stage_num:
+            rocket.schedule_engine(fire_stage, stage_num)
+        elif fire_stage > stage_num:
+            warnings.append(f'Engines of stage {stage_num} are activated after it is dropped, they fire with it instead.')
+    for stage_num, (_, group) in enumerate(merged[:-1]):
+        if not group['feeds']:
+            rocket.rem_fuel_flow(stage_num)
+    return CraftImport(rocket, unknown_parts, warnings)
+
+
+def read_craft(file, catalog=None, part_map=None, extra_parts=None, strict=False):
+    """
+    Builds a rocket from a craft file.
+
+    Parameters
+        ----------
+        file - `string/file`
+            Path or open file, or any iterable of lines.
+        catalog - `PartCatalog`
+            Catalog where the parts are looked up. Defaults to every part of the library.
+        part_map - `dict`
+            Internal part names and their catalog ids, on top of CRAFT_PARTS {name: part_id/tuple of part_ids}.
+        extra_parts - `dict`
+            Mass and cost of parts that are not in the catalog, added as extra mass and cost {name: (mass, cost)}.
+        strict - `bool`
+            If True, unknown parts raise an exception instead of being listed.
+
+    Return
+        ----------
+        craft - `CraftImport`
+            Rocket, unknown parts and warnings.
+
+    Example
+        -------
+        >>> craft = read_craft('Kerbal X.craft', extra_parts={'mk1-3pod': (2.72, 3800)})
+
+    """
+    ship, parts = parse_craft(file)
+    return build_rocket(ship, parts, catalog, part_map, extra_parts, strict)
+
+
+def _import(path, part_map, extra_parts, strict):
+    """Design of a craft file, built in a worker process. Designs are plain values, so parts are not pickled."""
+    from KSPython.Serialization import rocket_to_dict
+    try:
+        craft = read_craft(path, None, part_map, extra_parts, strict)
+    except (KerbalException, OSError, ValueError) as error:
+        return None, error.message if isinstance(error, KerbalException) else str(error)
+    return (rocket_to_dict(craft.rocket), craft.unknown_parts, craft.warnings), None
+
+
+def import_crafts(paths, workers=None, part_map=None, extra_parts=None, strict=False):
+    """
+    Builds rockets from many craft files on a pool of processes.
+
+    Parameters
+        ----------
+        paths - `string/list of strings`
+            Directory, whose .craft files are all imported, or list of craft files.
+        workers - `int`
+            Number of worker processes. Defaults to the number of CPUs. With a single worker crafts are read in the
+            calling process.
+        part_map - `dict`
+            Internal part names and their catalog ids, on top of CRAFT_PARTS {name: part_id/tuple of part_ids}.
+        extra_parts - `dict`
+            Mass and cost of parts that are not in the catalog {name: (mass, cost)}.
+        strict - `bool`
+            If True, unknown parts make the import of that craft fail.
+
+    Return
+        ----------
+        crafts - `dict`
+            Import of every craft {path: CraftImport}, or the error message for crafts that could not be imported.
+
+    """
+    from KSPython.Serialization import rocket_from_dict
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(os.path.join(paths, '*.craft')))
+    paths = list(paths)
+    workers = (os.cpu_count() or 1) if workers is None else int(workers)
+    if workers < 1:
+        raise KerbalException('At least one worker is needed.')
+    arguments = [paths, [part_map]*len(paths), [extra_parts]*len(paths), [strict]*len(paths)]
+    if workers == 1 or len(paths) < 2:
+        results = map(_import, *arguments)
+        return _collect(paths, results, rocket_from_dict)
+    with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+        results = pool.map(_import, *arguments, chunksize=max(1, len(paths) // (4*workers)))
+        return _collect(paths, results, rocket_from_dict)
+
+
+def _collect(paths, results, rocket_from_dict):
+    crafts = {}
+    for path, (result, error) in zip(paths, results):
+        if error is not None:
+            crafts[path] = error
+        else:
+            design, unknown_parts, warnings = result
+            crafts[path] = CraftImport(rocket_from_dict(design), unknown_parts, warnings)
+    return crafts
@@ -0,0 +1,386 @@
+"""
+
+This submodule explores every firing schedule and fuel flow restriction of a fixed list of stages, and ranks them.
+
+Configurations are built stage by stage, from the first one up, as a depth first search. At each stage the search
+decides which of the engines above start firing with it, and whether fuel flows across the boundaries those engines
+cross. This is all that the thrust, ISP, mass flow and burn time of the stage depend on, so they are evaluated once
+for every shared prefix of decisions, and only the masses and delta V are left for each complete configuration.
+Engine totals of each group of stages firing together are also cached across the whole search.
+
+Only decisions that change the results are explored: fuel flow is only restricted across boundaries crossed by
+engines fired early, or around solid stages as Rocket does. Branches are pruned as soon as:
+
+* a stage loses all its fuel before being staged,
+* the TWR at liftoff, known once the first stage is decided, is too low,
+* a configuration already found has at least the best delta-V the branch could reach, with at least its liftoff TWR.
+  The bound takes the stages already decided with their ISP and the least fuel they can have lost when staged, and
+  the others at their ideal mass ratio with the best ISP.
+
+The number of configurations grows as n!*2^(n - 1) for n stages with engines, so the search is meant for the
+handful of stages of a single design.
+
+Example
+    -------
+    >>> result = explore([asparagus_stage]*2 + [main_stage], payload=2)
+    >>> result.configurations[0].rocket().generate_report()
+
+"""
+
+from itertools import combinations, product
+from math import log, inf
+
+from KSPython.KSPython import KerbalException, Rocket, Stage, _adjusted_dV, _number_check
+
+
+class Configuration:
+    """Firing schedule and fuel flow restrictions of a list of stages, and their results.
+
+    Attributes
+        ----------
+        fire_stage - `tuple of int`
+            Stage where the engines of each stage start firing.
+        restricted - `tuple of bool`
+            True where fuel can not flow between a stage and the next one.
+        adjusted_dV - `float`
+            True delta-V, as given by Rocket.adjusted_dV [m/s].
+        dV - `dict`
+            Delta-V at each location {loc: dV} [m/s].
+        liftoff_twr - `float`
+            Atmospheric thrust to weight ratio of the first stage.
+        min_twr - `float`
+            Lowest vacuum thrust to weight ratio at the start of a stage.
+
+    """
+    def __init__(self, stages, payload, fire_stage, restricted, adjusted_dV, dV, liftoff_twr, min_twr):
+        self.stages = stages
+        self.payload = payload
+        self.fire_stage = fire_stage
+        self.restricted = restricted
+        self.adjusted_dV = adjusted_dV
+        self.dV = dV
+        self.liftoff_twr = liftoff_twr
+        self.min_twr = min_twr
+
+    def __repr__(self):
+        return (f'Configuration(fire_stage={self.fire_stage}, restricted={self.restricted}, '
+                f'adjusted_dV={self.adjusted_dV}, liftoff_twr={self.liftoff_twr})')
+
+    def rocket(self, name=None):
+        """
+        Builds the rocket of this configuration, with schedule_engine and rem_fuel_flow.
+
+        Parameters
+            ----------
+            name - `string`
+                Name of the rocket.
+
+        Return
+            ----------
+            rocket - `rocket`
+                Rocket with the stages, payload, firing schedule and fuel flow restrictions of the configuration.
+
+        """
+        rocket = Rocket(name)
+        rocket.add_stages(self.stages)
+        for stage_num, stage_fire in enumerate(self.fire_stage):
+            if stage_fire < stage_num:
+                rocket.schedule_engine(stage_fire, stage_num)
+        for stage_num, restricted in enumerate(self.restricted):
+            if restricted:
+                rocket.rem_fuel_flow(stage_num)
+        rocket.change_payload(self.payload)
+        return rocket
+
+
+class ExplorationResult:
+    """Result of a configuration search.
+
+    Attributes
+        ----------
+        configurations - `list of Configuration`
+            Configurations found, sorted by adjusted delta-V and then liftoff TWR, best first. Unless dominated ones
+            were kept, no configuration has a lower delta-V and liftoff TWR than another one.
+        evaluated - `int`
+            Number of complete configurations evaluated.
+        pruned - `int`
+            Number of partial configurations discarded, without exploring them further.
+        explored - `int`
+            Number of partial configurations evaluated during the search.
+
+    """
+    def __init__(self, configurations, evaluated, pruned, explored):
+        self.configurations = configurations
+        self.evaluated = evaluated
+        self.pruned = pruned
+        self.explored = explored
+
+    def __repr__(self):
+        return (f'ExplorationResult(configurations={len(self.configurations)}, evaluated={self.evaluated}, '
+                f'pruned={self.pruned}, explored={self.explored})')
+
+
+class _Search:
+    """Depth first search over the firing and fuel flow decisions of each stage, from the first one up."""
+
+    def __init__(self, stages, payload, min_twr, min_liftoff_twr, keep_dominated, g, dV_out):
+        self.stages = stages
+        self.payload = payload
+        self.min_twr = min_twr
+        self.min_liftoff_twr = min_liftoff_twr
+        self.keep_dominated = keep_dominated
+        self.g = g
+        self.dV_out = dV_out
+
+        num_stages = len(stages)
+        self.num_stages = num_stages
+        self.full_mass = [stage.calculate_full_mass() for stage in stages]
+        self.empty_mass = [stage.calculate_empty_mass() for stage in stages]
+        self.fuel = [full - empty for full, empty in zip(self.full_mass, self.empty_mass)]
+        self.totals = {loc: [stage._engine_totals(loc) for stage in stages] for loc in ('atm', 'vac')}
+        self.solid = [stage.get_fuel_type() == 'solid' for stage in stages]
+        self.upper_mass = [sum(self.full_mass[(stage_num+1):]) + payload for stage_num in range(num_stages)]
+
+        # ideal mass ratio of each stage: full above it at the start, and no fuel left above it at the end
+        mass_ratio = [log((self.full_mass[stage_num] + self.upper_mass[stage_num])
+                          / (sum(self.empty_mass[stage_num:]) + payload)) for stage_num in range(num_stages)]
+        self.upper_ratio = [sum(mass_ratio[stage_num:]) for stage_num in range(num_stages + 1)]
+        self.mass_ratio = mass_ratio
+        self.best_isp = {loc: max(thrust/relative_isp for thrust, relative_isp in self.totals[loc]) for loc in ('atm', 'vac')}
+        # every engine at or above a stage burning its fuel
+        self.max_mass_flow = {loc: [sum(relative_isp for _, relative_isp in self.totals[loc][stage_num:])/9.81
+                                    for stage_num in range(num_stages)] for loc in ('atm', 'vac')}
+
+        self.fire_stage = [None]*num_stages
+        self.restricted = [None]*max(num_stages - 1, 0)
+        self.thrust = {loc: [] for loc in ('atm', 'vac')}
+        self.isp = {loc: [] for loc in ('atm', 'vac')}
+        self.mass_flow = {loc: [] for loc in ('atm', 'vac')}
+        self.staging_time = {loc: [0.0] for loc in ('atm', 'vac')}
+        self.leaking = []
+        self._group_totals = {}
+        self.front = [] # (adjusted_dV, liftoff_twr, configuration)
+        self.liftoff_twr = None
+        self.evaluated = 0
+        self.pruned = 0
+        self.explored = 0
+
+    def _sum_totals(self, group, loc):
+        """Thrust and sum of thrust/isp of a group of stages, cached across the search."""
+        key = (group, loc)
+        totals = self._group_totals.get(key)
+        if totals is None:
+            thrust = sum(self.totals[loc][stage_num][0] for stage_num in group)
+            relative_isp = sum(self.totals[loc][stage_num][1] for stage_num in group)
+            totals = self._group_totals[key] = (thrust, relative_isp)
+        return totals
+
+    def _dominated(self, adjusted_dV, liftoff_twr):
+        if self.keep_dominated:
+            return False
+        return any(dV >= adjusted_dV and twr >= liftoff_twr for dV, twr, _ in self.front)
+
+    def _dV_bound(self, stage_num):
+        """Best adjusted delta-V of any configuration sharing the decisions up to stage_num."""
+        num_stages = self.num_stages
+        bound = {}
+        for loc in ('atm', 'vac'):
+            staging_time = self.staging_time[loc]
+            mass_flow = self.mass_flow[loc]
+            # fuel lost at the staging events already timed, exactly for the stages decided and at most for the others
+            lost_min = []
+            lost_max = []
+            for event in range(stage_num + 2):
+                lost = 0.0
+                extra = 0.0
+                for upper in range(event, num_stages):
+                    stage_fire = self.fire_stage[upper]
+                    if stage_fire is None or stage_fire >= event:
+                        continue
+                    elapsed = staging_time[event] - staging_time[stage_fire]
+                    if upper <= stage_num:
+                        if self.leaking[upper]:
+                            lost += mass_flow[upper]*elapsed
+                    elif self.restricted[upper-1] is not False:
+                        extra += min(self.fuel[upper], self.max_mass_flow[loc][upper]*elapsed)
+                lost_min.append(lost)
+                lost_max.append(lost + extra)
+            dV = 0.0
+            for lower in range(stage_num + 1):
+                start_mass = self.full_mass[lower] + self.upper_mass[lower] - lost_min[lower]
+                end_mass = self.empty_mass[lower] + self.upper_mass[lower] - lost_max[lower+1]
+                dV += log(start_mass/end_mass)*self.isp[loc][lower]
+            bound[loc] = 9.81*(dV + self.best_isp[loc]*self.upper_ratio[stage_num + 1])
+        # the adjusted delta-V grows with both, and can not exceed dV_out while the atmospheric one is below it
+        if bound['atm'] <= self.dV_out:
+            return self.dV_out
+        return _adjusted_dV(bound['atm'], bound['vac'], self.dV_out)
+
+    def search(self, stage_num):
+        if stage_num == self.num_stages:
+            self._evaluate()
+            return
+        own_fire = self.fire_stage[stage_num] is None
+        if own_fire:
+            self.fire_stage[stage_num] = stage_num
+        candidates = [upper for upper in range(stage_num + 1, self.num_stages)
+                      if self.fire_stage[upper] is None]
+        for count in range(len(candidates) + 1):
+            for fired in combinations(candidates, count):
+                for upper in fired:
+                    self.fire_stage[upper] = stage_num
+                self._search_flow(stage_num)
+                for upper in fired:
+                    self.fire_stage[upper] = None
+        if own_fire:
+            self.fire_stage[stage_num] = None
+
+    def _search_flow(self, stage_num):
+        """Decides the fuel flow across the boundaries crossed by the engines firing during stage_num."""
+        firing = (stage_num,) + tuple(upper for upper in range(stage_num + 1, self.num_stages)
+                                      if self.fire_stage[upper] is not None and self.fire_stage[upper] <= stage_num)
+        free = []
+        decided = []
+        for boundary in range(stage_num, max(firing[-1], stage_num + 1)):
+            if boundary >= len(self.restricted) or self.restricted[boundary] is not None:
+                continue
+            decided.append(boundary)
+            if self.solid[boundary] or self.solid[boundary + 1]:
+                self.restricted[boundary] = True
+            elif boundary < firing[-1]:
+                free.append(boundary)
+            else: # no engine crosses it, now or later
+                self.restricted[boundary] = False
+        for values in product((False, True), repeat=len(free)):
+            for boundary, value in zip(free, values):
+                self.restricted[boundary] = value
+            self._stage(stage_num, firing)
+        for boundary in decided:
+            self.restricted[boundary] = None
+
+    def _stage(self, stage_num, firing):
+        """Evaluates one stage from the decisions below and at it, and searches the stages above."""
+        self.explored += 1
+        stage_max = stage_num
+        while stage_max < firing[-1] and not self.restricted[stage_max]:
+            stage_max += 1
+        group = tuple(upper for upper in firing if upper <= stage_max)
+        stage_fire = self.fire_stage[stage_num]
+        leaking = stage_num > 0 and self.restricted[stage_num-1] and stage_fire < stage_num
+
+        valid = True
+        figures = {}
+        for loc in ('atm', 'vac'):
+            thrust, relative_isp = self._sum_totals(firing, loc)
+            group_thrust, group_relative_isp = self._sum_totals(group, loc)
+            mass_flow = group_thrust / ((group_thrust / group_relative_isp)*9.81)
+            staging_time = self.staging_time[loc]
+            mass_loss = mass_flow*(staging_time[stage_num] - staging_time[stage_fire]) if leaking else 0.0
+            if mass_loss > self.fuel[stage_num]:
+                valid = False
+                break
+            burn_time = (self.fuel[stage_num] - mass_loss)/mass_flow
+            figures[loc] = (thrust, thrust/relative_isp, mass_flow, staging_time[stage_num] + burn_time)
+        if not valid:
+            self.pruned += 1
+            return
+
+        if stage_num == 0:
+            self.liftoff_twr = figures['atm'][0]/(self.g*(self.full_mass[0] + self.upper_mass[0]))
+            if self.liftoff_twr < self.min_liftoff_twr:
+                self.pruned += 1
+                return
+
+        self.leaking.append(leaking)
+        for loc, (thrust, isp, mass_flow, staging_time) in figures.items():
+            self.thrust[loc].append(thrust)
+            self.isp[loc].append(isp)
+            self.mass_flow[loc].append(mass_flow)
+            self.staging_time[loc].append(staging_time)
+        if self.front and self._dominated(self._dV_bound(stage_num), self.liftoff_twr):
+            self.pruned += 1
+        else:
+            self.search(stage_num + 1)
+        self.leaking.pop()
+        for loc in ('atm', 'vac'):
+            self.thrust[loc].pop()
+            self.isp[loc].pop()
+            self.mass_flow[loc].pop()
+            self.staging_time[loc].pop()
+
+    def _evaluate(self):
+        """Masses and delta-V of a complete configuration, kept if it meets the requirements."""
+        self.evaluated += 1
+        num_stages = self.num_stages
+        dV = {}
+        min_twr = inf
+        for loc in ('atm', 'vac'):
+            staging_time = self.staging_time[loc]
+            mass_flow = self.mass_flow[loc]
+            # fuel lost by every leaking stage still attached at each staging event
+            lost = [sum(mass_flow[upper]*(staging_time[event] - staging_time[self.fire_stage[upper]])
+                        for upper in range(event, num_stages) if self.leaking[upper] and self.fire_stage[upper] < event)
+                    for event in range(num_stages + 1)]
+            dV[loc] = 0.0
+            for stage_num in range(num_stages):
+                start_mass = self.full_mass[stage_num] + self.upper_mass[stage_num] - lost[stage_num]
+                end_mass = self.empty_mass[stage_num] + self.upper_mass[stage_num] - lost[stage_num+1]
+                dV[loc] += log(start_mass/end_mass)*self.isp[loc][stage_num]*9.81
+                if loc == 'vac':
+                    min_twr = min(min_twr, self.thrust[loc][stage_num]/(self.g*start_mass))
+        if min_twr < self.min_twr:
+            return
+        adjusted_dV = _adjusted_dV(dV['atm'], dV['vac'], self.dV_out)
+        if self._dominated(adjusted_dV, self.liftoff_twr):
+            return
+        configuration = Configuration(self.stages, self.payload, tuple(self.fire_stage), tuple(self.restricted),
+                                      adjusted_dV, dV, self.liftoff_twr, min_twr)
+        if not self.keep_dominated:
+            self.front = [point for point in self.front if not (adjusted_dV >= point[0] and self.liftoff_twr >= point[1])]
+        self.front.append((adjusted_dV, self.liftoff_twr, configuration))
+
+
+def explore(stages, payload=0, min_twr=0.0, min_liftoff_twr=0.0, keep_dominated=False, g=9.81, dV_out=2500):
+    """
+    Evaluates every firing schedule and fuel flow restriction of a list of stages, and ranks them.
+
+    Parameters
+        ----------
+        stages - `list of stages`
+            Stages of the rocket, from first (ascension) to last, as given to Rocket.add_stages. Every stage needs
+            engines.
+        payload - `int/float`
+            Payload carried by the rocket [ton].
+        min_twr - `int/float`
+            Minimum vacuum thrust to weight ratio at the start of every stage.
+        min_liftoff_twr - `int/float`
+            Minimum atmospheric thrust to weight ratio of the first stage.
+        keep_dominated - `bool`
+            If True, every configuration meeting the requirements is returned. Otherwise configurations with a lower
+            adjusted delta-V and liftoff TWR than another one are dropped, and so are the branches that can only
+            lead to them.
+        g - `float`
+            Gravity used for the thrust to weight ratios (default for Kerbin).
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere [m/s].
+
+    Return
+        ----------
+        result - `ExplorationResult`
+            Configurations found, best first, and search statistics.
+
+    """
+    stages = list(stages)
+    if not stages:
+        raise KerbalException('At least one stage is required.')
+    for stage in stages:
+        if not isinstance(stage, Stage):
+            raise KerbalException('Only stages can be added to a rocket.')
+        if stage._relative_isp_atm <= 0:
+            raise KerbalException('Every stage needs engines to be explored.')
+    search = _Search(stages, _number_check(payload), _number_check(min_twr), _number_check(min_liftoff_twr),
+                     keep_dominated, g, dV_out)
+    search.search(0)
+    configurations = [configuration for _, _, configuration in search.front]
+    configurations.sort(key=lambda configuration: (-configuration.adjusted_dV, -configuration.liftoff_twr))
+    return ExplorationResult(configurations, search.evaluated, search.pruned, search.explored)
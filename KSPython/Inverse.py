@@ -0,0 +1,252 @@
+"""
+
+This submodule solves rocket calculations backwards: the largest payload a design can carry for a target delta-V and
+TWR, and the number of tanks a stage needs to reach a target delta-V.
+
+Both solvers work on batches of designs and evaluate the staging model of RocketBatch once per iteration for all of
+them, with safeguarded Newton steps:
+
+* Payload does not change burn times or the fuel lost before staging, so the staging is evaluated only once. The
+  delta V of every stage is then isp*g*ln((A + payload)/(B + payload)), convex and decreasing in the payload, and
+  Newton steps from zero payload approach the solution from below in a few cheap iterations. A TWR floor is a
+  closed form limit on the start mass of each stage.
+* Every input of the staging model is linear in the number of copies of a part, so the batch with n more tanks is
+  the original batch moved n times along its tangents (see KSPython.Sensitivity), and the derivative of delta V comes
+  from the same evaluation. Delta V grows with diminishing returns, so Newton steps from the current stage also
+  approach the solution from below. The continuous count is then rounded up and checked.
+
+Steps that leave the bracket around the solution fall back to bisection, so both solvers also converge when the
+shape of the curve is not the expected one.
+
+Example
+    -------
+    >>> max_payload(rockets, target_dV=3400, min_twr=1.3)
+    >>> required_tanks(rocket, 0, 'FLT800', target_dV=3400)
+
+"""
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, Rocket, _adjusted_dV
+from KSPython.Batch import RocketBatch
+
+
+def _as_batch(rockets, parameters=None):
+    """Rocket, list of rockets or batch as a RocketBatch, and whether a single rocket was given."""
+    if isinstance(rockets, RocketBatch):
+        if parameters is not None:
+            raise KerbalException('Only rockets can be solved for part counts, and not a RocketBatch.')
+        return rockets, False
+    single = isinstance(rockets, Rocket)
+    rockets = [rockets] if single else list(rockets)
+    return RocketBatch.from_rockets(rockets, parameters=parameters), single
+
+
+def _target(target_dV, num_designs):
+    target_dV = np.asarray(target_dV, dtype=float)
+    if target_dV.ndim > 1 or target_dV.size not in (1, num_designs):
+        raise KerbalException(f'target_dV must be a number or have shape ({num_designs},).')
+    return np.broadcast_to(target_dV, (num_designs,)).copy()
+
+
+def _combine(values, slopes, loc, dV_out):
+    """Delta V and its derivative, adjusted for leaving the atmosphere unless loc is given."""
+    if loc is not None:
+        return values[loc], slopes[loc]
+    dV_atm, dV_vac = values['atm'], values['vac']
+    value = _adjusted_dV(dV_atm, dV_vac, dV_out)
+    slope = (dV_out*dV_vac/dV_atm**2)*slopes['atm'] + ((dV_atm - dV_out)/dV_atm)*slopes['vac']
+    return value, slope
+
+
+def _newton(evaluate, target, x, bound, max_iter, tol, increasing):
+    """
+    Safeguarded Newton iterations on evaluate(x) = target for every design, from x short of the target: below it
+    for increasing functions and above it otherwise. Steps are kept below bound, and fall back to bisection once a
+    point past the target is known.
+
+    Return
+        ----------
+        x - `array`
+            Solution of each design, NaN where the target can not be reached below bound.
+
+    """
+    lo = x.copy()
+    hi = np.full(x.shape, np.inf) # closest point past the target
+    active = np.ones(x.shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iter):
+            value, slope = evaluate(x)
+            error = value - target
+            if not increasing:
+                error, slope = -error, -slope
+            past = error >= 0
+            # short of the target with no slope left, or already at the bound
+            failed = active & (~np.isfinite(value) | (~past & (((slope <= 0) & np.isinf(hi)) | (x >= bound))))
+            lo = np.where(active & ~past, x, lo)
+            hi = np.where(active & past, x, hi)
+            step = x - error/slope
+            step = np.where(np.isinf(hi), np.fmin(step, bound), step)
+            bisect = ~np.isfinite(step) | (step < lo) | (step > hi)
+            new_x = np.where(bisect, (lo + hi)/2, step)
+            done = np.abs(new_x - x) <= tol*(1 + np.abs(x))
+            x = np.where(active, np.where(failed, np.nan, new_x), x)
+            active &= ~failed & ~done
+            if not active.any():
+                break
+    return x
+
+
+def max_payload(rockets, target_dV, min_twr=None, loc=None, twr_loc='atm', dV_out=2500, g=9.81, max_iter=50, tol=1e-9):
+    """
+    Largest payload that rockets can carry while keeping a target delta-V and a minimum TWR.
+
+    Parameters
+        ----------
+        rockets - `rocket/list of rockets/RocketBatch`
+            Rocket, or designs solved together as a batch. Their current payload is not used.
+        target_dV - `float/array`
+            Delta V the rockets must keep, for every design or one for each [m/s].
+        min_twr - `float/dict`
+            Minimum thrust to weight ratio at liftoff, or at the start of each stage {stage_num: min_twr}.
+        loc - `{None, 'atm', 'vac'}`
+            Location of the target delta-V. Defaults to the delta-V adjusted for leaving the atmosphere.
+        twr_loc - `{'atm', 'vac'}`
+            Location of the minimum TWR.
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+        g - `float`
+            Gravity used for the thrust to weight ratio (default for Kerbin).
+        max_iter - `int`
+            Maximum number of Newton iterations.
+        tol - `float`
+            Relative tolerance on the payload.
+
+    Return
+        ----------
+        payload - `float/array`
+            Maximum payload of each design [ton]. Designs that can not meet the requirements even without payload are
+            NaN in a batch, and raise a KerbalException for a single rocket.
+
+    """
+    batch, single = _as_batch(rockets)
+    num_designs, max_stages = batch.full_mass.shape
+    target = _target(target_dV, num_designs)
+
+    # masses without payload at the start and end of each stage, (A, B) in isp*g*ln((A + payload)/(B + payload))
+    terms = {}
+    for dV_loc in ('atm', 'vac'):
+        results = batch._evaluate(dV_loc)
+        isp = np.where(batch.mask, results['isp'], 0.0)
+        start_mass = np.where(batch.mask, results['start_mass'] - batch.payload[:, None], 1.0)
+        end_mass = np.where(batch.mask, results['end_mass'] - batch.payload[:, None], 1.0)
+        terms[dV_loc] = (isp, start_mass, end_mass)
+
+    def evaluate(payload):
+        values = {}
+        slopes = {}
+        for dV_loc, (isp, start_mass, end_mass) in terms.items():
+            start = start_mass + payload[:, None]
+            end = end_mass + payload[:, None]
+            values[dV_loc] = (isp*9.81*np.log(start/end)).sum(axis=1)
+            slopes[dV_loc] = (isp*9.81*(1/start - 1/end)).sum(axis=1)
+        return _combine(values, slopes, loc, dV_out)
+
+    payload = _newton(evaluate, target, np.zeros(num_designs), np.inf, max_iter, tol, increasing = False)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payload = np.where(evaluate(np.zeros(num_designs))[0] >= target, payload, np.nan)
+
+    if min_twr is not None:
+        if not isinstance(min_twr, dict):
+            min_twr = {0: min_twr}
+        results = batch._evaluate(twr_loc)
+        for stage_num, twr in min_twr.items():
+            if not 0 <= stage_num < max_stages:
+                raise KerbalException(f'Stage {stage_num} is not part of any rocket.')
+            start_mass = results['start_mass'][:, stage_num] - batch.payload
+            limit = results['thrust'][:, stage_num]/(g*twr) - start_mass
+            payload = np.where(batch.mask[:, stage_num], np.minimum(payload, limit), payload)
+
+    payload = np.where(payload >= 0, payload, np.nan)
+    if single:
+        if np.isnan(payload[0]):
+            raise KerbalException('The rocket can not meet the requirements, even without payload.')
+        return float(payload[0])
+    return payload
+
+
+def _moved(batch, delta):
+    """Batch with every design moved by delta along the tangents of its single parameter, keeping the tangents."""
+    tangents = batch.tangents
+    def move(values, tangent):
+        return values + tangent[:, :, 0]*delta[:, None]
+    moved = RocketBatch(move(batch.full_mass, tangents['full_mass']), move(batch.empty_mass, tangents['empty_mass']),
+                        move(batch.cost, tangents['cost']),
+                        {loc: move(batch.thrust[loc], tangents['thrust'][loc]) for loc in ('atm', 'vac')},
+                        {loc: move(batch.relative_isp[loc], tangents['relative_isp'][loc]) for loc in ('atm', 'vac')},
+                        payload=batch.payload + tangents['payload'][:, 0]*delta, fire_stage=batch.fire_stage,
+                        restricted=batch.restricted, mask=batch.mask, tangents=tangents)
+    moved.parameters = batch.parameters
+    return moved
+
+
+def required_tanks(rockets, stage_num, tank, target_dV, loc=None, dV_out=2500, max_tanks=100, max_iter=50, tol=1e-9):
+    """
+    Smallest number of tanks to be added to a stage so that rockets reach a target delta-V.
+
+    Parameters
+        ----------
+        rockets - `rocket/list of rockets`
+            Rocket, or designs solved together as a batch.
+        stage_num - `int`
+            Stage the tanks are added to.
+        tank - `part/string`
+            Tank to be added, or its id in the default PartCatalog. Any other part can be given as well.
+        target_dV - `float/array`
+            Delta V to be reached, for every design or one for each [m/s].
+        loc - `{None, 'atm', 'vac'}`
+            Location of the target delta-V. Defaults to the delta-V adjusted for leaving the atmosphere.
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+        max_tanks - `int`
+            Largest number of tanks that can be added.
+        max_iter - `int`
+            Maximum number of Newton iterations.
+        tol - `float`
+            Relative tolerance on the continuous number of tanks.
+
+    Return
+        ----------
+        tanks - `int/array`
+            Number of tanks to be added to each design, 0 if it already reaches the target. Designs that can not
+            reach it with up to max_tanks tanks, or do not have the stage, are NaN in a batch, and raise a
+            KerbalException for a single rocket.
+
+    """
+    parameter = ('parts', stage_num, tank)
+    batch, single = _as_batch(rockets, parameters=[parameter])
+    num_designs = batch.num_designs()
+    target = _target(target_dV, num_designs)
+
+    def evaluate(tanks):
+        moved = _moved(batch, tanks)
+        values = {dV_loc: moved.calculate_dV(loc = dV_loc) for dV_loc in ('atm', 'vac')}
+        slopes = {dV_loc: moved.gradient('dV', loc = dV_loc)[:, 0] for dV_loc in ('atm', 'vac')}
+        return _combine(values, slopes, loc, dV_out)
+
+    tanks = _newton(evaluate, target, np.zeros(num_designs), max_tanks, max_iter, tol, increasing = True)
+
+    # round up to whole tanks, and add one where rounding left the design short of the target
+    with np.errstate(invalid='ignore'):
+        tanks = np.maximum(np.ceil(tanks - tol*(1 + tanks)), 0)
+        for _ in range(2):
+            short = ~np.isnan(tanks) & (evaluate(np.nan_to_num(tanks))[0] < target)
+            if not short.any():
+                break
+            tanks = np.where(short, tanks + 1, tanks)
+        tanks = np.where(tanks <= max_tanks, tanks, np.nan)
+    if single:
+        if np.isnan(tanks[0]):
+            raise KerbalException(f'The rocket can not reach the target delta-V with up to {max_tanks} tanks in stage {stage_num}.')
+        return int(tanks[0])
+    return tanks
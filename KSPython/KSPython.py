@@ -3,8 +3,8 @@
 """
 
 
-from math import log
-from collections import defaultdict
+from math import isfinite, log
+from types import MappingProxyType
 
 
 class KerbalException(Exception):
@@ -15,6 +15,7 @@ class KerbalException(Exception):
     """
     def __init__(self, message):
         super().__init__('Whops, accidental lithobrake: ' + message)
+        self.message = message
 
 def _number_check(num):
     try:
@@ -24,6 +25,66 @@ def _number_check(num):
     else:
         return num
 
+def _count_check(count):
+    if (isinstance(count, bool) or not isinstance(count, (int, float)) or (isinstance(count, float) and not isfinite(count))
+            or count != int(count) or count < 1):
+        raise KerbalException(f'Count must be a positive integer, and not {count}.')
+
+def _adjusted_dV(dV_atm, dV_vac, dV_out):
+    """Delta V adjusted for leaving the atmosphere, from the atmospheric and vacuum delta V of numbers or arrays."""
+    return ((dV_atm - dV_out)/dV_atm)*dV_vac + dV_out
+
+def _mass_loss_error(rocket, stage_num, mass_loss):
+    try:
+        rocket.check_mass_lost(stage_num, mass_loss)
+    except KerbalException as error:
+        return error
+    return None
+
+def _engine_figures(engine_key, loc, known):
+    """
+    Thrust and ISP of every engine firing at a stage, and of the ones burning its fuel, from the stage engine key.
+    Same sums as performance_engines_firing and calculate_group_performance, in the same order. known holds the
+    engine performance of the stages already evaluated {stage: (thrust, isp)}.
+
+    """
+    stage, version, firing = engine_key
+    thrust = relative_isp = group_thrust = group_relative_isp = 0 # summed in order, as sum() does
+    for other, _, shares_fuel in ((stage, version, True),) + firing:
+        if other not in known:
+            known[other] = other.get_engine_performance(loc = loc)
+        other_thrust, other_isp = known[other]
+        thrust += other_thrust
+        relative_isp += other_thrust/other_isp
+        if shares_fuel:
+            group_thrust += other_thrust
+            group_relative_isp += other_thrust/other_isp
+    isp = thrust / relative_isp
+    group_isp = group_thrust / group_relative_isp
+    return thrust, isp, group_thrust, group_isp, group_thrust / (group_isp*9.81)
+
+def _lazy_parts(namespace, part_class, parts):
+    """Module level __all__, __getattr__ and __dir__ of a part module, building each part on its first use."""
+    def __getattr__(name):
+        if name not in parts:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+        return namespace.setdefault(name, part_class(*parts[name])) # later lookups no longer reach __getattr__
+
+    def __dir__():
+        return sorted(set(namespace) | set(parts))
+
+    return list(parts), __getattr__, __dir__
+
+def _part_types(part):
+    """Fuel and engine types brought by a part to a stage."""
+    if isinstance(part, SolidEngine):
+        return 'solid', 'solid'
+    if isinstance(part, RocketFuelTank):
+        return 'liquid', None
+    if isinstance(part, LiquidEngine):
+        return None, 'liquid'
+    return None, None
+
 def _loc_check(loc):
     if loc != 'atm' and loc != 'vac':
         raise KerbalException(f"loc can only be 'atm' or 'vac', and not {loc}.")
@@ -42,6 +103,8 @@ class Part:
 
 
     """
+    __slots__ = ('name', 'mass', 'cost')
+
     def __init__(self, name, mass, cost):
         self.name = name
         self.mass = _number_check(mass)
@@ -49,6 +112,8 @@ class Part:
 
 # Should only be used with rocket fuel tanks. Airplanes and space planes are not yet supported.
 class BasicTank(Part):
+    __slots__ = ('mass_empty',)
+
     def __init__(self, name, mass_full, mass_empty, cost): 
         super().__init__(name, mass_full, cost)
         self.mass_empty = _number_check(mass_empty)
@@ -75,16 +140,22 @@ class RocketFuelTank(BasicTank):
         ----------
         * Basic parts have already been inserted through RocketFuelTankParts, but new ones can be made by utilising this class.
     """
+    __slots__ = ()
+
     def __init__(self, name, mass_full, mass_empty, cost):
         super().__init__(name, mass_full, mass_empty, cost)
 
 # Xenon will be implemented at a latter time
 class XenonTank(BasicTank):
+    __slots__ = ()
+
     def __init__(self, name, mass_full, mass_empty, cost):
         super().__init__(name, mass_full, mass_empty, cost)
         raise KerbalException('Not yet implemented')
 
 class Engine(Part):
+    __slots__ = ('thrust_atm', 'thrust_vac', 'isp_atm', 'isp_vac')
+
     def __init__(self, name, mass, cost, thrust_atm, thrust_vac, isp_atm, isp_vac):
         super().__init__(name, mass, cost)
         self.thrust_atm = _number_check(thrust_atm)
@@ -92,6 +163,42 @@ class Engine(Part):
         self.isp_atm = _number_check(isp_atm)
         self.isp_vac = _number_check(isp_vac)
 
+    def isp_at(self, pressure):
+        """
+        ISP of the engine at a given pressure, interpolated linearly between vacuum and sea level.
+
+        Parameters
+            ----------
+            pressure - `float/array`
+                Pressure [atm]. 0 is vacuum and 1 is sea level on Kerbin.
+
+        Return
+            ----------
+            isp - `float/array`
+                ISP of the engine [s], never below 0.
+
+        """
+        isp = self.isp_atm*pressure + self.isp_vac*(1 - pressure)
+        return isp*(isp > 0)
+
+    def thrust_at(self, pressure):
+        """
+        Thrust of the engine at a given pressure, interpolated linearly between vacuum and sea level.
+
+        Parameters
+            ----------
+            pressure - `float/array`
+                Pressure [atm]. 0 is vacuum and 1 is sea level on Kerbin.
+
+        Return
+            ----------
+            thrust - `float/array`
+                Thrust of the engine [kN], never below 0.
+
+        """
+        thrust = self.thrust_atm*pressure + self.thrust_vac*(1 - pressure)
+        return thrust*(thrust > 0)
+
 class LiquidEngine(Engine):
     """Liquid engine class for generating new parts.
 
@@ -121,6 +228,8 @@ class LiquidEngine(Engine):
         * Basic parts have already been inserted through LiquidEngineParts, but new ones can be made by utilizing this class.
 
     """
+    __slots__ = ()
+
     def __init__(self, name, mass, cost, thrust_atm, thrust_vac, isp_atm, isp_vac): 
         super().__init__(name, mass, cost, thrust_atm, thrust_vac, isp_atm, isp_vac)
 
@@ -154,6 +263,7 @@ class SolidEngine(Engine):
         ----------
         * Basic parts have already been inserted through BoosterParts, but new ones can be made by utilising this class.
     """
+    __slots__ = ('mass_empty',)
 
     def __init__(self, name, mass_full, mass_empty, cost, thrust_atm, thrust_vac, isp_atm, isp_vac): 
         super().__init__(name, mass_full, cost, thrust_atm, thrust_vac, isp_atm, isp_vac)
@@ -168,37 +278,126 @@ class Stage:
     In the stage, a form of engine and fuel must be present. Other parts can be represented as extra mass and
     extra cost.
 
+    Parts are stored as a count of each different part, so a stage with many copies of the same tank holds a single
+    entry for it. Masses, cost and engine performance are kept as running totals, updated as parts are added, so they
+    can be queried at no cost. Every change to the stage increases its version, which rockets use to know when their
+    cached results are outdated.
+
     Notes
         -----------
         * Different fuel types or engine types (solid or liquid) cannot be placed on the same stage.
         * Only use one type of solid booster per stage.
+        * Parts must be added through the stage methods. The parts are given as a tuple rebuilt from the counts on
+          every access, so they cannot be changed in place.
 
     """
+    __slots__ = ('part_counts', '_extra_mass', '_extra_cost', 'version', '_parts_full_mass', '_parts_empty_mass',
+                 '_parts_cost', '_thrust_atm', '_thrust_vac', '_relative_isp_atm', '_relative_isp_vac', '_fuel_type',
+                 '_engine_type', '__weakref__')
 
     def __init__(self):
-        self.parts = []
+        self.part_counts = {} # number of each part in the stage {part: count}, in the order they were first added
+        self.version = 0 # increased every time the stage changes
         self.extra_mass = 0.0
         self.extra_cost = 0.0
+        self._reset_totals()
+        self._fuel_type = None # 'liquid' or 'solid', kept as parts are added
+        self._engine_type = None
+
+    @property
+    def parts(self):
+        """Tuple of every part in the stage, one entry per copy."""
+        return tuple(part for part, count in self.part_counts.items() for _ in range(count))
+
+    @property
+    def extra_mass(self):
+        """Mass of the stage that is not engines or fuel tanks [ton]."""
+        return self._extra_mass
+
+    @extra_mass.setter
+    def extra_mass(self, mass):
+        self._extra_mass = _number_check(mass)
+        self.version += 1
+
+    @property
+    def extra_cost(self):
+        """Cost of the stage that is not engines or fuel tanks."""
+        return self._extra_cost
+
+    @extra_cost.setter
+    def extra_cost(self, cost):
+        self._extra_cost = _number_check(cost)
+        self.version += 1
+
+    def _engine_totals(self, loc):
+        """Total thrust and sum of thrust/isp of all engines of the stage."""
+        if loc == 'atm':
+            return self._thrust_atm, self._relative_isp_atm
+        return self._thrust_vac, self._relative_isp_vac
+
+    def _reset_totals(self):
+        self._parts_full_mass = 0.0
+        self._parts_empty_mass = 0.0
+        self._parts_cost = 0.0
+        self._thrust_atm = 0.0
+        self._thrust_vac = 0.0
+        self._relative_isp_atm = 0.0 # sum of thrust/isp of all engines
+        self._relative_isp_vac = 0.0
+
+    def _add_to_totals(self, part, count=1):
+        self._parts_full_mass += count*part.mass
+        self._parts_empty_mass += count*getattr(part, 'mass_empty', part.mass)
+        self._parts_cost += count*part.cost
+        if isinstance(part, Engine):
+            self._thrust_atm += count*part.thrust_atm
+            self._thrust_vac += count*part.thrust_vac
+            self._relative_isp_atm += count*(part.thrust_atm/part.isp_atm)
+            self._relative_isp_vac += count*(part.thrust_vac/part.isp_vac)
+        self.version += 1
+
+    def _check_types(self, parts, fuel_type=None, engine_type=None):
+        """
+        Fuel and engine types of a stage with the given types once the parts are added. Raises an exception if two
+        parts that are not allowed together would be placed in the same stage.
 
-    def add_part(self, part):
         """
-        Add a part to an stage.
+        for part in parts:
+            if not isinstance(part, Part): # compare the Class part and the part being inserted
+                raise KerbalException('Only parts can be added to a stage.')
+            part_fuel, part_engine = _part_types(part)
+            if part_fuel is not None:
+                if fuel_type is not None and part_fuel != fuel_type:
+                    raise KerbalException('Cannot have liquid and solid fuels in the same stage.')
+                fuel_type = part_fuel
+            if part_engine is not None:
+                if engine_type is not None and part_engine != engine_type:
+                    raise KerbalException('Cannot have liquid and solid engines in the same stage.')
+                engine_type = part_engine
+        return fuel_type, engine_type
+
+    def add_part(self, part, count=1):
+        """
+        Add a part to an stage. The part is checked against the fuel and engine types already in the stage, and is
+        not added if they are not allowed together.
 
         Parameters
             ----------
             part - `part`
                 Part to be added to a stage.
+            count - `int`
+                Number of copies of the part to be added.
 
         """
-        if not isinstance(part, Part): # compare the Class part and the part being inserted
-            raise KerbalException('Only parts can be added to a stage.')
-        else:
-            self.parts.append(part)
-        self._check_for_parts_not_allowed_together()
+        _count_check(count)
+        self._fuel_type, self._engine_type = self._check_types((part,), self._fuel_type, self._engine_type)
+        count = int(count)
+        self.part_counts[part] = self.part_counts.get(part, 0) + count
+        self._add_to_totals(part, count)
 
     def add_parts(self, parts): # Input is a list of parts
         """
-        Add parts to an stage.
+        Add parts to an stage. The whole list is checked once before any part is added, so either every part is
+        added or none is.
 
         Parameters
             ----------
@@ -206,9 +405,31 @@ class Stage:
                 Parts to be added to a stage.
 
         """
-
+        parts = list(parts)
+        self._fuel_type, self._engine_type = self._check_types(parts, self._fuel_type, self._engine_type)
+        counts = {}
         for part in parts:
-            self.add_part(part)
+            counts[part] = counts.get(part, 0) + 1
+        for part, count in counts.items():
+            self.part_counts[part] = self.part_counts.get(part, 0) + count
+            self._add_to_totals(part, count)
+
+    def validate(self):
+        """
+        Checks every part of the stage again, and raises an exception if two parts that are not allowed together
+        are placed in the same stage, or if a count is not a positive integer. Parts are already checked as they are
+        added, this is only needed if the part counts were changed directly. Masses, cost and engine totals are then
+        rebuilt from the counts, and the version increased so that rockets update their results. A stage that fails
+        the check is left as it was.
+
+        """
+        for count in self.part_counts.values():
+            _count_check(count)
+        self._fuel_type, self._engine_type = self._check_types(self.part_counts)
+        self._reset_totals()
+        for part, count in self.part_counts.items():
+            self._add_to_totals(part, int(count))
+        self.version += 1
 
     def list_parts(self):
         """
@@ -216,11 +437,8 @@ class Stage:
         Prints all parts present in a stage.
 
         """
-        parts_dict = defaultdict(int)
-        for part in self.parts:
-            parts_dict[part] +=1
-        for part in parts_dict:
-            print(f'{part.name}: {parts_dict[part]}')
+        for part, count in self.part_counts.items():
+            print(f'{part.name}: {count}')
 
     # def remove_part(self):
     #     pass
@@ -235,7 +453,7 @@ class Stage:
                 Mass to be added [ton].
 
         """
-        self.extra_mass += _number_check(mass)
+        self.extra_mass = self._extra_mass + _number_check(mass)
 
     def add_extra_cost(self, cost):
         """
@@ -247,7 +465,7 @@ class Stage:
                 Cost to be added.
 
         """
-        self.extra_cost += _number_check(cost)
+        self.extra_cost = self._extra_cost + _number_check(cost)
 
     def calculate_full_mass(self):
         """
@@ -259,9 +477,7 @@ class Stage:
                 Total mass of full stage [ton].
 
         """
-        mass_sum = self.extra_mass
-        for part in self.parts:
-            mass_sum += part.mass
+        mass_sum = self._extra_mass + self._parts_full_mass
         return mass_sum
 
     def calculate_cost(self):
@@ -274,9 +490,7 @@ class Stage:
                 Total cost of stage.
 
         """
-        cost_sum = self.extra_cost
-        for part in self.parts:
-            cost_sum += part.cost
+        cost_sum = self._extra_cost + self._parts_cost
         return cost_sum
 
     def calculate_empty_mass(self):
@@ -289,12 +503,7 @@ class Stage:
                 Total mass of empty stage [ton].
 
         """
-        mass_sum = self.extra_mass
-        for part in self.parts:
-            if hasattr(part, 'mass_empty'):
-                mass_sum += part.mass_empty
-            else:
-                mass_sum += part.mass
+        mass_sum = self._extra_mass + self._parts_empty_mass
         return mass_sum
 
     def get_engine_performance(self, loc='atm'): # all engines from stage
@@ -310,50 +519,543 @@ class Stage:
 
         """
         _loc_check(loc)
-        relative_isp_list = []
-        thrust_list = []
-        for part in self.parts:
-            if isinstance(part, Engine): 
-                if loc is 'atm':
-                    thrust_list.append(part.thrust_atm)
-                    relative_isp_list.append(part.thrust_atm/part.isp_atm)
-                elif loc is 'vac':
-                    thrust_list.append(part.thrust_vac)
-                    relative_isp_list.append(part.thrust_vac/part.isp_vac)
-        thrust = sum(thrust_list)
-        isp = thrust / sum(relative_isp_list)
+        thrust, relative_isp = self._engine_totals(loc)
+        isp = thrust / relative_isp
         return thrust, isp
 
-    def _check_for_parts_not_allowed_together(self):
+    def get_fuel_type(self):
         """
-        Raises an exception if two parts that are not allowed together are placed in the same stage.
+        Returns the fuel type being used within the same stage.  
 
         """
-        fuels = {'liquid': False, 'solid': False}
-        engines = {'liquid': False, 'solid': False}
-        for part in self.parts:
-            if isinstance(part, SolidEngine):
-                fuels['solid'] = True
-                engines['solid'] = True
-            if isinstance(part, RocketFuelTank):
-                fuels['liquid'] = True
-            if isinstance(part, LiquidEngine):
-                engines['liquid']
-        if fuels['liquid'] and fuels['solid']:
-            raise KerbalException('Cannot have liquid and solid fuels in the same stage.')
-        if engines['liquid'] and engines['solid']:
-            raise KerbalException('Cannot have liquid and solid engines in the same stage.')
+        return self._fuel_type
 
-    def get_fuel_type(self):
+
+class StagingTimeline:
+    """Staging timeline of a rocket, evaluated in a single pass at a given location.
+
+    The stages are walked once, in firing order, and everything the rocket calculations depend on is stored:
+    when each stage starts and burns out, how much fuel engines fired before their stage have consumed and the
+    mass of the rocket at each staging event. Rocket methods read their results from this timeline.
+
+    When the timeline of the same rocket before a change is given, only the stages the change affects are evaluated
+    again:
+
+    * Engine figures (thrust, ISP and mass flow) of a stage depend on its engine key: the stage, the stages whose
+      engines were scheduled to fire with it, and which of them share its fuel up to the next fuel restriction.
+      They are reused for every stage whose key is unchanged, even if stages were inserted or removed below it.
+    * Burn times depend on the stages below, so they are reused up to the first stage whose parts, mass flow or
+      scheduled firing changed.
+    * Fuel lost at each staging event depends on every stage. It is only reused when nothing but the payload changed,
+      as are the engine figures and burn times. Masses and delta V are always evaluated.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be evaluated.
+        loc - `{'atm', 'vac'}`
+            Location where the timeline will be evaluated.
+        previous - `StagingTimeline`
+            Timeline of the rocket before its last changes, whose results are reused where they still hold.
+
+    Attributes
+        ----------
+        fire_stage - `list of int`
+            Stage where the engines of each stage are fired.
+        engine_keys - `list of tuples`
+            Engine key of each stage, as (stage, version, ((stage, version, shares_fuel), ...)).
+        evaluated_engines - `list of int`
+            Stages whose engine figures were evaluated, and not reused from the previous timeline.
+        reused_burns - `int`
+            Number of first stages whose burn times were reused from the previous timeline.
+        thrust - `list of float`
+            Thrust of all engines firing at each stage [kN].
+        isp - `list of float`
+            Relative ISP of all engines firing at each stage [s].
+        group_thrust - `list of float`
+            Thrust of the engines firing at each stage that burn its fuel [kN].
+        group_isp - `list of float`
+            Relative ISP of the engines firing at each stage that burn its fuel [s].
+        mass_flow - `list of float`
+            Fuel mass flow out of each stage once it is burning [ton/s].
+        prestage_mass_loss - `list of float`
+            Mass each stage has lost before the rocket staged into it [ton].
+        burn_time - `list of float`
+            Time each stage spends burning at maximum thrust [s].
+        staging_time - `list of float`
+            Time at which each stage starts. The extra last value is the burnout of the last stage [s].
+        total_prestage_mass_loss - `list of float`
+            Mass lost by the stages still attached at the start of each stage. The extra last value is always zero [ton].
+        remaining_fuel - `list of list of float`
+            Fuel left in every stage at the start of each stage, zero for stages already discarded [ton].
+        start_mass - `list of float`
+            Rocket mass at the start of each stage [ton].
+        end_mass - `list of float`
+            Rocket mass at the end of each stage, right before it is discarded [ton].
+        stage_dV - `list of float`
+            Delta V of each stage [m/s].
+        errors - `dict of lists`
+            Exception raised when evaluating each value of a quantity, or None when it was evaluated.
+
+    Note
+        ----------
+        * A stage that loses all its fuel before being staged does not stop the evaluation. Values that depend on it
+          are kept in `errors`, and `get` raises them when these values are requested.
+
+    """
+    def __init__(self, rocket, loc='atm', previous=None):
+        _loc_check(loc)
+        self.loc = loc
+        stages = rocket.stages
+        num_stages = len(stages)
+        full_mass = [stage.calculate_full_mass() for stage in stages]
+        empty_mass = [stage.calculate_empty_mass() for stage in stages]
+        if previous is not None and previous.loc != loc:
+            previous = None
+
+        # everything but the payload, which only the masses at each staging event and delta V depend on
+        self._stages_key = rocket._state_key()[1:]
+        if previous is not None and previous._stages_key == self._stages_key:
+            self._reuse(previous)
+        else:
+            self._evaluate_engines(rocket, previous)
+            self._evaluate_burns(rocket, full_mass, empty_mass, previous)
+            self._evaluate_events(rocket, full_mass, empty_mass)
+
+        self.start_mass = []
+        self.end_mass = []
+        self.stage_dV = []
+        dV_errors = []
+        for stage_num in range(num_stages):
+            upper_mass = self._upper_stages_mass[stage_num] + rocket.payload
+            start_mass = full_mass[stage_num] + upper_mass - self.total_prestage_mass_loss[stage_num]
+            end_mass = empty_mass[stage_num] + upper_mass - self.total_prestage_mass_loss[stage_num+1]
+            error = self._event_errors[stage_num] or self._event_errors[stage_num+1]
+            self.start_mass.append(start_mass)
+            self.end_mass.append(end_mass)
+            self.stage_dV.append(float('nan') if error else log(start_mass/end_mass)*self.isp[stage_num]*9.81)
+            dV_errors.append(error)
+
+        self.errors = {
+            'prestage_mass_loss': self._prestage_errors,
+            'burn_time': self._stage_errors,
+            'staging_time': [self._first_error(0, stage_num) for stage_num in range(num_stages + 1)],
+            'total_prestage_mass_loss': self._event_errors,
+            'remaining_fuel': self._event_errors[:num_stages],
+            'start_mass': self._event_errors[:num_stages],
+            'end_mass': self._event_errors[1:],
+            'stage_dV': dV_errors,
+        }
+
+    def _reuse(self, previous):
+        """Takes everything but the masses and delta V from the previous timeline, when only the payload changed."""
+        for name in ('fire_stage', 'engine_keys', '_engine_figures', 'thrust', 'isp', 'group_thrust', 'group_isp',
+                     'mass_flow', '_leaking', '_burn_keys', 'prestage_mass_loss', 'burn_time', 'staging_time',
+                     '_stage_errors', '_prestage_errors', 'total_prestage_mass_loss', 'remaining_fuel', '_event_errors',
+                     '_upper_stages_mass'):
+            setattr(self, name, getattr(previous, name))
+        self.evaluated_engines = []
+        self.reused_burns = len(self.burn_time)
+
+    def _evaluate_engines(self, rocket, previous):
+        """Stage where each stage fires, and the engine figures of each stage."""
+        stages = rocket.stages
+        num_stages = len(stages)
+        self.fire_stage, stage_max, firing = rocket.graph.layout(num_stages)
+
+        # the engine figures of a stage only depend on what its engine key holds, so they are reused from the last
+        # timeline while the key is the same, wherever the stage is in the rocket
+        reusable = {} if previous is None else previous._engine_figures
+        known = {} # engine performance of each stage, only evaluated once
+        self._engine_figures = {}
+        self.engine_keys = []
+        self.evaluated_engines = []
+        self.thrust = []
+        self.isp = []
+        self.group_thrust = []
+        self.group_isp = []
+        self.mass_flow = []
+        for stage_num in range(num_stages):
+            shared_max = stage_max[stage_num] # fuel is shared up to it
+            stage = stages[stage_num]
+            engine_key = (stage, stage.version, tuple([(stages[stage_present], stages[stage_present].version,
+                                                        shared_max is None or stage_present <= shared_max)
+                                                       for stage_present in firing[stage_num]]))
+            figures = reusable.get(engine_key)
+            if figures is None:
+                figures = _engine_figures(engine_key, self.loc, known)
+                self.evaluated_engines.append(stage_num)
+            self._engine_figures[engine_key] = figures
+            self.engine_keys.append(engine_key)
+            self.thrust.append(figures[0])
+            self.isp.append(figures[1])
+            self.group_thrust.append(figures[2])
+            self.group_isp.append(figures[3])
+            self.mass_flow.append(figures[4])
+        # stages that burn their own fuel before the rocket stages into them
+        self._leaking = [stage_num for stage_num in range(1, num_stages)
+                         if stage_max[stage_num-1] == stage_num-1 and self.fire_stage[stage_num] < stage_num]
+
+    def _evaluate_burns(self, rocket, full_mass, empty_mass, previous):
+        """Fuel lost before staging and burn time of each stage."""
+        stages = rocket.stages
+        num_stages = len(stages)
+        leaking = set(self._leaking)
+        # burn times only depend on the stages below, so they are kept up to the first stage whose inputs changed
+        self._burn_keys = [(stages[stage_num], stages[stage_num].version, self.mass_flow[stage_num],
+                            self.fire_stage[stage_num] if stage_num in leaking else None)
+                           for stage_num in range(num_stages)]
+        kept = 0
+        if previous is not None:
+            for burn_key, previous_key in zip(self._burn_keys, previous._burn_keys):
+                if burn_key != previous_key:
+                    break
+                kept += 1
+        self.reused_burns = kept
+        self.prestage_mass_loss = [] if not kept else previous.prestage_mass_loss[:kept]
+        self.burn_time = [] if not kept else previous.burn_time[:kept]
+        self.staging_time = [0.0] if not kept else previous.staging_time[:kept+1]
+        self._stage_errors = [] if not kept else previous._stage_errors[:kept]
+        self._prestage_errors = [] if not kept else previous._prestage_errors[:kept]
+        for stage_num in range(kept, num_stages):
+            mass_loss = 0.0
+            error = None
+            if stage_num in leaking:
+                stage_fire = self.fire_stage[stage_num]
+                error = self._first_error(stage_fire, stage_num)
+                mass_loss = self.mass_flow[stage_num] * self._elapsed(stage_fire, stage_num)
+                error = error or _mass_loss_error(rocket, stage_num, mass_loss)
+            self._prestage_errors.append(error)
+            mass_full = full_mass[stage_num] - mass_loss
+            if error is None and mass_full < empty_mass[stage_num]:
+                error = KerbalException(f'Stage: {stage_num} lost all its fuel before being staged! This is not supported.')
+            burn_time = (mass_full - empty_mass[stage_num]) / self.mass_flow[stage_num]
+            self.prestage_mass_loss.append(mass_loss)
+            self.burn_time.append(burn_time)
+            self.staging_time.append(self.staging_time[stage_num] + burn_time)
+            self._stage_errors.append(error)
+
+    def _evaluate_events(self, rocket, full_mass, empty_mass):
+        """Fuel lost by the stages still attached at each staging event, and mass of the stages above each stage."""
+        num_stages = len(full_mass)
+        self.total_prestage_mass_loss = []
+        self.remaining_fuel = []
+        self._event_errors = []
+        for stage_num in range(num_stages + 1):
+            total_mass_lost = 0.0
+            remaining_fuel = [0.0]*stage_num + [full_mass[i] - empty_mass[i] for i in range(stage_num, num_stages)]
+            error = None
+            for check_stage in self._leaking:
+                stage_fire = self.fire_stage[check_stage]
+                if check_stage >= stage_num and stage_fire < stage_num:
+                    error = error or self._first_error(stage_fire, stage_num)
+                    mass_loss = self.mass_flow[check_stage] * self._elapsed(stage_fire, stage_num)
+                    error = error or _mass_loss_error(rocket, check_stage, mass_loss)
+                    total_mass_lost += mass_loss
+                    remaining_fuel[check_stage] -= mass_loss
+            self.total_prestage_mass_loss.append(total_mass_lost)
+            self._event_errors.append(error)
+            if stage_num < num_stages:
+                self.remaining_fuel.append(remaining_fuel)
+
+        self._upper_stages_mass = [sum(full_mass[(stage_num+1):]) for stage_num in range(num_stages)]
+
+    def _elapsed(self, stage_ini, stage_end):
+        total_time = 0.0
+        for burn_time in self.burn_time[stage_ini:stage_end]:
+            total_time += burn_time
+        return total_time
+
+    def _first_error(self, stage_ini, stage_end):
+        for error in self._stage_errors[stage_ini:stage_end]:
+            if error is not None:
+                return error
+        return None
+
+    def check(self):
         """
-        Returns the fuel type being used within the same stage.  
+        Raises the first exception found when evaluating the stages, if any.
+
+        """
+        for error in self.errors['stage_dV']:
+            if error is not None:
+                raise error
+
+    def get(self, quantity, stage_num):
+        """
+        Value of a timeline quantity for a given stage.
+
+        Raises the exception found when evaluating it, if it could not be evaluated.
+
+        Parameters
+            ----------
+            quantity - `string`
+                Name of the quantity, for example 'burn_time' or 'stage_dV'.
+            stage_num - `int`
+                Stage to be analyzed.
+
+        Return
+            ----------
+            value - `float`
+                Value of the quantity for the stage.
+
+        """
+        values = getattr(self, quantity)
+        value = values[stage_num]
+        errors = self.errors.get(quantity)
+        if errors is not None and errors[stage_num] is not None:
+            raise errors[stage_num]
+        return value
+
+    def time_between(self, stage_ini, stage_end):
+        """
+        Time between the start of two stages.
+
+        Parameters
+            ----------
+            stage_ini - `int`
+                Initial stage.
+            stage_end - `int`
+                Final stage.
+
+        Return
+            ----------
+            total_time - `float`
+                Total time between stages [s].
 
         """
-        for part in self.parts:
-            if isinstance(part, SolidEngine):
-                return 'solid'
-            if isinstance(part, RocketFuelTank):
-                return 'liquid'
+        error = self._first_error(stage_ini, stage_end)
+        if error is not None:
+            raise error
+        return self._elapsed(stage_ini, stage_end)
+
+    def num_stages(self):
+        """
+        Number of stages in the timeline.
+
+        Return
+            ----------
+            num_stage - `int`
+                Number of stages evaluated.
+
+        """
+        return len(self.thrust)
+
+    def burnout_time(self, stage_num):
+        """
+        Time at which a stage burns out and is discarded.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage to be analyzed.
+
+        Return
+            ----------
+            burnout_time - `float`
+                Time since the first stage started [s].
+
+        """
+        return self.get('staging_time', stage_num+1)
+
+    def twr(self, stage_num, g=9.81):
+        """
+        Thrust to weight ratio at the start of a stage.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage to be analyzed.
+            g - `float`
+                Gravity (default for Kerbin).
+
+        Return
+            ----------
+            twr - `float`
+                Thrust to weight ratio.
+
+        """
+        return self.thrust[stage_num]/(g*self.get('start_mass', stage_num))
+
+
+class StagingGraph:
+    """Firing schedule and fuel flow restrictions of a rocket, indexed for constant time lookups.
+
+    Engines scheduled with schedule_engine fire before their own stage, and fuel flow removed with rem_fuel_flow can
+    not move between a stage and the next one. Besides the schedule and restrictions, the graph keeps reverse indexes
+    of the stage where each stage fires, the engines burning during each stage and the closest restriction at or above
+    each stage. Indexes are built once after each change, in a single pass over the stages.
+
+    Attributes
+        ----------
+        version - `int`
+            Number of changes made to the graph.
+
+    """
+    def __init__(self):
+        self._schedule = {} # {stage_fire: [stages_present]}, in the order they were scheduled
+        self._fire_stage = {} # {stage_present: stage_fire}
+        self._restricted = set()
+        self.version = 0
+        self._index = None
+
+    def _changed(self):
+        self.version += 1
+        self._index = None
+
+    def schedule(self, stage_fire, stage_present):
+        """
+        Schedule the engines of a stage to fire at an earlier stage.
+
+        Parameters
+            ----------
+            stage_fire - `int`
+                Stage to fire engines.
+            stage_present - `int`
+                Stage which is to fire their engines.
+
+        """
+        if stage_fire >= stage_present:
+            raise KerbalException("Engines can only be scheduled to fire before their stage.")
+        if stage_present in self._fire_stage:
+            raise KerbalException(f"A stage can only be scheduled to fire once.")
+        self._schedule.setdefault(stage_fire, []).append(stage_present)
+        self._fire_stage[stage_present] = stage_fire
+        self._changed()
+
+    def restrict(self, stage_num):
+        """
+        Restrict the fuel flow between a stage and the next one.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage below the restriction.
+
+        """
+        if stage_num not in self._restricted:
+            self._restricted.add(stage_num)
+            self._changed()
+
+    def schedule_items(self):
+        """Scheduled engines as (stage_fire, stages_present) pairs, in the order they were first scheduled."""
+        return [(stage_fire, list(stages_present)) for stage_fire, stages_present in self._schedule.items()]
+
+    def fire_stage(self, stage_num):
+        """
+        Stage where the engines of a stage fire, which is itself unless they were scheduled to fire before.
+
+        """
+        return self._fire_stage.get(stage_num, stage_num)
+
+    def is_restricted(self, stage_num):
+        """True if fuel can not flow between a stage and the next one."""
+        return stage_num in self._restricted
+
+    def _build_index(self):
+        """Restrictions in order, closest restriction at or above each stage, and engines burning during each stage."""
+        restrictions = sorted(self._restricted)
+        stage_max = [None]*(restrictions[-1] + 1 if restrictions else 0)
+        closest = None
+        for stage_num in range(len(stage_max) - 1, -1, -1):
+            if stage_num in self._restricted:
+                closest = stage_num
+            stage_max[stage_num] = closest
+
+        # stages firing before their own stage, scheduled in order of the stage they fire at
+        firing = []
+        sharing = []
+        present = []
+        for stage_num in range(max(self._fire_stage, default=0)):
+            present = [stage_present for stage_present in present if stage_present > stage_num]
+            present += [stage_present for stage_present in self._schedule.get(stage_num, ()) if stage_present > stage_num]
+            firing.append(tuple(present))
+            limit = stage_max[stage_num] if stage_num < len(stage_max) else None
+            sharing.append(firing[-1] if limit is None else tuple([stage_present for stage_present in present
+                                                                   if stage_present <= limit]))
+        key = (tuple(restrictions), tuple([(stage_fire, tuple(stages_present))
+                                           for stage_fire, stages_present in self._schedule.items()]))
+        self._index = (restrictions, stage_max, firing, sharing, key)
+        return self._index
+
+    def _get_index(self):
+        return self._index if self._index is not None else self._build_index()
+
+    def restrictions(self):
+        """Stages with restricted fuel flow to the next one, in increasing order."""
+        return list(self._get_index()[0])
+
+    def stage_max(self, stage_num):
+        """
+        Closest stage with restricted fuel flow at or above a stage. Engines above it do not burn the fuel of the stage.
+
+        Return
+            ----------
+            stage_max - `int`
+                Closest restricted stage, None if fuel flows all the way up.
+
+        """
+        index = self._get_index()[1]
+        if stage_num < len(index):
+            return index[max(stage_num, 0)]
+        return None
+
+    def engines_firing(self, stage_num, shares_fuel=False):
+        """
+        Stages above a stage whose engines burn during it, in order of the stage they fire at.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage to be analyzed.
+            shares_fuel - `bool`
+                If True, only stages that burn the fuel of the stage, below its closest restriction.
+
+        Return
+            ----------
+            stages - `tuple of int`
+                Stages firing during the stage.
+
+        """
+        firing = self._get_index()[3 if shares_fuel else 2]
+        if 0 <= stage_num < len(firing):
+            return firing[stage_num]
+        return ()
+
+    def layout(self, num_stages):
+        """
+        Stage where each stage fires, its closest restriction and the stages firing during it, for every stage at once.
+
+        Parameters
+            ----------
+            num_stages - `int`
+                Number of stages of the rocket.
+
+        Return
+            ----------
+            fire_stage - `list of int`
+                Stage where the engines of each stage fire.
+            stage_max - `list of int`
+                Closest stage with restricted fuel flow at or above each stage, None if fuel flows all the way up.
+            firing - `list of tuples`
+                Stages above each stage whose engines burn during it, in order of the stage they fire at.
+
+        """
+        _, stage_max, firing, _, _ = self._get_index()
+        fire_stage = [self._fire_stage.get(stage_num, stage_num) for stage_num in range(num_stages)]
+        stage_max = stage_max[:num_stages] + [None]*(num_stages - len(stage_max))
+        firing = firing[:num_stages] + [()]*(num_stages - len(firing))
+        return fire_stage, stage_max, firing
+
+    def key(self):
+        """Restrictions and schedule, equal for graphs with the same ones."""
+        return self._get_index()[4]
+
+
+class _Schedule(dict):
+    """Scheduled engines, where stages without any read as an empty tuple."""
+    def __missing__(self, stage_fire):
+        return ()
 
 
 class Rocket:
@@ -366,6 +1068,9 @@ class Rocket:
 
     If this is not the intended operation, fuel flow can also be restricted. 
 
+    Both are kept in the StagingGraph of the rocket, in its graph attribute, which answers when a stage fires, which engines
+    burn during a stage and which restriction limits its fuel flow without scanning the others.
+
     Parameter
         ----------
         name (optional) - `string`
@@ -376,8 +1081,47 @@ class Rocket:
         self.stages = []
         self.name = name
         self.payload = 0 # simulated rocket payload in Tons
-        self.async_engines = defaultdict(list) # this dictionary links engines that fire before their stage {stage_fire:[stages_present]} 
-        self.restric_fuel_flow = [] # this list contains all stages that have restricted fuel flow in between the stage number intered and the next stage
+        self.graph = StagingGraph() # engines that fire before their stage and stages with restricted fuel flow to the next one
+        self._timelines = {} # cached staging timelines {loc: (state_key, timeline)}
+
+    @property
+    def async_engines(self):
+        """
+        Engines that fire before their stage {stage_fire: (stages_present)}, as a read-only view of the staging graph
+        schedule. Stages without scheduled engines read as an empty tuple. Use schedule_engine to change it.
+
+        """
+        return MappingProxyType(_Schedule((stage_fire, tuple(stages_present))
+                                          for stage_fire, stages_present in self.graph.schedule_items()))
+
+    @async_engines.setter
+    def async_engines(self, async_engines):
+        graph = StagingGraph()
+        for stage_fire, stages_present in async_engines.items():
+            for stage_present in stages_present:
+                graph.schedule(int(stage_fire), int(stage_present))
+        for stage_num in self.graph.restrictions():
+            graph.restrict(stage_num)
+        self.graph = graph
+
+    @property
+    def restric_fuel_flow(self):
+        """
+        Stages with restricted fuel flow to the next one, in increasing order, as a tuple. Use rem_fuel_flow to change
+        them.
+
+        """
+        return tuple(self.graph.restrictions())
+
+    @restric_fuel_flow.setter
+    def restric_fuel_flow(self, restric_fuel_flow):
+        graph = StagingGraph()
+        for stage_fire, stages_present in self.graph.schedule_items():
+            for stage_present in stages_present:
+                graph.schedule(stage_fire, stage_present)
+        for stage_num in restric_fuel_flow:
+            graph.restrict(int(stage_num))
+        self.graph = graph
 
     def add_stage(self, stage):
         """
@@ -396,7 +1140,7 @@ class Rocket:
         else:
             self.stages.append(stage)
             # If I implement Xenon, this part will have to be changed.
-            if stage.get_fuel_type() is 'solid': # if it is a solid rocket engine, it removes fuel flow with both stage after and before
+            if stage.get_fuel_type() == 'solid': # if it is a solid rocket engine, it removes fuel flow with both stage after and before
                 num_stages = self.num_stages()
                 self.rem_fuel_flow(num_stages-1)
                 if num_stages > 1:
@@ -417,6 +1161,116 @@ class Rocket:
         for stage in stages:
             self.add_stage(stage)
 
+    def _stage_index(self, stage_num, end = False):
+        """Checks a stage number, which may also be the number of stages if end is True."""
+        try:
+            stage_num = int(stage_num)
+        except (TypeError, ValueError):
+            raise KerbalException("Values for stages can only be integers.")
+        if not 0 <= stage_num < self.num_stages() + end:
+            raise KerbalException(f'Stage {stage_num} is not part of the rocket, which has {self.num_stages()} stages.')
+        return stage_num
+
+    def _renumber_stages(self, stage_num, shift):
+        """
+        Moves the stages of scheduled engines and fuel restrictions from stage_num onwards by shift, 1 when a stage is
+        inserted at stage_num and -1 when it is removed. Engines and the restriction of a removed stage are dropped.
+
+        """
+        removed = stage_num if shift < 0 else None
+
+        def renumber(value):
+            return value + shift if value > stage_num or (value == stage_num and shift > 0) else value
+
+        graph = StagingGraph()
+        for stage_fire, stages_present in self.graph.schedule_items():
+            for stage_present in stages_present:
+                if stage_present == removed:
+                    continue
+                new_fire = renumber(stage_fire)
+                new_present = renumber(stage_present)
+                if new_fire < new_present: # engines left firing with their own stage are no longer scheduled
+                    graph.schedule(new_fire, new_present)
+        for value in self.graph.restrictions():
+            if value != removed:
+                graph.restrict(renumber(value))
+        self.graph = graph
+
+    def _restrict_solid(self, stage_num):
+        """Removes the fuel flow around a solid stage, as add_stage does."""
+        if self.stages[stage_num].get_fuel_type() == 'solid':
+            self.rem_fuel_flow(stage_num)
+            if stage_num > 0:
+                self.rem_fuel_flow(stage_num-1)
+
+    def replace_stage(self, stage_num, stage):
+        """
+        Replace a stage of the rocket by another one. Scheduled engines and fuel restrictions are kept.
+
+        Only results of the stages that depend on the replaced one are evaluated again, such as the stages below it if
+        its mass changed, or the ones firing together with it.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage to be replaced.
+            stage - `stage`
+                New stage.
+
+        """
+        stage_num = self._stage_index(stage_num)
+        if not isinstance(stage, Stage):
+            raise KerbalException('Only stages can be added to a rocket.')
+        self.stages[stage_num] = stage
+        self._restrict_solid(stage_num)
+
+    def insert_stage(self, stage_num, stage):
+        """
+        Insert a stage in the rocket, before the stage currently at stage_num.
+
+        Stages from stage_num onwards are moved up by one, and so are the stages of their scheduled engines and fuel
+        restrictions. Engines scheduled to fire before stage_num keep firing at the same time, and so also fire during
+        the new stage.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Position of the new stage. The number of stages adds it after the last stage.
+            stage - `stage`
+                Stage to be inserted.
+
+        """
+        stage_num = self._stage_index(stage_num, end = True)
+        if not isinstance(stage, Stage):
+            raise KerbalException('Only stages can be added to a rocket.')
+        self.stages.insert(stage_num, stage)
+        self._renumber_stages(stage_num, 1)
+        self._restrict_solid(stage_num)
+
+    def remove_stage(self, stage_num):
+        """
+        Remove a stage from the rocket.
+
+        Stages above it are moved down by one, and so are the stages of their scheduled engines and fuel restrictions.
+        Engines of the removed stage are no longer scheduled, and engines scheduled to fire with it fire with the
+        next stage. Its fuel restriction with the next stage is also removed.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage to be removed.
+
+        Return
+            ----------
+            stage - `stage`
+                Removed stage.
+
+        """
+        stage_num = self._stage_index(stage_num)
+        stage = self.stages.pop(stage_num)
+        self._renumber_stages(stage_num, -1)
+        return stage
+
     def num_stages(self):
         """
         Number of stages in a rocket.
@@ -441,6 +1295,40 @@ class Rocket:
         """
         self.payload = _number_check(payload)
 
+    def timeline(self, loc = 'atm'):
+        """
+        Evaluates the staging timeline of the rocket, which holds burn times, fuel lost and masses at every staging event.
+
+        The timeline is cached, and only evaluated again once the rocket or any of its stages changes. Even then,
+        results of the stages the change does not affect are reused (see StagingTimeline).
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            timeline - `StagingTimeline`
+                Staging timeline of the rocket.
+
+        """
+        _loc_check(loc)
+        state_key = self._state_key()
+        cached = self._timelines.get(loc)
+        if cached is not None and cached[0] == state_key:
+            return cached[1]
+        timeline = StagingTimeline(self, loc = loc, previous = cached[1] if cached is not None else None)
+        self._timelines[loc] = (state_key, timeline)
+        return timeline
+
+    def _state_key(self):
+        """
+        Everything the rocket calculations depend on. Cached results are reused while it does not change.
+
+        """
+        return (self.payload, tuple([(stage, stage.version) for stage in self.stages])) + self.graph.key()
+
     # 
     # stage_max limits this function to be performed only to stages smaller or equal than it
     def performance_engines_firing(self, stage_num, stage_max = None, loc = 'atm'):
@@ -470,20 +1358,16 @@ class Rocket:
         current_thrust, current_isp = self.stages[stage_num].get_engine_performance(loc = loc)
         thrust_list = [current_thrust]
         isp_list = [current_isp]
-        for i in range(stage_num+1):
-            stages_present = self.async_engines.get(i)
-            if stages_present != None:
-                for stage_present in stages_present:
-                    if stage_max is None:
-                        if stage_present > stage_num:
-                            thrust, isp = self.stages[stage_present].get_engine_performance(loc = loc)
-                            thrust_list.append(thrust)
-                            isp_list.append(isp)
-                    else:
-                        if stage_present > stage_num and stage_present <=stage_max:
-                            thrust, isp = self.stages[stage_present].get_engine_performance(loc = loc)
-                            thrust_list.append(thrust)
-                            isp_list.append(isp)
+        if stage_max is not None and stage_max == self.graph.stage_max(stage_num):
+            stages_present = self.graph.engines_firing(stage_num, shares_fuel = True)
+        else:
+            stages_present = self.graph.engines_firing(stage_num)
+            if stage_max is not None:
+                stages_present = [stage_present for stage_present in stages_present if stage_present <= stage_max]
+        for stage_present in stages_present:
+            thrust, isp = self.stages[stage_present].get_engine_performance(loc = loc)
+            thrust_list.append(thrust)
+            isp_list.append(isp)
         return thrust_list, isp_list
 
     def engine_burn_time(self, stage_num, loc = 'atm'): # note: burn time is from stage start to stage end. I
@@ -506,15 +1390,7 @@ class Rocket:
                 Total burn time [kN].             
 
         """
-        _loc_check(loc)
-        thrust, isp = self.calculate_group_performance(stage_num, loc=loc)
-        mass_flow = thrust / (isp*9.81)
-        mass_full = self.stages[stage_num].calculate_full_mass() - self.prestage_mass_loss(stage_num, loc = loc)
-        mass_empty = self.stages[stage_num].calculate_empty_mass() 
-        if mass_full<mass_empty:
-            raise KerbalException(f'Stage: {stage_num} lost all its fuel before being staged! This is not supported.')
-        burn_time = (mass_full - mass_empty) / mass_flow 
-        return burn_time # seconds
+        return self.timeline(loc = loc).get('burn_time', stage_num) # seconds
 
     def time_between_stages(self, stage_ini, stage_end, loc = 'atm'): # time until start of stage_end, does not include it
         """
@@ -541,11 +1417,7 @@ class Rocket:
             return 0.0
         elif stage_ini>stage_end:
             raise KerbalException('Stage_ini must be smaller than, or equal to stage_end.')
-        else:
-            iter_stage = range(stage_ini, stage_end) 
-        total_time = 0.0
-        for stage_num in iter_stage:
-            total_time += self.engine_burn_time(stage_num, loc=loc)
+        total_time = self.timeline(loc = loc).time_between(stage_ini, stage_end)
         return total_time
 
     # isp of all engines firing at a given moment to general delta V calculation
@@ -594,11 +1466,7 @@ class Rocket:
 
         """
         _loc_check(loc)
-        stage_max = None
-        for val in self.restric_fuel_flow:
-            if val >= stage_num: # finds stage with fuel restriction closer to stage_num
-                stage_max = val
-                break
+        stage_max = self.graph.stage_max(stage_num) # stage with fuel restriction closer to stage_num
         thrust_list, isp_list = self.performance_engines_firing(stage_num, stage_max = stage_max, loc = loc)
         total_thrust = sum(thrust_list)
         relative_thurst = sum([thrust_list[i]/isp_list[i] for i in range(len(isp_list))])
@@ -624,13 +1492,7 @@ class Rocket:
         except ValueError:
             raise KerbalException("Values for stages can only be integers.")
 
-        if stage_fire >= stage_present:
-            raise KerbalException("Engines can only be scheduled to fire before their stage.")
-        current_keys = list(self.async_engines)
-        for key in current_keys:
-            if stage_present in self.async_engines[key]:
-                raise KerbalException(f"A stage can only be scheduled to fire once.")
-        self.async_engines[stage_fire].append(stage_present)
+        self.graph.schedule(stage_fire, stage_present)
 
     def rem_fuel_flow(self, stage_num):
         """
@@ -647,10 +1509,7 @@ class Rocket:
 
 
         """ 
-        stage_num = int(stage_num)
-        if not stage_num in self.restric_fuel_flow:
-            self.restric_fuel_flow.append(stage_num)
-            self.restric_fuel_flow.sort() # list must always be sorted to avoid issues with calculate_group_isp algorithm
+        self.graph.restrict(int(stage_num))
 
     def find_when_engine_fired(self,stage_num):
         """
@@ -667,12 +1526,7 @@ class Rocket:
                 Stage where engines fire.            
 
         """
-        stage_fire = stage_num # default is to fire at own stage
-        for key in list(self.async_engines):
-            if stage_num in self.async_engines[key]:
-                stage_fire = key
-                return stage_fire
-        return stage_fire
+        return self.graph.fire_stage(stage_num) # default is to fire at own stage
 
     def check_mass_lost(self, stage_num, mass_loss):
         """
@@ -711,16 +1565,7 @@ class Rocket:
                 Total mass lost by the stage [ton].              
 
         """
-        _loc_check(loc)
-        if not (stage_num-1) in self.restric_fuel_flow:
-            return 0 # there is no mass lost if there hasn't been a restriction right before it.
-        stage_engine_fired = self.find_when_engine_fired(stage_num)
-        time_engine_firing = self.time_between_stages(stage_engine_fired, stage_num, loc = loc)
-        thurst, isp = self.calculate_group_performance(stage_num, loc = loc)
-        mass_flow = thurst/(isp*9.81)
-        mass_loss = mass_flow * time_engine_firing
-        self.check_mass_lost(stage_num, mass_loss)
-        return mass_loss
+        return self.timeline(loc = loc).get('prestage_mass_loss', stage_num)
 
     # return all mass lost in all stages after stage_num at current stage_num time 
     def total_prestage_mass_loss(self,stage_num, loc = 'atm'):
@@ -741,17 +1586,9 @@ class Rocket:
 
         """
         _loc_check(loc)
-        total_mass_lost = 0.0
-        for check_stage in range(stage_num, self.num_stages()):
-            if (check_stage-1) in self.restric_fuel_flow:
-                stage_engine_fired = self.find_when_engine_fired(check_stage)
-                if stage_engine_fired < stage_num:
-                    time_engine_firing = self.time_between_stages(stage_engine_fired, stage_num, loc = loc)
-                    thurst, isp = self.calculate_group_performance(check_stage, loc = loc)
-                    mass_flow = thurst/(isp*9.81)
-                    mass_loss = mass_flow * time_engine_firing
-                    self.check_mass_lost(check_stage, mass_loss)
-                    total_mass_lost += mass_loss
+        if stage_num >= self.num_stages():
+            return 0.0 # nothing is left attached after the last stage
+        total_mass_lost = self.timeline(loc = loc).get('total_prestage_mass_loss', stage_num)
         return total_mass_lost
 
     # rocket mass lost at the end of an stage is equivalent to the mass lost at the start of the next
@@ -797,7 +1634,7 @@ class Rocket:
         upper_mass = sum([stage.calculate_full_mass() for stage in self.stages[(stage_num+1):]]) + self.payload
         return upper_mass
 
-    def calculate_stage_dV(self, stage_num,loc='atm'):
+    def calculate_stage_dV(self, stage_num,loc='atm', pressure=None, altitude=None):
         """
         Calculates the delta-V present in a single stage. 
 
@@ -807,21 +1644,26 @@ class Rocket:
                 Stage to be analyzed.
             loc - `{'atm', 'vac'}`
                 Location where the method will be performed.
+            pressure - `float/array`
+                Pressure where the method will be performed [atm], instead of loc. Requires NumPy.
+            altitude - `float/array`
+                Altitude on Kerbin where the method will be performed [m], instead of loc. Requires NumPy.
 
         Return
             ----------
-            dV - `float`
-                Delta V of the stage [m/s].            
+            dV - `float/array`
+                Delta V of the stage [m/s]. An array if pressure or altitude is an array, NaN where the rocket cannot
+                be evaluated.
 
-        """
-        _loc_check(loc)
-        upper_mass = self.calculate_upper_mass(stage_num)
-        total_mass = self.stages[stage_num].calculate_full_mass() + upper_mass - self.total_prestage_mass_loss(stage_num, loc = loc)
-        empty_mass = self.stages[stage_num].calculate_empty_mass() + upper_mass - self.total_poststage_mass_loss(stage_num, loc = loc)
+        Example
+            -------
+            >>> rocket.calculate_stage_dV(0, altitude=np.linspace(0, 70000, 71))
 
-        isp = self.calculate_isp(stage_num, loc = loc)
-        dV = log(total_mass/empty_mass)*isp*9.81
-        return dV
+        """
+        if pressure is not None or altitude is not None:
+            from KSPython.Atmosphere import _profile
+            return _profile(self, stage_num, lambda batch: batch.calculate_stage_dV('atm'), pressure, altitude)
+        return self.timeline(loc = loc).get('stage_dV', stage_num)
 
     def calculate_dV(self,loc='atm'):
         """
@@ -838,10 +1680,9 @@ class Rocket:
                 Delta V of the rocket [m/s].            
 
         """
-        _loc_check(loc)
-        dV = 0
-        for i,stage in enumerate(self.stages):
-            dV += self.calculate_stage_dV(i,loc = loc)
+        timeline = self.timeline(loc = loc)
+        timeline.check()
+        dV = sum(timeline.stage_dV)
         return dV
 
     def adjusted_dV(self, dV_out=2500): # dV_out - delta V to exit atmosphere, 2500 is kerbins
@@ -862,9 +1703,218 @@ class Rocket:
         """
         dV_atm = self.calculate_dV(loc = 'atm')
         dV_vac = self.calculate_dV(loc = 'vac')
-        dV_adj = ((dV_atm - dV_out)/dV_atm)*dV_vac + dV_out
+        dV_adj = _adjusted_dV(dV_atm, dV_vac, dV_out)
         return dV_adj
 
+    def sweep(self, payload=None, extra_mass=None, grid=False, g=9.81):
+        """
+        Evaluates the rocket for arrays of payloads and stage extra masses in a single call. Requires NumPy.
+
+        Parameters
+            ----------
+            payload - `float/array`
+                Payloads to be evaluated [ton]. Defaults to the current payload.
+            extra_mass - `dict`
+                Extra mass to be added on top of each stage {stage_num: float/array} [ton].
+            grid - `bool`
+                If True, every combination of the parameters is evaluated. Otherwise they are broadcast together.
+            g - `float`
+                Gravity (default for Kerbin).
+
+        Return
+            ----------
+            result - `SweepResult`
+                Delta V, TWR and burn time of every stage for every evaluated point.
+
+        Example
+            -------
+            >>> result = rocket.sweep(payload=range(250))
+            >>> dVs = result.adjusted_dV()
+
+        """
+        from KSPython.Sweep import sweep
+        return sweep(self, payload=payload, extra_mass=extra_mass, grid=grid, g=g)
+
+    def sensitivities(self, parameters=None, g=9.81, dV_out=2500):
+        """
+        Evaluates the rocket and the derivatives of its delta V, TWR and burn times with respect to design parameters,
+        in a single pass. Requires NumPy.
+
+        Parameters
+            ----------
+            parameters - `list`
+                Design parameters: 'payload', ('extra_mass', stage_num) and ('parts', stage_num, part), as described in
+                KSPython.Sensitivity. Defaults to the payload, the extra mass of every stage and every part count.
+            g - `float`
+                Gravity (default for Kerbin).
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+
+        Return
+            ----------
+            result - `SensitivityResult`
+                Values and derivatives of the rocket.
+
+        Example
+            -------
+            >>> result = rocket.sensitivities(parameters=['payload', ('parts', 0, 'FLT800')])
+            >>> result.derivative('adjusted_dV', ('parts', 0, 'FLT800'))
+
+        """
+        from KSPython.Sensitivity import sensitivities
+        return sensitivities(self, parameters=parameters, g=g, dV_out=dV_out)
+
+    def max_payload(self, target_dV, min_twr=None, loc=None, dV_out=2500, g=9.81):
+        """
+        Finds the largest payload the rocket can carry while keeping a target delta-V and a minimum TWR. The current
+        payload is not used nor changed. Requires NumPy.
+
+        Parameters
+            ----------
+            target_dV - `int/float`
+                Delta V the rocket must keep [m/s].
+            min_twr - `float/dict`
+                Minimum thrust to weight ratio at liftoff, or at the start of each stage {stage_num: min_twr}.
+            loc - `{None, 'atm', 'vac'}`
+                Location of the target delta-V. Defaults to the adjusted delta-V, as given by adjusted_dV.
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+            g - `float`
+                Gravity (default for Kerbin).
+
+        Return
+            ----------
+            payload - `float`
+                Maximum payload [ton].
+
+        Example
+            -------
+            >>> rocket.max_payload(3400, min_twr=1.3)
+
+        """
+        from KSPython.Inverse import max_payload
+        return max_payload(self, target_dV, min_twr=min_twr, loc=loc, dV_out=dV_out, g=g)
+
+    def required_tanks(self, stage_num, tank, target_dV, loc=None, dV_out=2500, max_tanks=100):
+        """
+        Finds the smallest number of tanks to be added to a stage for the rocket to reach a target delta-V. The rocket
+        is not changed. Requires NumPy.
+
+        Parameters
+            ----------
+            stage_num - `int`
+                Stage the tanks are added to.
+            tank - `part/string`
+                Tank to be added, or its id in the default PartCatalog.
+            target_dV - `int/float`
+                Delta V to be reached [m/s].
+            loc - `{None, 'atm', 'vac'}`
+                Location of the target delta-V. Defaults to the adjusted delta-V, as given by adjusted_dV.
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+            max_tanks - `int`
+                Largest number of tanks that can be added.
+
+        Return
+            ----------
+            tanks - `int`
+                Number of tanks to be added, 0 if the rocket already reaches the target.
+
+        Example
+            -------
+            >>> rocket.required_tanks(0, 'FLT800', 3400)
+
+        """
+        from KSPython.Inverse import required_tanks
+        return required_tanks(self, stage_num, tank, target_dV, loc=loc, dV_out=dV_out, max_tanks=max_tanks)
+
+    def check_mission(self, mission):
+        """
+        Checks the rocket against a mission, assigning its burns to the stages in order.
+
+        Parameters
+            ----------
+            mission - `Mission`
+                Mission to be flown, from KSPython.Mission.
+
+        Return
+            ----------
+            result - `MissionCheck`
+                Whether the rocket flies the mission, its margin [m/s] and the burns of each stage.
+
+        Example
+            -------
+            >>> rocket.check_mission(Mission(['Kerbin surface', 'Mun surface', 'Kerbin surface'], aerobrake=True))
+
+        """
+        return mission.check(self)
+
+    def monte_carlo(self, num_samples, mass=None, thrust=None, isp=None, payload=None, parts=None, seed=None, g=9.81, dV_out=2500):
+        """
+        Evaluates the rocket for samples of part stats and payload drawn from distributions, in chunks of vectorized
+        evaluations with bounded memory. Requires NumPy.
+
+        Parameters
+            ----------
+            num_samples - `int`
+                Number of samples.
+            mass, thrust, isp - `distribution`
+                Factors of the mass of every part and of the thrust and ISP of every engine, such as
+                KSPython.MonteCarlo.normal(1, 0.02).
+            payload - `distribution`
+                Payload [ton]. Defaults to the payload of the rocket.
+            parts - `dict`
+                Distributions of single parts {part: {'mass': ..., 'thrust': ..., 'isp': ...}}.
+            seed - `int`
+                Seed of the random generator.
+            g - `float`
+                Gravity (default for Kerbin).
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+
+        Return
+            ----------
+            result - `MonteCarloResult`
+                Percentiles, means and standard deviations of delta V, TWR, burn time and mass.
+
+        Example
+            -------
+            >>> result = rocket.monte_carlo(100000, mass=normal(1, 0.02), payload=uniform(4, 6))
+            >>> result.interval('adjusted_dV', 0.9)
+
+        """
+        from KSPython.MonteCarlo import monte_carlo
+        return monte_carlo(self, num_samples, mass=mass, thrust=thrust, isp=isp, payload=payload, parts=parts, seed=seed,
+                           g=g, dV_out=dV_out)
+
+    def simulate_ascent(self, profile=None, dt=0.1, integrator='rk4', target_apoapsis=80000, **kwargs):
+        """
+        Simulates the ascent of the rocket to orbit step by step in time, with gravity, drag and staging events. Once
+        the apoapsis reaches the target the rocket coasts to it and circularizes, unless circularize=False is given.
+
+        Parameters
+            ----------
+            profile - `callable`
+                Pitch program, taking the altitude [m] and the surface speed [m/s] and returning the pitch above the
+                horizon [degrees]. Defaults to a gravity turn between 1 and 45 km.
+            dt - `float`
+                Time step [s].
+            integrator - `{'rk4', 'euler'}`
+                Integration method.
+            target_apoapsis - `float`
+                Engines are cut off once the apoapsis reaches this altitude [m].
+            kwargs
+                Passed to KSPython.Ascent.simulate_ascent, such as drag_area, body or circularize.
+
+        Return
+            ----------
+            result - `AscentResult`
+                Trajectory, staging events, final orbit and delta V losses.
+
+        """
+        from KSPython.Ascent import simulate_ascent
+        return simulate_ascent(self, profile=profile, dt=dt, integrator=integrator, target_apoapsis=target_apoapsis, **kwargs)
+
     def calculate_total_mass(self):
         """
         Total mass of the rocket full.
@@ -917,7 +1967,7 @@ class Rocket:
         thrust = sum(thrust_list)
         return thrust
 
-    def calculate_twr(self, stage_num,g=9.81,loc='atm'):
+    def calculate_twr(self, stage_num,g=9.81,loc='atm', pressure=None, altitude=None):
         """
         Calculates the thrust to weight ratio of the rocket for a given stage. 
 
@@ -929,19 +1979,56 @@ class Rocket:
                 Gravity (default for Kerbin).
             loc - `{'atm', 'vac'}`
                 Location where the method will be performed.
+            pressure - `float/array`
+                Pressure where the method will be performed [atm], instead of loc. Requires NumPy.
+            altitude - `float/array`
+                Altitude on Kerbin where the method will be performed [m], instead of loc. Requires NumPy.
 
         Return
             ----------
-            twr - `float`
-                Thrust to weight ratio.         
+            twr - `float/array`
+                Thrust to weight ratio. An array if pressure or altitude is an array, NaN where the rocket cannot be
+                evaluated.
 
         """
-        _loc_check(loc)
-        upper_mass = self.calculate_upper_mass(stage_num)
-        total_mass = self.stages[stage_num].calculate_full_mass() + upper_mass - self.total_prestage_mass_loss(stage_num, loc = loc)
-        thrust = self.calculate_thrust(stage_num, loc=loc)
-        twr = thrust/(g*total_mass)
-        return twr
+        if pressure is not None or altitude is not None:
+            from KSPython.Atmosphere import _profile
+            return _profile(self, stage_num, lambda batch: batch.calculate_twr(g, 'atm'), pressure, altitude)
+        return self.timeline(loc = loc).twr(stage_num, g=g)
+
+    def report(self, g=9.81, dV_out=2500):
+        """
+        Evaluates the rocket once and gathers its most important informations into a report.
+
+        Parameters
+            ----------
+            g - `float`
+                Gravity used for the thrust to weight ratios (default for Kerbin).
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+                    * 2500 - Kerbin
+
+        Return
+            ----------
+            report - `RocketReport`
+                Immutable report, that can be printed or exported to JSON and CSV.
+
+        """
+        from KSPython.Report import RocketReport, StageReport
+        timelines = {loc: self.timeline(loc = loc) for loc in ('atm', 'vac')}
+        mass = self.calculate_total_mass()
+        cost = self.calculate_total_cost()
+        dV = {}
+        for loc in ('atm', 'vac'):
+            timelines[loc].check()
+            dV[loc] = sum(timelines[loc].stage_dV)
+        stages = []
+        for i in range(self.num_stages()):
+            stages.append(StageReport(i, timelines['atm'].get('stage_dV', i), timelines['vac'].get('stage_dV', i),
+                                      timelines['atm'].twr(i, g=g), timelines['vac'].twr(i, g=g),
+                                      timelines['atm'].get('burn_time', i), timelines['vac'].get('burn_time', i)))
+        adjusted_dV = _adjusted_dV(dV['atm'], dV['vac'], dV_out)
+        return RocketReport(self.name, mass, cost, self.payload, adjusted_dV, dV['atm'], dV['vac'], g, dV_out, tuple(stages))
 
     def generate_report(self, g=9.81):
         """
@@ -953,37 +2040,43 @@ class Rocket:
                 Gravity (default for Kerbin).             
 
         """
-        print('')
-        print('--------------------------------------------')
-        print('ROCKET REPORT')
-        print('--------------------------------------------')
-        if not self.name is None:
-            print(f'Name: {self.name}')
-        print(f'Mass: {round(self.calculate_total_mass(),3)} Ton')
-        print(f'Cost: {self.calculate_total_cost()}')
-        if self.payload > 0:
-            print(f'Payload: {self.payload} Ton')
-        print(f'True Delta-V: {round(self.adjusted_dV(),2)} m/s')
-        print('Total vaccum dV: {} m/s'.format(round(self.calculate_dV(loc='vac'),2)))
-        print('Total atmospheric dV: {} m/s'.format(round(self.calculate_dV(loc = 'atm'),2)))
-        print('')
-        print('--------------------------------------------')
-        print('STAGES')
-        print('--------------------------------------------')
-        for i,stage in enumerate(self.stages):
-            print(f'Stage: {i}')
-            print('Delta-V: {} atm - {} vac [m/s]'.format(round(self.calculate_stage_dV(i, loc='atm'),2), round(self.calculate_stage_dV(i, loc='vac'),2)))
-            print('TWR: {} atm - {} vac'.format(round(self.calculate_twr(i,g=g, loc='atm'),2), round(self.calculate_twr(i,g=g, loc='vac'),2)))
-            print('Engine burn time: {} atm - {} vac [s]'.format(round(self.engine_burn_time(i, loc='atm'),2), round(self.engine_burn_time(i, loc='vac'),2)))
-            print('')
-        print('--------------------------------------------')
-        print('NOTES')
-        print('--------------------------------------------')
-        print('True delta-V is the total dV adjusted')
-        print('for when the craft leaves Kerbin.')
-        print(f'TWR calculation used g = {g} m/s².')
-        print('Engine burn time measured at full power.')
-        print('--------------------------------------------')
-        print('')
+        print(self.report(g=g).to_text())
 
+    def to_json(self, catalog=None):
+        """
+        Saves the design of the rocket as compact JSON, with parts referenced by their catalog id.
+
+        Parameters
+            ----------
+            catalog - `PartCatalog`
+                Catalog whose ids are used for the parts. Defaults to every part of the library.
 
+        Return
+            ----------
+            text - `string`
+                JSON of the design, on a single line.
+
+        """
+        from KSPython.Serialization import dumps
+        return dumps(self, catalog)
+
+    @classmethod
+    def from_json(cls, text, catalog=None):
+        """
+        Builds a rocket from the JSON given by to_json.
+
+        Parameters
+            ----------
+            text - `string`
+                JSON of the design.
+            catalog - `PartCatalog`
+                Catalog where the part ids are looked up. Defaults to every part of the library.
+
+        Return
+            ----------
+            rocket - `rocket`
+                Rebuilt rocket.
+
+        """
+        from KSPython.Serialization import loads
+        return loads(text, catalog)
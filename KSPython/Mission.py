@@ -0,0 +1,397 @@
+"""
+
+This submodule plans missions over the delta-V map of the Kerbol system, and checks rockets against them.
+
+The map is the community delta-V map of KSP 1.x, held as a graph of locations (surfaces, low orbits, captures and
+intercepts) linked by the delta-V between them [m/s]. Routes into a body with an atmosphere can be flown for free by
+aerobraking, and the worst case plane changes to reach each body can be added to its transfer.
+
+Shortest routes are found with Dijkstra's algorithm. The tree of every start location is computed once for each
+combination of options and cached, so each query afterwards is a lookup. A Mission keeps its burns, and checking a
+rocket only assigns them to its stages in order:
+
+* The first dV_out of a launch from Kerbin is flown in atmosphere, with the atmospheric delta-V of the stages, as
+  Rocket.adjusted_dV does. Every other burn uses the vacuum delta-V.
+* A stage can fly several burns, and a burn can be split across stages.
+
+Many designs are checked at once from the stage delta-V of a RocketBatch, which can be shared by every mission.
+
+Example
+    -------
+    >>> mission = Mission(['Kerbin surface', 'Duna low orbit', 'Kerbin surface'], aerobrake=True)
+    >>> mission.required_dV
+    >>> mission.check(rocket).margin
+
+"""
+
+from heapq import heappop, heappush
+
+from KSPython.KSPython import KerbalException, Rocket
+
+# routes of the map (outer location, inner location, dV [m/s], aerobraking possible from outer to inner)
+KERBOL_ROUTES = (
+    ('Kerbin low orbit', 'Kerbin surface', 3400, True),
+    ('Kerbin escape', 'Kerbin low orbit', 950, True),
+    ('Kerbin synchronous orbit', 'Kerbin low orbit', 1115, False),
+    ('Mun intercept', 'Kerbin low orbit', 860, True),
+    ('Mun intercept', 'Mun low orbit', 310, False),
+    ('Mun low orbit', 'Mun surface', 580, False),
+    ('Minmus intercept', 'Kerbin low orbit', 930, True),
+    ('Minmus intercept', 'Minmus low orbit', 160, False),
+    ('Minmus low orbit', 'Minmus surface', 180, False),
+    ('Moho intercept', 'Kerbin escape', 760, False),
+    ('Moho intercept', 'Moho low orbit', 2410, False),
+    ('Moho low orbit', 'Moho surface', 870, False),
+    ('Eve intercept', 'Kerbin escape', 90, False),
+    ('Eve intercept', 'Eve capture', 80, True),
+    ('Eve capture', 'Eve low orbit', 1330, True),
+    ('Eve low orbit', 'Eve surface', 8000, True),
+    ('Gilly intercept', 'Eve capture', 60, False),
+    ('Gilly intercept', 'Gilly low orbit', 410, False),
+    ('Gilly low orbit', 'Gilly surface', 30, False),
+    ('Duna intercept', 'Kerbin escape', 130, False),
+    ('Duna intercept', 'Duna capture', 250, True),
+    ('Duna capture', 'Duna low orbit', 360, True),
+    ('Duna low orbit', 'Duna surface', 1450, True),
+    ('Ike intercept', 'Duna capture', 30, False),
+    ('Ike intercept', 'Ike low orbit', 180, False),
+    ('Ike low orbit', 'Ike surface', 390, False),
+    ('Dres intercept', 'Kerbin escape', 610, False),
+    ('Dres intercept', 'Dres low orbit', 1290, False),
+    ('Dres low orbit', 'Dres surface', 430, False),
+    ('Jool intercept', 'Kerbin escape', 980, False),
+    ('Jool intercept', 'Jool capture', 160, True),
+    ('Jool capture', 'Jool low orbit', 2810, True),
+    ('Jool low orbit', 'Jool surface', 14000, True),
+    ('Laythe intercept', 'Jool capture', 930, False),
+    ('Laythe intercept', 'Laythe low orbit', 1070, True),
+    ('Laythe low orbit', 'Laythe surface', 2900, True),
+    ('Vall intercept', 'Jool capture', 620, False),
+    ('Vall intercept', 'Vall low orbit', 910, False),
+    ('Vall low orbit', 'Vall surface', 860, False),
+    ('Tylo intercept', 'Jool capture', 400, False),
+    ('Tylo intercept', 'Tylo low orbit', 1100, False),
+    ('Tylo low orbit', 'Tylo surface', 2270, False),
+    ('Bop intercept', 'Jool capture', 220, False),
+    ('Bop intercept', 'Bop low orbit', 900, False),
+    ('Bop low orbit', 'Bop surface', 230, False),
+    ('Pol intercept', 'Jool capture', 160, False),
+    ('Pol intercept', 'Pol low orbit', 820, False),
+    ('Pol low orbit', 'Pol surface', 130, False),
+    ('Eeloo intercept', 'Kerbin escape', 1140, False),
+    ('Eeloo intercept', 'Eeloo low orbit', 1370, False),
+    ('Eeloo low orbit', 'Eeloo surface', 620, False),
+)
+
+# worst case plane change of each transfer {(outer location, inner location): dV}, in both directions [m/s]
+KERBOL_PLANE_CHANGES = {
+    ('Minmus intercept', 'Kerbin low orbit'): 340,
+    ('Moho intercept', 'Kerbin escape'): 2520,
+    ('Eve intercept', 'Kerbin escape'): 430,
+    ('Duna intercept', 'Kerbin escape'): 10,
+    ('Dres intercept', 'Kerbin escape'): 1010,
+    ('Jool intercept', 'Kerbin escape'): 270,
+    ('Eeloo intercept', 'Kerbin escape'): 1330,
+}
+
+
+class DeltaVMap:
+    """Delta-V map, as a graph of locations, with cached shortest routes.
+
+    Parameters
+        ----------
+        routes - `list of tuples`
+            Routes of the map (outer location, inner location, dV, aerobrake), where aerobrake is True if the route
+            from the outer to the inner location can be flown by aerobraking [m/s]. Defaults to KERBOL_ROUTES.
+        plane_changes - `dict`
+            Plane change added to routes when requested {(outer location, inner location): dV} [m/s]. Defaults to
+            KERBOL_PLANE_CHANGES when routes are not given.
+
+    """
+    def __init__(self, routes=None, plane_changes=None):
+        if routes is None:
+            routes = KERBOL_ROUTES
+            plane_changes = KERBOL_PLANE_CHANGES if plane_changes is None else plane_changes
+        self.plane_changes = dict(plane_changes or {})
+        self._routes = {} # {location: [(location, dV, aerobrake, plane_change)]}
+        self._trees = {}
+        for route in routes:
+            self.add_route(*route)
+
+    def add_route(self, outer, inner, dV, aerobrake=False):
+        """
+        Adds a route between two locations, flown both ways.
+
+        Parameters
+            ----------
+            outer - `string`
+                Location further from the body.
+            inner - `string`
+                Location closer to the body, such as its surface or a lower orbit.
+            dV - `int/float`
+                Delta-V of the route [m/s].
+            aerobrake - `bool`
+                True if the route from the outer to the inner location can be flown by aerobraking.
+
+        """
+        if dV < 0:
+            raise KerbalException('Delta-V of a route can not be negative.')
+        plane_change = self.plane_changes.get((outer, inner), 0)
+        self._routes.setdefault(outer, []).append((inner, dV, aerobrake, plane_change))
+        self._routes.setdefault(inner, []).append((outer, dV, False, plane_change))
+        self._trees = {}
+
+    def locations(self):
+        """Every location of the map, in alphabetical order."""
+        return sorted(self._routes)
+
+    def _tree(self, start, aerobrake, plane_changes):
+        """Delta-V and previous location of the shortest route from start to every location, cached."""
+        key = (start, aerobrake, plane_changes)
+        tree = self._trees.get(key)
+        if tree is not None:
+            return tree
+        if start not in self._routes:
+            raise KerbalException(f'{start} is not a location of the map.')
+        dV = {start: 0.0}
+        previous = {start: None}
+        queue = [(0.0, start)]
+        while queue:
+            location_dV, location = heappop(queue)
+            if location_dV > dV[location]:
+                continue
+            for other, route_dV, route_aerobrake, plane_change in self._routes[location]:
+                if aerobrake and route_aerobrake:
+                    route_dV = 0.0
+                elif plane_changes:
+                    route_dV += plane_change
+                other_dV = location_dV + route_dV
+                if other_dV < dV.get(other, float('inf')):
+                    dV[other] = other_dV
+                    previous[other] = location
+                    heappush(queue, (other_dV, other))
+        tree = self._trees[key] = (dV, previous)
+        return tree
+
+    def route(self, start, end, aerobrake=False, plane_changes=False):
+        """
+        Shortest route between two locations.
+
+        Parameters
+            ----------
+            start - `string`
+                Start location.
+            end - `string`
+                End location.
+            aerobrake - `bool`
+                If True, routes into an atmosphere are flown by aerobraking, for free.
+            plane_changes - `bool`
+                If True, the worst case plane changes are added to the transfers.
+
+        Return
+            ----------
+            dV - `float`
+                Delta-V of the route [m/s].
+            locations - `list of strings`
+                Locations of the route, from start to end.
+
+        """
+        dV, previous = self._tree(start, aerobrake, plane_changes)
+        if end not in dV:
+            raise KerbalException(f'{end} can not be reached from {start}.')
+        locations = [end]
+        while previous[locations[-1]] is not None:
+            locations.append(previous[locations[-1]])
+        return dV[end], locations[::-1]
+
+    def required_dV(self, start, end, aerobrake=False, plane_changes=False):
+        """
+        Delta-V of the shortest route between two locations [m/s]. Parameters are the same as route.
+
+        """
+        dV, _ = self._tree(start, aerobrake, plane_changes)
+        if end not in dV:
+            raise KerbalException(f'{end} can not be reached from {start}.')
+        return dV[end]
+
+    def _burn(self, start, end, aerobrake, plane_changes):
+        """Delta-V of the route from start to end, which must be linked."""
+        for other, route_dV, route_aerobrake, plane_change in self._routes[start]:
+            if other == end:
+                if aerobrake and route_aerobrake:
+                    return 0.0
+                return route_dV + (plane_change if plane_changes else 0)
+        raise KerbalException(f'There is no route from {start} to {end}.')
+
+
+KERBOL_MAP = DeltaVMap()
+
+
+class MissionCheck:
+    """Result of checking a rocket against a mission.
+
+    Attributes
+        ----------
+        feasible - `bool`
+            True if the rocket flies every burn of the mission.
+        margin - `float`
+            Vacuum delta-V left after the mission, or delta-V missing to complete it when negative [m/s].
+        stages - `list of lists`
+            Burns flown by each stage, as (start, end, dV) with the delta-V of the burn flown by the stage [m/s].
+        unflown - `list of tuples`
+            Burns, or parts of them, that no stage could fly (start, end, dV) [m/s].
+
+    """
+    def __init__(self, feasible, margin, stages, unflown):
+        self.feasible = feasible
+        self.margin = margin
+        self.stages = stages
+        self.unflown = unflown
+
+    def __repr__(self):
+        return f'MissionCheck(feasible={self.feasible}, margin={self.margin})'
+
+
+class Mission:
+    """Mission through a list of locations, each reached from the last one by the shortest route.
+
+    Parameters
+        ----------
+        waypoints - `list of strings`
+            Locations of the mission in order, such as ['Kerbin surface', 'Duna low orbit', 'Kerbin surface'].
+        aerobrake - `bool`
+            If True, routes into an atmosphere are flown by aerobraking, for free.
+        plane_changes - `bool`
+            If True, the worst case plane changes are added to the transfers.
+        dV_map - `DeltaVMap`
+            Map of the mission. Defaults to KERBOL_MAP.
+        dV_out - `int/float`
+            Delta-V flown in atmosphere at a launch from Kerbin, as in Rocket.adjusted_dV [m/s].
+
+    Attributes
+        ----------
+        route - `list of strings`
+            Every location the mission goes through.
+        burns - `list of tuples`
+            Burns of the mission (start, end, dV), without the ones flown by aerobraking [m/s].
+        required_dV - `float`
+            Total delta-V of the mission [m/s].
+        atmospheric_dV - `float`
+            Delta-V of the first burn flown in atmosphere [m/s].
+
+    """
+    def __init__(self, waypoints, aerobrake=False, plane_changes=False, dV_map=None, dV_out=2500):
+        waypoints = list(waypoints)
+        if len(waypoints) < 2:
+            raise KerbalException('A mission needs at least two waypoints.')
+        dV_map = KERBOL_MAP if dV_map is None else dV_map
+        self.waypoints = waypoints
+        self.aerobrake = aerobrake
+        self.plane_changes = plane_changes
+        self.route = [waypoints[0]]
+        self.burns = []
+        for start, end in zip(waypoints[:-1], waypoints[1:]):
+            _, locations = dV_map.route(start, end, aerobrake=aerobrake, plane_changes=plane_changes)
+            for location in locations[1:]:
+                dV = dV_map._burn(self.route[-1], location, aerobrake, plane_changes)
+                if dV > 0:
+                    self.burns.append((self.route[-1], location, float(dV)))
+                self.route.append(location)
+        self.required_dV = float(sum(dV for _, _, dV in self.burns))
+        launch = self.burns and self.burns[0][0] == 'Kerbin surface'
+        self.atmospheric_dV = float(min(dV_out, self.burns[0][2])) if launch else 0.0
+
+    def __repr__(self):
+        return f'Mission({" -> ".join(self.waypoints)}, required_dV={self.required_dV})'
+
+    def check(self, rocket):
+        """
+        Checks a rocket against the mission, assigning its burns to the stages in order.
+
+        Parameters
+            ----------
+            rocket - `rocket`
+                Rocket to be checked.
+
+        Return
+            ----------
+            result - `MissionCheck`
+                Whether the rocket flies the mission, its margin and the burns of each stage.
+
+        """
+        if not isinstance(rocket, Rocket):
+            raise KerbalException('Only rockets can be checked against a mission.')
+        burns = [list(burn) for burn in self.burns]
+        atmospheric = self.atmospheric_dV
+        stages = []
+        left = 0.0
+        for stage_num in range(rocket.num_stages()):
+            dV_atm = rocket.calculate_stage_dV(stage_num, loc='atm')
+            dV_vac = rocket.calculate_stage_dV(stage_num, loc='vac')
+            fraction = 1.0 # of the stage not burned yet
+            flown = []
+            while burns and fraction > 0:
+                start, end, dV = burns[0]
+                # the atmospheric part is always the start of the first burn
+                stage_dV, needed = (dV_atm, atmospheric) if atmospheric > 0 else (dV_vac, dV)
+                capacity = fraction*stage_dV
+                used = min(needed, capacity)
+                fraction = 0.0 if used >= capacity else fraction - used/stage_dV
+                if atmospheric > 0:
+                    atmospheric -= used
+                if flown and flown[-1][:2] == (start, end):
+                    flown[-1] = (start, end, flown[-1][2] + used)
+                elif used > 0:
+                    flown.append((start, end, used))
+                burns[0][2] = dV - used
+                if burns[0][2] <= 0:
+                    burns.pop(0)
+            left += fraction*dV_vac
+            stages.append(flown)
+        unflown = [tuple(burn) for burn in burns]
+        missing = sum(dV for _, _, dV in unflown)
+        margin = left if not unflown else -missing
+        return MissionCheck(not unflown, margin, stages, unflown)
+
+    def check_designs(self, rockets):
+        """
+        Checks many designs against the mission at once. Requires NumPy.
+
+        Parameters
+            ----------
+            rockets - `list of rockets/RocketBatch`
+                Designs to be checked. A RocketBatch keeps its stage delta-V, so it can be checked against many
+                missions for the cost of one evaluation.
+
+        Return
+            ----------
+            feasible - `array of bool`
+                True for designs that fly every burn of the mission.
+            margin - `array`
+                Vacuum delta-V left after the mission, or delta-V missing to complete it when negative [m/s]. NaN for
+                designs that can not be evaluated.
+
+        """
+        import numpy as np
+        from KSPython.Batch import RocketBatch
+        batch = rockets if isinstance(rockets, RocketBatch) else RocketBatch.from_rockets(list(rockets))
+        dV_atm = batch.calculate_stage_dV(loc='atm')
+        dV_vac = batch.calculate_stage_dV(loc='vac')
+        vacuum_dV = self.required_dV - self.atmospheric_dV
+        total_vac = dV_vac.sum(axis=1)
+        if self.atmospheric_dV == 0:
+            margin = total_vac - vacuum_dV
+        else:
+            # stage where the rocket leaves the atmosphere, and the fraction of it burned until then
+            cumulative_atm = np.cumsum(dV_atm, axis=1)
+            total_atm = cumulative_atm[:, -1]
+            designs = np.arange(len(dV_atm))
+            stage_out = np.minimum(np.argmax(cumulative_atm >= self.atmospheric_dV, axis=1), dV_atm.shape[1] - 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraction = (self.atmospheric_dV - cumulative_atm[designs, stage_out] + dV_atm[designs, stage_out]) \
+                           / dV_atm[designs, stage_out]
+            vac_left = (1 - fraction)*dV_vac[designs, stage_out] + total_vac - np.cumsum(dV_vac, axis=1)[designs, stage_out]
+            margin = np.where(total_atm >= self.atmospheric_dV, vac_left - vacuum_dV,
+                              total_atm - self.atmospheric_dV - vacuum_dV)
+        margin = np.where(np.isnan(total_vac), np.nan, margin)
+        return margin >= 0, margin
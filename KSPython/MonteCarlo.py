@@ -0,0 +1,430 @@
+"""
+
+This submodule estimates how the performance of a rocket varies with uncertain part stats and payload, by Monte Carlo.
+
+Masses, thrust and ISP of every part, and the payload, are drawn from distributions given by the user. Every input of
+the staging model is linear in the stats of each part, so a sample is the rocket with a factor applied to the
+contributions of each part to its stages, and chunks of samples are evaluated at once by RocketBatch. All copies of a
+part share the same factors, as a rebalance would change them all.
+
+Samples are summarized as they are evaluated and then dropped, so memory is bounded by the chunk size however many
+samples are drawn. Means and standard deviations are exact, and percentiles come from a histogram of every quantity
+that widens as needed, with an error below the range of the samples over the number of bins.
+
+Example
+    -------
+    >>> result = monte_carlo(rocket, 100000, mass=normal(1, 0.02), isp=normal(1, 0.01), payload=uniform(4, 6))
+    >>> result.percentile('adjusted_dV', [5, 50, 95])
+    >>> result.interval('twr', 0.9, stage_num=0)
+
+"""
+
+import numpy as np
+
+from KSPython.KSPython import Engine, KerbalException, Part, Rocket, _adjusted_dV
+from KSPython.Batch import RocketBatch
+
+QUANTITIES = ('adjusted_dV', 'dV', 'stage_dV', 'twr', 'burn_time', 'total_mass')
+_PER_LOCATION = ('dV', 'stage_dV', 'twr', 'burn_time')
+_PER_STAGE = ('stage_dV', 'twr', 'burn_time')
+
+
+def normal(mean, std):
+    """Normal distribution, as taken by monte_carlo."""
+    return lambda rng, size: rng.normal(mean, std, size)
+
+
+def uniform(low, high):
+    """Uniform distribution between low and high, as taken by monte_carlo."""
+    return lambda rng, size: rng.uniform(low, high, size)
+
+
+def triangular(low, mode, high):
+    """Triangular distribution between low and high, peaking at mode, as taken by monte_carlo."""
+    return lambda rng, size: rng.triangular(low, mode, high, size)
+
+
+def _sampler(distribution, name):
+    """Distribution as a function of (rng, size), with numbers taken as constants."""
+    if distribution is None or callable(distribution):
+        return distribution
+    if isinstance(distribution, (int, float)):
+        return lambda rng, size: np.full(size, float(distribution))
+    raise KerbalException(f'{name} must be a number or a distribution, such as normal(1, 0.02).')
+
+
+class _Histogram:
+    """
+    Streaming histograms of many columns of samples, with exact means and standard deviations. The range of a column
+    is set by its first samples and doubled whenever later ones fall out of it, merging pairs of bins.
+
+    """
+    def __init__(self, num_columns, bins):
+        self.bins = bins
+        self.counts = np.zeros((num_columns, bins), dtype=np.int64)
+        self.low = np.zeros(num_columns)
+        self.width = np.zeros(num_columns) # of a bin, 0 until the first samples
+        self.count = 0
+        self.mean = np.zeros(num_columns)
+        self.m2 = np.zeros(num_columns) # sum of squared deviations from the mean
+        self.min = np.full(num_columns, np.inf)
+        self.max = np.full(num_columns, -np.inf)
+
+    def _widen(self, column, low, high):
+        """Doubles the range of a column until it holds [low, high]."""
+        counts = self.counts[column]
+        half = self.bins // 2
+        while low < self.low[column] or high >= self.low[column] + self.bins*self.width[column]:
+            merged = counts.reshape(half, 2).sum(axis=1)
+            counts[:] = 0
+            if low < self.low[column]:
+                counts[half:] = merged
+                self.low[column] -= self.bins*self.width[column]
+            else:
+                counts[:half] = merged
+            self.width[column] *= 2
+
+    def add(self, values):
+        """Adds samples, as an array of shape (num_samples, num_columns)."""
+        if not len(values):
+            return
+        low = values.min(axis=0)
+        high = values.max(axis=0)
+        for column in np.flatnonzero(self.width == 0):
+            span = max(high[column] - low[column], 1e-9*max(abs(low[column]), 1.0))
+            self.width[column] = 2*span/self.bins # room for later samples on both sides
+            self.low[column] = low[column] - span/2
+        for column in np.flatnonzero((low < self.low) | (high >= self.low + self.bins*self.width)):
+            self._widen(column, low[column], high[column])
+        index = np.clip(((values - self.low)/self.width).astype(np.int64), 0, self.bins - 1)
+        index += np.arange(values.shape[1])*self.bins
+        self.counts += np.bincount(index.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+        # merge means and squared deviations of both sets of samples
+        count = len(values)
+        mean = values.mean(axis=0)
+        delta = mean - self.mean
+        total = self.count + count
+        self.m2 += ((values - mean)**2).sum(axis=0) + delta**2*self.count*count/total
+        self.mean += delta*count/total
+        self.count = total
+        self.min = np.minimum(self.min, low)
+        self.max = np.maximum(self.max, high)
+
+    def percentile(self, column, q):
+        """Percentiles q of a column, interpolated within bins."""
+        counts = self.counts[column]
+        cumulative = np.cumsum(counts)
+        rank = np.asarray(q, dtype=float)/100*self.count
+        index = np.clip(np.searchsorted(cumulative, rank, side='left'), 0, self.bins - 1)
+        before = cumulative[index] - counts[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(counts[index] > 0, (rank - before)/counts[index], 0.0)
+        value = self.low[column] + (index + fraction)*self.width[column]
+        return np.clip(value, self.min[column], self.max[column])
+
+
+class MonteCarloResult:
+    """Summary of the Monte Carlo samples of a rocket.
+
+    Quantities are 'adjusted_dV', 'dV' and 'total_mass' of the rocket, and 'stage_dV', 'twr' and 'burn_time' of each
+    stage, as in Rocket. Samples that cannot be evaluated, such as a stage losing all its fuel before being staged, are
+    counted as failed and left out of every summary.
+
+    Attributes
+        ----------
+        num_samples - `int`
+            Number of samples evaluated so far.
+        num_failed - `int`
+            Number of samples that could not be evaluated.
+
+    """
+    def __init__(self, num_stages, bins, g, dV_out):
+        self.num_stages = num_stages
+        self.g = g
+        self.dV_out = dV_out
+        self.num_samples = 0
+        self.num_failed = 0
+        self._columns = {} # {(quantity, loc): columns of the histogram}
+        num_columns = 0
+        for quantity in QUANTITIES:
+            for loc in (('atm', 'vac') if quantity in _PER_LOCATION else (None,)):
+                width = num_stages if quantity in _PER_STAGE else 1
+                self._columns[(quantity, loc)] = slice(num_columns, num_columns + width)
+                num_columns += width
+        self._histogram = _Histogram(num_columns, bins)
+
+    def __repr__(self):
+        return f'MonteCarloResult(num_samples={self.num_samples}, num_failed={self.num_failed})'
+
+    def _add(self, batch):
+        values = np.empty((batch.num_designs(), self._histogram.counts.shape[0]))
+        for loc in ('atm', 'vac'):
+            stage_dV = batch.calculate_stage_dV(loc)
+            values[:, self._columns[('stage_dV', loc)]] = stage_dV
+            values[:, self._columns[('dV', loc)]] = stage_dV.sum(axis=1, keepdims=True)
+            values[:, self._columns[('twr', loc)]] = batch.calculate_twr(self.g, loc)
+            values[:, self._columns[('burn_time', loc)]] = batch.engine_burn_time(loc)
+        dV_atm = values[:, self._columns[('dV', 'atm')]]
+        dV_vac = values[:, self._columns[('dV', 'vac')]]
+        values[:, self._columns[('adjusted_dV', None)]] = _adjusted_dV(dV_atm, dV_vac, self.dV_out)
+        values[:, self._columns[('total_mass', None)]] = batch.calculate_total_mass()[:, None]
+        valid = np.isfinite(values).all(axis=1)
+        self._histogram.add(values[valid])
+        self.num_samples += len(values)
+        self.num_failed += int((~valid).sum())
+
+    def _column(self, quantity, loc, stage_num):
+        if quantity not in QUANTITIES:
+            raise KerbalException(f'Quantity must be one of {QUANTITIES}.')
+        if quantity in _PER_LOCATION:
+            loc = _loc(loc)
+        columns = self._columns[(quantity, loc if quantity in _PER_LOCATION else None)]
+        if quantity not in _PER_STAGE:
+            return columns.start
+        if stage_num is None:
+            return np.arange(columns.start, columns.stop)
+        if not 0 <= stage_num < self.num_stages:
+            raise KerbalException(f'Stage {stage_num} is not part of the rocket.')
+        return columns.start + stage_num
+
+    def _summary(self, values, column):
+        if self._histogram.count == 0:
+            raise KerbalException('No sample could be evaluated.')
+        value = values[column]
+        return float(value) if np.ndim(value) == 0 else value
+
+    def percentile(self, quantity, q, loc='atm', stage_num=None):
+        """
+        Percentiles of a quantity over the samples.
+
+        Parameters
+            ----------
+            quantity - `string`
+                One of QUANTITIES.
+            q - `float/list`
+                Percentiles, between 0 and 100.
+            loc - `{'atm', 'vac'}`
+                Location of delta V, TWR and burn time.
+            stage_num - `int`
+                Stage of per stage quantities. Defaults to every stage.
+
+        Return
+            ----------
+            value - `float/array`
+                Percentiles of the quantity, with one entry per percentile followed by one per stage if several are
+                returned.
+
+        """
+        column = self._column(quantity, loc, stage_num)
+        if self._histogram.count == 0:
+            raise KerbalException('No sample could be evaluated.')
+        if np.any((np.asarray(q) < 0) | (np.asarray(q) > 100)):
+            raise KerbalException('Percentiles must be between 0 and 100.')
+        if np.ndim(column) == 0:
+            value = self._histogram.percentile(column, q)
+        else:
+            value = np.stack([self._histogram.percentile(index, q) for index in column], axis=-1)
+        return float(value) if np.ndim(value) == 0 else value
+
+    def interval(self, quantity, level=0.9, loc='atm', stage_num=None):
+        """
+        Central interval holding a fraction of the samples of a quantity.
+
+        Parameters
+            ----------
+            quantity - `string`
+                One of QUANTITIES.
+            level - `float`
+                Fraction of the samples inside the interval.
+            loc - `{'atm', 'vac'}`
+                Location of delta V, TWR and burn time.
+            stage_num - `int`
+                Stage of per stage quantities. Defaults to every stage.
+
+        Return
+            ----------
+            low, high - `float/array`
+                Bounds of the interval.
+
+        """
+        if not 0 <= level <= 1:
+            raise KerbalException('Level must be between 0 and 1.')
+        tail = 50*(1 - level)
+        low, high = self.percentile(quantity, [tail, 100 - tail], loc=loc, stage_num=stage_num)
+        if np.ndim(low) == 0:
+            return float(low), float(high)
+        return low, high
+
+    def mean(self, quantity, loc='atm', stage_num=None):
+        """Mean of a quantity over the samples. Parameters are the same as percentile."""
+        return self._summary(self._histogram.mean, self._column(quantity, loc, stage_num))
+
+    def std(self, quantity, loc='atm', stage_num=None):
+        """Standard deviation of a quantity over the samples. Parameters are the same as percentile."""
+        return self._summary(np.sqrt(self._histogram.m2/self._histogram.count), self._column(quantity, loc, stage_num))
+
+    def min(self, quantity, loc='atm', stage_num=None):
+        """Smallest value of a quantity over the samples. Parameters are the same as percentile."""
+        return self._summary(self._histogram.min, self._column(quantity, loc, stage_num))
+
+    def max(self, quantity, loc='atm', stage_num=None):
+        """Largest value of a quantity over the samples. Parameters are the same as percentile."""
+        return self._summary(self._histogram.max, self._column(quantity, loc, stage_num))
+
+
+def _loc(loc):
+    if loc not in ('atm', 'vac'):
+        raise KerbalException("Location must be 'atm' or 'vac'.")
+    return loc
+
+
+def _contributions(rocket):
+    """Parts of the rocket, and the contribution of each one to the batch inputs of every stage."""
+    parts = []
+    for stage in rocket.stages:
+        for part in stage.part_counts:
+            if part not in parts:
+                parts.append(part)
+    shape = (len(parts), rocket.num_stages())
+    contributions = {'full_mass': np.zeros(shape), 'empty_mass': np.zeros(shape),
+                     'thrust': {'atm': np.zeros(shape), 'vac': np.zeros(shape)},
+                     'relative_isp': {'atm': np.zeros(shape), 'vac': np.zeros(shape)}}
+    for stage_num, stage in enumerate(rocket.stages):
+        for part, count in stage.part_counts.items():
+            index = parts.index(part)
+            contributions['full_mass'][index, stage_num] = count*part.mass
+            contributions['empty_mass'][index, stage_num] = count*getattr(part, 'mass_empty', part.mass)
+            if isinstance(part, Engine):
+                for loc in ('atm', 'vac'):
+                    thrust = getattr(part, f'thrust_{loc}')
+                    contributions['thrust'][loc][index, stage_num] = count*thrust
+                    contributions['relative_isp'][loc][index, stage_num] = count*thrust/getattr(part, f'isp_{loc}')
+    return parts, contributions
+
+
+def monte_carlo_stream(rocket, num_samples, mass=None, thrust=None, isp=None, payload=None, parts=None,
+                       chunk_size=10000, bins=2048, seed=None, g=9.81, dV_out=2500):
+    """
+    Evaluates Monte Carlo samples of a rocket chunk by chunk, yielding the summary of every sample so far after each
+    chunk. Parameters are the same as monte_carlo.
+
+    Return
+        ----------
+        results - `generator`
+            The same MonteCarloResult after each chunk, updated with its samples.
+
+    Example
+        -------
+        >>> for result in monte_carlo_stream(rocket, 10**7, mass=normal(1, 0.02)):
+        ...     print(result.num_samples, result.interval('adjusted_dV'))
+
+    """
+    if not isinstance(rocket, Rocket):
+        raise KerbalException('Only rockets can be sampled.')
+    if int(chunk_size) < 1:
+        raise KerbalException('Chunk size must be at least 1.')
+    if int(bins) < 2 or int(bins) % 2:
+        raise KerbalException('Number of bins must be even and at least 2.')
+    rng = np.random.default_rng(seed)
+    rocket_parts, contributions = _contributions(rocket)
+
+    # distributions of the stats of each part, with parts given by id looked up in the default catalog
+    defaults = {'mass': _sampler(mass, 'mass'), 'thrust': _sampler(thrust, 'thrust'), 'isp': _sampler(isp, 'isp')}
+    samplers = {part: dict(defaults) for part in rocket_parts}
+    for part, stats in (parts or {}).items():
+        if isinstance(part, str):
+            from KSPython.Serialization import _catalog
+            part = _catalog(None).get(part)
+        if not isinstance(part, Part):
+            raise KerbalException('Parts must be given as parts or by their id in the default PartCatalog.')
+        if part not in samplers:
+            raise KerbalException(f'{part.name} is not part of the rocket.')
+        for stat, distribution in stats.items():
+            if stat not in defaults:
+                raise KerbalException(f"Stats of a part can only be 'mass', 'thrust' or 'isp', and not {stat}.")
+            samplers[part][stat] = _sampler(distribution, stat)
+    payload = _sampler(payload, 'payload')
+
+    base = RocketBatch.from_rockets([rocket])
+    num_stages = rocket.num_stages()
+    result = MonteCarloResult(num_stages, int(bins), g, dV_out)
+    remaining = int(num_samples)
+    while remaining > 0:
+        size = min(remaining, int(chunk_size))
+        remaining -= size
+        factors = {stat: np.ones((size, len(rocket_parts))) for stat in defaults}
+        for index, part in enumerate(rocket_parts):
+            for stat, sampler in samplers[part].items():
+                if sampler is not None:
+                    factors[stat][:, index] = sampler(rng, size)
+
+        def moved(values, contribution, factor):
+            return values + (factor - 1) @ contribution
+        mass_factor = factors['mass']
+        thrust_factor = factors['thrust']
+        relative_isp_factor = factors['thrust']/factors['isp']
+        batch = RocketBatch(moved(base.full_mass, contributions['full_mass'], mass_factor),
+                            moved(base.empty_mass, contributions['empty_mass'], mass_factor),
+                            np.broadcast_to(base.cost, (size, num_stages)),
+                            {loc: moved(base.thrust[loc], contributions['thrust'][loc], thrust_factor)
+                             for loc in ('atm', 'vac')},
+                            {loc: moved(base.relative_isp[loc], contributions['relative_isp'][loc], relative_isp_factor)
+                             for loc in ('atm', 'vac')},
+                            payload=np.broadcast_to(base.payload, (size,)) if payload is None else payload(rng, size),
+                            fire_stage=np.broadcast_to(base.fire_stage, (size, num_stages)),
+                            restricted=np.broadcast_to(base.restricted, (size, num_stages)),
+                            mask=np.broadcast_to(base.mask, (size, num_stages)))
+        result._add(batch)
+        yield result
+
+
+def monte_carlo(rocket, num_samples, mass=None, thrust=None, isp=None, payload=None, parts=None, chunk_size=10000,
+                bins=2048, seed=None, g=9.81, dV_out=2500):
+    """
+    Evaluates Monte Carlo samples of a rocket, with part stats and payload drawn from distributions.
+
+    Distributions are functions of a NumPy random generator and a number of samples, such as normal, uniform and
+    triangular, or numbers for constant values. Part stats are drawn as factors of their nominal values.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be sampled.
+        num_samples - `int`
+            Number of samples.
+        mass - `distribution`
+            Factor of the mass of every part, full and empty. Defaults to the nominal masses.
+        thrust - `distribution`
+            Factor of the thrust of every engine, in atmosphere and vacuum.
+        isp - `distribution`
+            Factor of the ISP of every engine, in atmosphere and vacuum.
+        payload - `distribution`
+            Payload [ton]. Defaults to the payload of the rocket.
+        parts - `dict`
+            Distributions of single parts, in place of the ones above {part: {'mass': ..., 'thrust': ..., 'isp': ...}}.
+            Parts can be given by their id in the default PartCatalog.
+        chunk_size - `int`
+            Number of samples evaluated at a time, which bounds the memory used.
+        bins - `int`
+            Number of bins of the histograms the percentiles are taken from.
+        seed - `int`
+            Seed of the random generator, for repeatable results.
+        g - `float`
+            Gravity used for the thrust to weight ratio (default for Kerbin).
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+
+    Return
+        ----------
+        result - `MonteCarloResult`
+            Percentiles, means and standard deviations of delta V, TWR, burn time and mass.
+
+    """
+    result = None
+    for result in monte_carlo_stream(rocket, num_samples, mass=mass, thrust=thrust, isp=isp, payload=payload,
+                                     parts=parts, chunk_size=chunk_size, bins=bins, seed=seed, g=g, dV_out=dV_out):
+        pass
+    if result is None:
+        raise KerbalException('At least one sample must be evaluated.')
+    return result
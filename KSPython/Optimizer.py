@@ -0,0 +1,354 @@
+"""
+
+This submodule searches the part catalogs for the cheapest (or lightest) rocket that meets a set of requirements.
+
+Rockets are built as a stack of stages, each stage being either liquid (a number of identical tanks and identical
+engines) or solid (a number of identical boosters). Stages are placed from the top, right below the payload, to the
+bottom, so the delta-V and TWR of every stage are known as soon as it is placed.
+
+The search is a branch-and-bound: stages are tried from cheapest to most expensive, and a branch is dropped as soon
+as it cannot beat the best rocket found, or cannot reach the required delta-V even at the ideal Tsiolkovsky limit
+with the best ISP available, or with the best single stage that is still affordable. Only rockets that pass these
+checks are fully evaluated.
+
+Note:
+
+* KR-1x2 "Twin-Boar" parts are left out of the default catalogs, since its engine and tank must be used together.
+
+Example
+    -------
+    >>> result = optimize(payload=5, min_dV=3400, min_liftoff_twr=1.3, max_stages=3)
+    >>> result.rocket.generate_report()
+
+"""
+
+from math import inf
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, Stage, Rocket, _adjusted_dV, _number_check
+from KSPython.Serialization import _catalog
+
+
+def _catalog_parts(kind, excluded=()):
+    catalog = _catalog(None) # built once and shared
+    return [catalog.get(part_id) for part_id in catalog.query_ids(kind=kind) if part_id not in excluded]
+
+
+def default_engines():
+    """Liquid engines from LiquidEngineParts, without the LV-N, which burns liquid fuel only and is not supported."""
+    return _catalog_parts('liquid', excluded=('KR12_e', 'LVN'))
+
+
+def default_tanks():
+    """Fuel tanks from RocketFuelTankParts."""
+    return _catalog_parts('tank', excluded=('KR12_ft',))
+
+
+def default_boosters():
+    """Solid boosters from BoosterParts."""
+    return _catalog_parts('solid')
+
+
+def _unique(parts, stats):
+    """Drops parts with exactly the same stats as a part already listed."""
+    seen = set()
+    unique = []
+    for part in parts:
+        key = stats(part)
+        if key not in seen:
+            seen.add(key)
+            unique.append(part)
+    return unique
+
+
+def stage_options(engines=None, tanks=None, boosters=None, engine_counts=(1, 2, 3, 4), tank_counts=(1, 2, 3, 4), booster_counts=(1, 2, 3, 4)):
+    """
+    Lists every stage that can be built from the catalogs.
+
+    A liquid stage holds a number of identical tanks and identical engines, a solid stage a number of identical boosters.
+
+    Parameters
+        ----------
+        engines - `list of LiquidEngine`
+            Engines to be used. Defaults to LiquidEngineParts.
+        tanks - `list of RocketFuelTank`
+            Fuel tanks to be used. Defaults to RocketFuelTankParts.
+        boosters - `list of SolidEngine`
+            Boosters to be used. Defaults to BoosterParts.
+        engine_counts - `list of int`
+            Number of engines allowed in a liquid stage.
+        tank_counts - `list of int`
+            Number of tanks allowed in a liquid stage.
+        booster_counts - `list of int`
+            Number of boosters allowed in a solid stage.
+
+    Return
+        ----------
+        options - `list of lists of parts`
+            Parts of each possible stage.
+
+    """
+    engines = default_engines() if engines is None else list(engines)
+    tanks = default_tanks() if tanks is None else list(tanks)
+    boosters = default_boosters() if boosters is None else list(boosters)
+    engines = _unique(engines, lambda part: (part.mass, part.cost, part.thrust_atm, part.thrust_vac, part.isp_atm, part.isp_vac))
+    tanks = _unique(tanks, lambda part: (part.mass, part.mass_empty, part.cost))
+    boosters = _unique(boosters, lambda part: (part.mass, part.mass_empty, part.cost, part.thrust_atm, part.thrust_vac, part.isp_atm, part.isp_vac))
+    options = []
+    for engine in engines:
+        for engine_count in engine_counts:
+            for tank in tanks:
+                for tank_count in tank_counts:
+                    options.append([tank]*tank_count + [engine]*engine_count)
+    for booster in boosters:
+        for booster_count in booster_counts:
+            options.append([booster]*booster_count)
+    return options
+
+
+class OptimizationResult:
+    """Result of a design search.
+
+    Attributes
+        ----------
+        rocket - `rocket`
+            Best rocket found, None if no rocket meets the requirements.
+        objective - `float`
+            Cost or mass of the best rocket.
+        adjusted_dV - `float`
+            True delta-V of the best rocket [m/s].
+        evaluated - `int`
+            Number of rockets fully evaluated.
+        pruned - `int`
+            Number of partial rockets discarded by the bounds or the TWR checks, without being evaluated.
+        explored - `int`
+            Number of partial rockets expanded during the search.
+
+    """
+    def __init__(self, rocket, objective, adjusted_dV, evaluated, pruned, explored):
+        self.rocket = rocket
+        self.objective = objective
+        self.adjusted_dV = adjusted_dV
+        self.evaluated = evaluated
+        self.pruned = pruned
+        self.explored = explored
+
+    def __repr__(self):
+        return (f'OptimizationResult(objective={self.objective}, adjusted_dV={self.adjusted_dV}, '
+                f'evaluated={self.evaluated}, pruned={self.pruned}, explored={self.explored})')
+
+
+def _pareto_front(stats):
+    """Indices of the rows not dominated by any other row, lower values being better. Only the first of equal rows is kept."""
+    order = np.lexsort(stats.T[::-1]) # a row can only be dominated by the rows sorted before it
+    stats = stats[order]
+    keep = np.ones(len(stats), dtype=bool)
+    for row in range(len(stats)):
+        if not keep[row]:
+            continue
+        rest = stats[(row+1):]
+        dominated = keep[(row+1):].copy()
+        for column in range(stats.shape[1]):
+            dominated &= stats[row, column] <= rest[:, column]
+        keep[(row+1):] &= ~dominated
+    return np.sort(order[keep])
+
+
+def _adjusted(dV_atm, dV_vac, dV_out):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _adjusted_dV(dV_atm, dV_vac, dV_out)
+
+
+class _Search:
+    """Depth first branch-and-bound over stacks of stage options."""
+
+    def __init__(self, options, payload, min_dV, min_twr, min_liftoff_twr, max_stages, objective, stage_extra_mass, stage_extra_cost, dV_out):
+        self.payload = payload
+        self.min_dV = min_dV
+        self.min_twr = min_twr
+        self.min_liftoff_twr = min_liftoff_twr
+        self.max_stages = max_stages
+        self.objective = objective
+        self.stage_extra_mass = stage_extra_mass
+        self.stage_extra_cost = stage_extra_cost
+        self.dV_out = dV_out
+
+        stages = []
+        for parts in options:
+            stage = Stage()
+            stage.add_parts(parts)
+            stage.add_extra_mass(stage_extra_mass)
+            stage.add_extra_cost(stage_extra_cost)
+            if stage._relative_isp_atm > 0:
+                stages.append(stage)
+        if not stages:
+            raise KerbalException('No stage with engines can be built from the catalogs.')
+        full_mass = np.array([stage.calculate_full_mass() for stage in stages])
+        empty_mass = np.array([stage.calculate_empty_mass() for stage in stages])
+        cost = np.array([stage.calculate_cost() for stage in stages])
+        totals = {loc: np.array([stage._engine_totals(loc) for stage in stages]).reshape(len(stages), 2) for loc in ('atm', 'vac')}
+        thrust = {loc: totals[loc][:, 0] for loc in ('atm', 'vac')}
+        isp = {loc: totals[loc][:, 0] / totals[loc][:, 1] for loc in ('atm', 'vac')}
+        value = cost if objective == 'cost' else full_mass
+
+        # An option is never worth using if another one is cheaper, lighter, carries more fuel and has more
+        # thrust and ISP. Sorting by objective lets the search stop as soon as options get too expensive.
+        keep = _pareto_front(np.column_stack([value, full_mass, empty_mass - full_mass,
+                                              -thrust['atm'], -thrust['vac'], -isp['atm'], -isp['vac']]))
+        order = keep[np.argsort(value[keep], kind='stable')]
+        self.stages = [stages[i] for i in order]
+        self.full_mass = full_mass[order]
+        self.empty_mass = empty_mass[order]
+        self.value = value[order]
+        self.thrust = {loc: thrust[loc][order] for loc in thrust}
+        self.isp = {loc: isp[loc][order] for loc in isp}
+
+        # Ideal limits used as bounds, for the options affordable up to each position of the sorted list:
+        # best vacuum ISP and most fuel in a single stage. Fuel value is the lowest objective paid per ton of fuel.
+        fuel = self.full_mass - self.empty_mass
+        self.max_isp = np.maximum.accumulate(self.isp['vac'])
+        self.max_fuel = np.maximum.accumulate(fuel)
+        with np.errstate(divide='ignore'):
+            self.fuel_value = (self.value / fuel)[fuel > 0].min() if np.any(fuel > 0) else inf
+
+        # Best single stage delta-V for each affordable position and upper mass of a grid, leaving out the options
+        # without enough thrust. Stages further down carry more mass, so none can do better than this value taken
+        # at the grid point right below the current upper mass.
+        self.upper_grid = np.concatenate([[0.0], np.geomspace(0.01, 1e5, 95)])
+        upper = self.upper_grid[np.newaxis, :]
+        start_mass = self.full_mass[:, np.newaxis] + upper
+        with np.errstate(divide='ignore', invalid='ignore'): # massless options with no upper mass
+            stage_dV = self.isp['vac'][:, np.newaxis] * 9.81 * np.log(start_mass/(self.empty_mass[:, np.newaxis] + upper))
+        stage_dV[self.thrust['vac'][:, np.newaxis]/(9.81*start_mass) < min_twr] = -inf
+        self.stage_dV_table = np.maximum.accumulate(stage_dV, axis=0)
+
+        self.best = inf
+        self.best_stack = None
+        self.evaluated = 0
+        self.pruned = 0
+        self.explored = 0
+
+    def _dV_bound(self, dV_vac, upper_mass, budget, stages_left):
+        """Highest vacuum delta-V stacks can reach with the stages and the objective budget left."""
+        affordable = np.searchsorted(self.value, budget, side='left') - 1
+        bound = np.where(affordable >= 0, dV_vac, -inf)
+        affordable = np.maximum(affordable, 0)
+        max_fuel = stages_left * self.max_fuel[affordable]
+        if self.fuel_value < inf:
+            max_fuel = np.minimum(max_fuel, np.maximum(budget, 0) / self.fuel_value)
+        ideal_dV = self.max_isp[affordable] * 9.81 * np.log1p(max_fuel/upper_mass)
+        grid = np.searchsorted(self.upper_grid, upper_mass, side='right') - 1
+        stage_dV = np.maximum(self.stage_dV_table[affordable, grid], 0)
+        return bound + np.minimum(stages_left * stage_dV, ideal_dV)
+
+    def _evaluate(self, stack):
+        """Full evaluation of a stack, returning the adjusted delta-V if it meets every requirement."""
+        self.evaluated += 1
+        rocket = _build_rocket([self.stages[i] for i in reversed(stack)], self.payload)
+        dV = rocket.adjusted_dV(dV_out=self.dV_out)
+        if dV < self.min_dV or rocket.calculate_twr(0, loc='atm') < self.min_liftoff_twr:
+            return None
+        for stage_num in range(rocket.num_stages()):
+            if rocket.calculate_twr(stage_num, loc='vac') < self.min_twr:
+                return None
+        return dV
+
+    def search(self, stack, upper_mass, value, dV_atm, dV_vac):
+        self.explored += 1
+        num_options = np.searchsorted(self.value, self.best - value, side='left')
+        self.pruned += len(self.value) - num_options
+        if num_options == 0:
+            return
+        option_value = value + self.value[:num_options]
+        full_mass = self.full_mass[:num_options]
+        start_mass = full_mass + upper_mass
+        mass_ratio = np.log(start_mass/(self.empty_mass[:num_options] + upper_mass))
+        new_atm = dV_atm + mass_ratio*self.isp['atm'][:num_options]*9.81
+        new_vac = dV_vac + mass_ratio*self.isp['vac'][:num_options]*9.81
+        twr_ok = self.thrust['vac'][:num_options]/(9.81*start_mass) >= self.min_twr
+        final = twr_ok & (_adjusted(new_atm, new_vac, self.dV_out) >= self.min_dV) & (
+            self.thrust['atm'][:num_options]/(9.81*start_mass) >= self.min_liftoff_twr)
+
+        # Options are sorted by objective, so the first one completing the rocket is the best at this point.
+        for option in np.flatnonzero(final):
+            if option_value[option] >= self.best:
+                break
+            new_stack = stack + [option]
+            if self._evaluate(new_stack) is not None:
+                self.best = option_value[option]
+                self.best_stack = new_stack
+                break
+
+        stages_left = self.max_stages - len(stack) - 1
+        if stages_left <= 0:
+            return
+        # stages below would only add to the objective of a completed rocket
+        expand = twr_ok & ~final & (option_value < self.best)
+        new_upper = upper_mass + full_mass
+        bound = self._dV_bound(new_vac, new_upper, self.best - option_value, stages_left)
+        expand &= bound >= self.min_dV
+        self.pruned += np.count_nonzero(~final) - np.count_nonzero(expand) # completed options are not pruned
+        for option in np.flatnonzero(expand):
+            if option_value[option] >= self.best:
+                self.pruned += 1
+                continue
+            self.search(stack + [option], new_upper[option], option_value[option], new_atm[option], new_vac[option])
+
+
+def _build_rocket(stages, payload, name=None):
+    rocket = Rocket(name)
+    rocket.add_stages(stages)
+    rocket.change_payload(payload)
+    return rocket
+
+
+def optimize(payload, min_dV, min_twr=0.0, min_liftoff_twr=1.0, max_stages=3, objective='cost', options=None,
+             stage_extra_mass=0.0, stage_extra_cost=0.0, dV_out=2500, **option_kwargs):
+    """
+    Finds the cheapest, or lightest, rocket that meets the requirements.
+
+    Parameters
+        ----------
+        payload - `int/float`
+            Payload carried by the rocket [ton].
+        min_dV - `int/float`
+            Minimum true delta-V, as given by Rocket.adjusted_dV [m/s].
+        min_twr - `int/float`
+            Minimum vacuum thrust to weight ratio at the start of every stage.
+        min_liftoff_twr - `int/float`
+            Minimum atmospheric thrust to weight ratio of the first stage.
+        max_stages - `int`
+            Maximum number of stages.
+        objective - `{'cost', 'mass'}`
+            Value to be minimized.
+        options - `list of lists of parts`
+            Stages that can be used. Defaults to every stage given by stage_options.
+        stage_extra_mass - `int/float`
+            Extra mass added to every stage, such as decouplers [ton].
+        stage_extra_cost - `int/float`
+            Extra cost added to every stage.
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere [m/s].
+        option_kwargs
+            Passed to stage_options when options is not given.
+
+    Return
+        ----------
+        result - `OptimizationResult`
+            Best rocket found and search statistics.
+
+    """
+    if objective not in ('cost', 'mass'):
+        raise KerbalException(f"objective can only be 'cost' or 'mass', and not {objective}.")
+    payload = _number_check(payload)
+    if options is None:
+        options = stage_options(**option_kwargs)
+    search = _Search(options, payload, _number_check(min_dV), _number_check(min_twr), _number_check(min_liftoff_twr),
+                     int(max_stages), objective, _number_check(stage_extra_mass), _number_check(stage_extra_cost), dV_out)
+    search.search([], payload, 0.0, 0.0, 0.0)
+    if search.best_stack is None:
+        return OptimizationResult(None, None, None, search.evaluated, search.pruned, search.explored)
+    rocket = _build_rocket([search.stages[i] for i in reversed(search.best_stack)], payload)
+    return OptimizationResult(rocket, search.best, rocket.adjusted_dV(dV_out=dV_out),
+                              search.evaluated, search.pruned, search.explored)
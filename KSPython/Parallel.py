@@ -0,0 +1,231 @@
+"""
+
+This submodule evaluates large lists of rocket designs on several processes.
+
+Designs are packed into the numeric arrays of a RocketBatch and placed in a single shared memory block. Worker
+processes only receive the name of the block and the range of designs to evaluate, run the vectorized kernels of
+RocketBatch on their slice and write the results in place into a second shared block, so no Rocket, Stage or Part
+objects are ever pickled.
+
+Example
+    -------
+    >>> result = evaluate(rockets, workers=4, chunk_size=5000)
+    >>> result.adjusted_dV()
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, _adjusted_dV
+from KSPython.Batch import RocketBatch
+
+
+class EvaluationResult:
+    """Results of a parallel evaluation.
+
+    Per stage values have shape (num_designs, max_stages), as in RocketBatch. Invalid designs have NaN results.
+
+    Attributes
+        ----------
+        valid - `dict of arrays`
+            True for designs that can be evaluated {loc: valid}.
+        stage_dV - `dict of arrays`
+            Delta V of each stage {loc: dV} [m/s].
+        twr - `dict of arrays`
+            Thrust to weight ratio at the start of each stage {loc: twr}.
+        burn_time - `dict of arrays`
+            Burn time of each stage {loc: burn_time} [s].
+
+    """
+    def __init__(self, valid, stage_dV, twr, burn_time):
+        self.valid = valid
+        self.stage_dV = stage_dV
+        self.twr = twr
+        self.burn_time = burn_time
+
+    def dV(self, loc='atm'):
+        """
+        Delta-V of every design.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of each design [m/s].
+
+        """
+        return self.stage_dV[loc].sum(axis=1)
+
+    def adjusted_dV(self, dV_out=2500):
+        """
+        True delta-V of every design, adjusted for leaving the atmosphere.
+
+        Parameters
+            ----------
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+                    * 2500 - Kerbin
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of each design [m/s].
+
+        """
+        dV_atm = self.dV('atm')
+        dV_vac = self.dV('vac')
+        return _adjusted_dV(dV_atm, dV_vac, dV_out)
+
+
+# name: (per stage, dtype)
+_INPUTS = {
+    'full_mass': (True, np.float64),
+    'empty_mass': (True, np.float64),
+    'cost': (True, np.float64),
+    'thrust_atm': (True, np.float64),
+    'thrust_vac': (True, np.float64),
+    'relative_isp_atm': (True, np.float64),
+    'relative_isp_vac': (True, np.float64),
+    'fire_stage': (True, np.int64),
+    'restricted': (True, np.bool_),
+    'mask': (True, np.bool_),
+    'payload': (False, np.float64),
+}
+_OUTPUTS = {}
+for _loc in ('atm', 'vac'):
+    _OUTPUTS.update({
+        f'valid_{_loc}': (False, np.bool_),
+        f'stage_dV_{_loc}': (True, np.float64),
+        f'twr_{_loc}': (True, np.float64),
+        f'burn_time_{_loc}': (True, np.float64),
+    })
+
+
+def _layout(fields, num_designs, max_stages):
+    """Offset, shape and dtype of every array of a shared block, each one aligned to 8 bytes."""
+    layout = {}
+    offset = 0
+    for name, (per_stage, dtype) in fields.items():
+        shape = (num_designs, max_stages) if per_stage else (num_designs,)
+        layout[name] = (offset, shape, np.dtype(dtype).str)
+        offset += -(-int(np.prod(shape))*np.dtype(dtype).itemsize // 8)*8
+    return layout, max(offset, 1)
+
+
+def _views(memory, layout):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()}
+
+
+def _evaluate_views(inputs, outputs, start, stop, g):
+    chunk = {name: array[start:stop] for name, array in inputs.items()}
+    batch = RocketBatch(chunk['full_mass'], chunk['empty_mass'], chunk['cost'],
+                        {loc: chunk[f'thrust_{loc}'] for loc in ('atm', 'vac')},
+                        {loc: chunk[f'relative_isp_{loc}'] for loc in ('atm', 'vac')},
+                        payload=chunk['payload'], fire_stage=chunk['fire_stage'],
+                        restricted=chunk['restricted'], mask=chunk['mask'])
+    for loc in ('atm', 'vac'):
+        outputs[f'valid_{loc}'][start:stop] = batch.valid(loc)
+        outputs[f'stage_dV_{loc}'][start:stop] = batch.calculate_stage_dV(loc)
+        outputs[f'twr_{loc}'][start:stop] = batch.calculate_twr(g=g, loc=loc)
+        outputs[f'burn_time_{loc}'][start:stop] = batch.engine_burn_time(loc)
+
+
+def _evaluate_chunk(input_name, input_layout, output_name, output_layout, start, stop, g):
+    """Worker entry point. Attaches to both shared blocks and evaluates designs start to stop."""
+    inputs = SharedMemory(name=input_name)
+    outputs = SharedMemory(name=output_name)
+    try:
+        _evaluate_views(_views(inputs, input_layout), _views(outputs, output_layout), start, stop, g)
+    finally:
+        inputs.close()
+        outputs.close()
+    return stop - start
+
+
+def evaluate(designs, workers=None, chunk_size=None, g=9.81):
+    """
+    Evaluates many rocket designs on a pool of processes.
+
+    Parameters
+        ----------
+        designs - `list of rockets/RocketBatch`
+            Designs to be evaluated.
+        workers - `int`
+            Number of worker processes. Defaults to the number of CPUs. With a single worker designs are evaluated
+            in the calling process.
+        chunk_size - `int`
+            Number of designs sent to a worker at a time. Defaults to a quarter of an even share per worker.
+        g - `float`
+            Gravity used for the thrust to weight ratio (default for Kerbin).
+
+    Return
+        ----------
+        result - `EvaluationResult`
+            Validity, delta V, TWR and burn time of every stage of every design, in the same order.
+
+    """
+    batch = designs if isinstance(designs, RocketBatch) else RocketBatch.from_rockets(designs)
+    num_designs, max_stages = batch.full_mass.shape
+    workers = (os.cpu_count() or 1) if workers is None else int(workers)
+    if workers < 1:
+        raise KerbalException('At least one worker is needed.')
+    if chunk_size is None:
+        chunk_size = max(1, -(-num_designs // (4*workers)))
+    elif int(chunk_size) < 1:
+        raise KerbalException('Chunk size must be at least 1.')
+    chunk_size = int(chunk_size)
+
+    input_layout, input_size = _layout(_INPUTS, num_designs, max_stages)
+    output_layout, output_size = _layout(_OUTPUTS, num_designs, max_stages)
+    inputs = SharedMemory(create=True, size=input_size)
+    try:
+        outputs = SharedMemory(create=True, size=output_size)
+        try:
+            _pack(batch, _views(inputs, input_layout))
+            chunks = [(start, min(start + chunk_size, num_designs)) for start in range(0, num_designs, chunk_size)]
+            args = (inputs.name, input_layout, outputs.name, output_layout)
+            if workers == 1 or len(chunks) <= 1:
+                for start, stop in chunks:
+                    _evaluate_chunk(*args, start, stop, g)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    for future in [executor.submit(_evaluate_chunk, *args, start, stop, g) for start, stop in chunks]:
+                        future.result()
+            result = _unpack(_views(outputs, output_layout))
+        finally:
+            outputs.close()
+            outputs.unlink()
+    finally:
+        inputs.close()
+        inputs.unlink()
+    return result
+
+
+def _pack(batch, arrays):
+    arrays['full_mass'][:] = batch.full_mass
+    arrays['empty_mass'][:] = batch.empty_mass
+    arrays['cost'][:] = batch.cost
+    for loc in ('atm', 'vac'):
+        arrays[f'thrust_{loc}'][:] = batch.thrust[loc]
+        arrays[f'relative_isp_{loc}'][:] = batch.relative_isp[loc]
+    arrays['fire_stage'][:] = batch.fire_stage
+    arrays['restricted'][:] = batch.restricted
+    arrays['mask'][:] = batch.mask
+    arrays['payload'][:] = batch.payload
+
+
+def _unpack(arrays):
+    """Copies the results out of the shared block, so that it can be released."""
+    return EvaluationResult({loc: arrays[f'valid_{loc}'].copy() for loc in ('atm', 'vac')},
+                            {loc: arrays[f'stage_dV_{loc}'].copy() for loc in ('atm', 'vac')},
+                            {loc: arrays[f'twr_{loc}'].copy() for loc in ('atm', 'vac')},
+                            {loc: arrays[f'burn_time_{loc}'].copy() for loc in ('atm', 'vac')})
@@ -0,0 +1,239 @@
+"""
+
+This submodule measures where the time goes when rockets are evaluated.
+
+Inside a profile context, every method of Stage, StagingTimeline and Rocket counts its calls, cumulative and self time
+and how deep it recursed. Methods are only wrapped while the context is open, so outside of it they run untouched and
+cost nothing extra.
+
+Example
+    -------
+    >>> with ksp.profile() as p:
+    ...     rocket.generate_report()
+    >>> print(p.table(limit=10))
+    >>> p.write_collapsed('rocket.folded') # flamegraph.pl rocket.folded > rocket.svg
+
+"""
+
+import functools
+import time
+from dataclasses import dataclass
+from types import FunctionType
+
+from KSPython.KSPython import KerbalException, Stage, StagingTimeline, Rocket
+
+INSTRUMENTED = (Stage, StagingTimeline, Rocket)
+
+SORT_KEYS = ('cumulative', 'self', 'calls', 'name')
+
+
+@dataclass
+class MethodStats:
+    """Measurements of a single method.
+
+    Attributes
+        ----------
+        name - `string`
+            Method name, as Class.method.
+        calls - `int`
+            Number of calls.
+        cumulative - `float`
+            Time spent in the method and everything it called [s]. Recursive calls are only counted once.
+        self_time - `float`
+            Time spent in the method itself, without the methods it called [s].
+        max_depth - `int`
+            Deepest recursion of the method, 1 if it never called itself.
+
+    """
+    name: str
+    calls: int = 0
+    cumulative: float = 0.0
+    self_time: float = 0.0
+    max_depth: int = 0
+
+
+class Profiler:
+    """Context that instruments methods while it is open. Profiles cannot be nested.
+
+    Parameters
+        ----------
+        classes - `list of classes`
+            Classes whose methods are measured. Defaults to Stage, StagingTimeline and Rocket.
+        clock - `callable`
+            Clock used for the times [s]. Defaults to time.perf_counter.
+
+    Attributes
+        ----------
+        stats - `dict`
+            Measurements of every method called {name: MethodStats}.
+        stacks - `dict`
+            Self time of every call stack {(outer, ..., inner): float} [s].
+
+    """
+    _active = None
+
+    def __init__(self, classes=INSTRUMENTED, clock=time.perf_counter):
+        self.classes = tuple(classes)
+        self.clock = clock
+        self.stats = {}
+        self.stacks = {}
+        self._originals = []
+        self._stack = []
+        self._children = []
+        self._depth = {}
+
+    def __enter__(self):
+        if Profiler._active is not None:
+            raise KerbalException('A profile is already running.')
+        Profiler._active = self
+        for cls in self.classes:
+            for attribute, value in list(vars(cls).items()):
+                if isinstance(value, FunctionType):
+                    self._originals.append((cls, attribute, value))
+                    setattr(cls, attribute, self._wrap(f'{cls.__name__}.{attribute}', value))
+        return self
+
+    def __exit__(self, *exc_info):
+        for cls, attribute, value in reversed(self._originals):
+            setattr(cls, attribute, value)
+        self._originals = []
+        Profiler._active = None
+        return False
+
+    def _wrap(self, name, function):
+        stats = self.stats
+        stacks = self.stacks
+        stack = self._stack
+        children = self._children
+        depth = self._depth
+        clock = self.clock
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if name not in stats:
+                stats[name] = MethodStats(name)
+                depth[name] = 0
+            method = stats[name]
+            method.calls += 1
+            depth[name] += 1
+            method.max_depth = max(method.max_depth, depth[name])
+            stack.append(name)
+            children.append(0.0)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                self_time = elapsed - children.pop()
+                key = tuple(stack)
+                stacks[key] = stacks.get(key, 0.0) + self_time
+                stack.pop()
+                if children:
+                    children[-1] += elapsed
+                method.self_time += self_time
+                depth[name] -= 1
+                if depth[name] == 0:
+                    method.cumulative += elapsed
+        return wrapper
+
+    def sorted_stats(self, sort_by='cumulative'):
+        """
+        Measurements of every method called, sorted.
+
+        Parameters
+            ----------
+            sort_by - `{'cumulative', 'self', 'calls', 'name'}`
+                Sorting key, from the highest value to the lowest except for name.
+
+        Return
+            ----------
+            stats - `list of MethodStats`
+                Measurements of each method.
+
+        """
+        if sort_by not in SORT_KEYS:
+            raise KerbalException(f'sort_by can only be one of {", ".join(SORT_KEYS)}, and not {sort_by}.')
+        if sort_by == 'name':
+            return sorted(self.stats.values(), key=lambda method: method.name)
+        attribute = 'self_time' if sort_by == 'self' else sort_by
+        return sorted(self.stats.values(), key=lambda method: getattr(method, attribute), reverse=True)
+
+    def table(self, sort_by='cumulative', limit=None):
+        """
+        Measurements as a text table.
+
+        Parameters
+            ----------
+            sort_by - `{'cumulative', 'self', 'calls', 'name'}`
+                Sorting key of the rows.
+            limit - `int`
+                Maximum number of rows.
+
+        Return
+            ----------
+            table - `string`
+                One row per method, with its calls, cumulative and self time [ms], time per call [µs] and depth.
+
+        """
+        rows = self.sorted_stats(sort_by)[:limit]
+        width = max([len(method.name) for method in rows] + [6]) + 2
+        lines = [f'{"method":<{width}}{"calls":>10}{"cumulative [ms]":>17}{"self [ms]":>12}{"per call [µs]":>15}{"depth":>7}']
+        for method in rows:
+            lines.append(f'{method.name:<{width}}{method.calls:>10}{method.cumulative*1e3:>17.3f}'
+                         f'{method.self_time*1e3:>12.3f}{method.cumulative/method.calls*1e6:>15.2f}{method.max_depth:>7}')
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        """
+        Measurements as collapsed stacks, the input of flamegraph.pl, speedscope and similar tools.
+
+        Return
+            ----------
+            stacks - `string`
+                One line per call stack, as outer;...;inner followed by its self time [µs].
+
+        """
+        return ''.join(f'{";".join(stack)} {round(self_time*1e6)}\n' for stack, self_time in self.stacks.items())
+
+    def write_collapsed(self, file):
+        """
+        Writes the collapsed stacks to a file.
+
+        Parameters
+            ----------
+            file - `string/file`
+                Path or open file where the stacks are written.
+
+        """
+        if hasattr(file, 'write'):
+            file.write(self.collapsed())
+        else:
+            with open(file, 'w') as output:
+                output.write(self.collapsed())
+
+    def __str__(self):
+        return self.table()
+
+
+def profile(classes=INSTRUMENTED):
+    """
+    Opens a profile of the methods of Stage, StagingTimeline and Rocket, to be used in a with statement.
+
+    Parameters
+        ----------
+        classes - `list of classes`
+            Classes whose methods are measured, such as RocketBatch. Defaults to Stage, StagingTimeline and Rocket.
+
+    Return
+        ----------
+        profiler - `Profiler`
+            Profile with the measurements taken inside the with statement.
+
+    Example
+        -------
+        >>> with ksp.profile() as p:
+        ...     rocket.adjusted_dV()
+        >>> print(p.table(sort_by='self'))
+
+    """
+    return Profiler(classes)
@@ -0,0 +1,230 @@
+"""
+
+This submodule holds the report of a rocket, as given by Rocket.report.
+
+A report is computed in a single evaluation of the rocket and cannot be changed afterwards. It can be printed with
+the same layout as Rocket.generate_report, or exported to JSON and CSV.
+
+Example
+    -------
+    >>> report = rocket.report()
+    >>> report.adjusted_dV
+    >>> print(report)
+    >>> report.to_json()
+
+"""
+
+import csv
+import io
+import json
+from dataclasses import dataclass, asdict, fields
+
+
+@dataclass(frozen=True)
+class StageReport:
+    """Report of a single stage.
+
+    Attributes
+        ----------
+        stage - `int`
+            Stage number.
+        dV_atm, dV_vac - `float`
+            Delta V of the stage [m/s].
+        twr_atm, twr_vac - `float`
+            Thrust to weight ratio at the start of the stage.
+        burn_time_atm, burn_time_vac - `float`
+            Burn time of the stage at full power [s].
+
+    """
+    stage: int
+    dV_atm: float
+    dV_vac: float
+    twr_atm: float
+    twr_vac: float
+    burn_time_atm: float
+    burn_time_vac: float
+
+
+@dataclass(frozen=True)
+class RocketReport:
+    """Report of a rocket.
+
+    Attributes
+        ----------
+        name - `string`
+            Name of the rocket.
+        mass - `float`
+            Total mass of the rocket, payload included [ton].
+        cost - `float`
+            Total cost of the rocket.
+        payload - `float`
+            Payload of the rocket [ton].
+        adjusted_dV - `float`
+            True delta V of the rocket, adjusted for leaving the atmosphere [m/s].
+        dV_atm, dV_vac - `float`
+            Total delta V of the rocket [m/s].
+        g - `float`
+            Gravity used for the thrust to weight ratios.
+        dV_out - `float`
+            Delta V required to leave the atmosphere, used for the adjusted delta V [m/s].
+        stages - `tuple of StageReport`
+            Report of each stage, from first to last.
+
+    """
+    name: str
+    mass: float
+    cost: float
+    payload: float
+    adjusted_dV: float
+    dV_atm: float
+    dV_vac: float
+    g: float
+    dV_out: float
+    stages: tuple
+
+    def to_dict(self):
+        """
+        Report as a dictionary, with the stages as a list of dictionaries.
+
+        Return
+            ----------
+            report - `dict`
+                Values of the report.
+
+        """
+        report = asdict(self)
+        report['stages'] = list(report['stages'])
+        return report
+
+    @classmethod
+    def from_dict(cls, report):
+        """
+        Rebuilds a report from the dictionary given by to_dict.
+
+        Parameters
+            ----------
+            report - `dict`
+                Values of the report.
+
+        Return
+            ----------
+            report - `RocketReport`
+                Rebuilt report.
+
+        """
+        report = dict(report)
+        report['stages'] = tuple(StageReport(**stage) for stage in report['stages'])
+        return cls(**report)
+
+    def to_json(self, **kwargs):
+        """
+        Report as a JSON string.
+
+        Parameters
+            ----------
+            kwargs
+                Passed to json.dumps, such as indent.
+
+        Return
+            ----------
+            report - `string`
+                JSON of the report.
+
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_json(cls, text):
+        """
+        Rebuilds a report from the JSON given by to_json.
+
+        Parameters
+            ----------
+            text - `string`
+                JSON of the report.
+
+        Return
+            ----------
+            report - `RocketReport`
+                Rebuilt report.
+
+        """
+        return cls.from_dict(json.loads(text))
+
+    def to_csv(self, file=None, header=True):
+        """
+        Report as CSV, one row per stage. Rocket values are repeated on every row, stage values are prefixed with
+        stage_ where their names clash.
+
+        Parameters
+            ----------
+            file - `file`
+                Open file where the rows are written. If not given, the CSV is returned as a string.
+            header - `bool`
+                If True, the column names are written first.
+
+        Return
+            ----------
+            report - `string`
+                CSV of the report, only if no file is given.
+
+        """
+        rocket_columns = [field.name for field in fields(self) if field.name not in ('g', 'dV_out', 'stages')]
+        stage_columns = [field.name for field in fields(StageReport)]
+        output = io.StringIO() if file is None else file
+        writer = csv.writer(output, lineterminator='\n')
+        if header:
+            writer.writerow(rocket_columns + [name if name.startswith('stage') or name not in rocket_columns else f'stage_{name}'
+                                              for name in stage_columns])
+        rocket_row = [getattr(self, name) for name in rocket_columns]
+        for stage in self.stages:
+            writer.writerow(rocket_row + [getattr(stage, name) for name in stage_columns])
+        if file is None:
+            return output.getvalue()
+
+    def to_text(self):
+        """
+        Report with the layout printed by Rocket.generate_report.
+
+        Return
+            ----------
+            report - `string`
+                Text of the report.
+
+        """
+        lines = ['',
+                 '--------------------------------------------',
+                 'ROCKET REPORT',
+                 '--------------------------------------------']
+        if not self.name is None:
+            lines.append(f'Name: {self.name}')
+        lines.append(f'Mass: {round(self.mass,3)} Ton')
+        lines.append(f'Cost: {self.cost}')
+        if self.payload > 0:
+            lines.append(f'Payload: {self.payload} Ton')
+        lines.append(f'True Delta-V: {round(self.adjusted_dV,2)} m/s')
+        lines.append('Total vaccum dV: {} m/s'.format(round(self.dV_vac,2)))
+        lines.append('Total atmospheric dV: {} m/s'.format(round(self.dV_atm,2)))
+        lines += ['',
+                  '--------------------------------------------',
+                  'STAGES',
+                  '--------------------------------------------']
+        for stage in self.stages:
+            lines.append(f'Stage: {stage.stage}')
+            lines.append('Delta-V: {} atm - {} vac [m/s]'.format(round(stage.dV_atm,2), round(stage.dV_vac,2)))
+            lines.append('TWR: {} atm - {} vac'.format(round(stage.twr_atm,2), round(stage.twr_vac,2)))
+            lines.append('Engine burn time: {} atm - {} vac [s]'.format(round(stage.burn_time_atm,2), round(stage.burn_time_vac,2)))
+            lines.append('')
+        lines += ['--------------------------------------------',
+                  'NOTES',
+                  '--------------------------------------------',
+                  'True delta-V is the total dV adjusted',
+                  'for when the craft leaves Kerbin.',
+                  f'TWR calculation used g = {self.g} m/s².',
+                  'Engine burn time measured at full power.',
+                  '--------------------------------------------',
+                  '']
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.to_text()
@@ -0,0 +1,230 @@
+"""
+
+This submodule computes the derivatives of delta V, TWR and burn times with respect to the design parameters.
+
+Derivatives are propagated in forward mode through the staging model of RocketBatch, together with the values and
+in the same evaluation, so the gradient with respect to every parameter costs about as much as a single evaluation,
+instead of two per parameter with finite differences. Design parameters are:
+
+* 'payload' - payload of the rocket [ton].
+* ('extra_mass', stage_num) - extra mass of a stage [ton].
+* ('parts', stage_num, part) - number of copies of a part in a stage, taken as continuous. The part can be given by
+  its id in the default PartCatalog, and does not need to be in the stage already.
+
+Staging is kept as it is: the engines firing in each stage, fuel flow restrictions and the stages losing fuel before
+staging do not change with the parameters, so derivatives are exact for any change small enough to keep them.
+
+Example
+    -------
+    >>> result = rocket.sensitivities(parameters=['payload', ('parts', 2, 'FLT800')])
+    >>> result.derivative('adjusted_dV', 'payload')
+    >>> result.derivative('dV', ('parts', 2, 'FLT800'), loc='vac')
+
+"""
+
+import numpy as np
+
+from KSPython.KSPython import Engine, KerbalException, Part, Rocket
+
+QUANTITIES = ('stage_dV', 'dV', 'adjusted_dV', 'twr', 'burn_time', 'total_mass', 'total_cost')
+_PER_LOCATION = ('stage_dV', 'dV', 'twr', 'burn_time')
+
+
+def _parameter(parameter):
+    """Parameter as a tuple, with parts looked up in the default catalog."""
+    if parameter == 'payload' or parameter == ('payload',):
+        return ('payload',)
+    if isinstance(parameter, (tuple, list)) and len(parameter) >= 2 and isinstance(parameter[1], (int, np.integer)):
+        if parameter[0] == 'extra_mass' and len(parameter) == 2:
+            return ('extra_mass', int(parameter[1]))
+        if parameter[0] == 'parts' and len(parameter) == 3:
+            part = parameter[2]
+            if isinstance(part, str):
+                from KSPython.Serialization import _catalog
+                part = _catalog(None).get(part)
+            if isinstance(part, Part):
+                return ('parts', int(parameter[1]), part)
+    raise KerbalException(f"Parameters can only be 'payload', ('extra_mass', stage_num) or ('parts', stage_num, part), "
+                          f"and not {parameter}.")
+
+
+def design_parameters(rockets):
+    """
+    Every design parameter of rockets: the payload, the extra mass of each stage and the count of each part in each
+    stage, in this order.
+
+    Parameters
+        ----------
+        rockets - `list of rockets`
+            Rockets whose parameters are listed. Stages and parts of all rockets are included, in the order they are
+            first found.
+
+    Return
+        ----------
+        parameters - `list`
+            Design parameters.
+
+    """
+    extra_mass = []
+    parts = {}
+    for rocket in rockets:
+        for stage_num, stage in enumerate(rocket.stages):
+            if ('extra_mass', stage_num) not in extra_mass:
+                extra_mass.append(('extra_mass', stage_num))
+            for part in stage.part_counts:
+                parts.setdefault(('parts', stage_num, part), None)
+    return [('payload',)] + extra_mass + sorted(parts, key=lambda parameter: parameter[1])
+
+
+def parameter_tangents(rockets, parameters, max_stages):
+    """
+    Derivatives of the batch inputs of rockets with respect to design parameters, as taken by RocketBatch.
+
+    Parameters
+        ----------
+        rockets - `list of rockets`
+            Rockets of the batch.
+        parameters - `list`
+            Design parameters.
+        max_stages - `int`
+            Number of stages of the batch.
+
+    Return
+        ----------
+        parameters - `list`
+            Design parameters as tuples, with parts looked up.
+        tangents - `dict`
+            Derivatives of full_mass, empty_mass, cost, thrust, relative_isp and payload, with the parameters as last
+            axis.
+
+    """
+    parameters = [_parameter(parameter) for parameter in parameters]
+    shape = (len(rockets), max_stages, len(parameters))
+    tangents = {'full_mass': np.zeros(shape), 'empty_mass': np.zeros(shape), 'cost': np.zeros(shape),
+                'thrust': {'atm': np.zeros(shape), 'vac': np.zeros(shape)},
+                'relative_isp': {'atm': np.zeros(shape), 'vac': np.zeros(shape)},
+                'payload': np.zeros((len(rockets), len(parameters)))}
+    for index, parameter in enumerate(parameters):
+        if parameter[0] == 'payload':
+            tangents['payload'][:, index] = 1.0
+            continue
+        stage_num = parameter[1]
+        if not 0 <= stage_num < max_stages:
+            raise KerbalException(f'Stage {stage_num} is not part of any rocket.')
+        stages = [design for design, rocket in enumerate(rockets) if stage_num < rocket.num_stages()]
+        if parameter[0] == 'extra_mass':
+            tangents['full_mass'][stages, stage_num, index] = 1.0
+            tangents['empty_mass'][stages, stage_num, index] = 1.0
+            continue
+        part = parameter[2]
+        tangents['full_mass'][stages, stage_num, index] = part.mass
+        tangents['empty_mass'][stages, stage_num, index] = getattr(part, 'mass_empty', part.mass)
+        tangents['cost'][stages, stage_num, index] = part.cost
+        if isinstance(part, Engine):
+            for loc in ('atm', 'vac'):
+                thrust = getattr(part, f'thrust_{loc}')
+                tangents['thrust'][loc][stages, stage_num, index] = thrust
+                tangents['relative_isp'][loc][stages, stage_num, index] = thrust/getattr(part, f'isp_{loc}')
+    return parameters, tangents
+
+
+class SensitivityResult:
+    """Values and derivatives of rocket designs with respect to their design parameters.
+
+    Derivatives have the same shape as the values, followed by an axis with one entry per parameter. When a list of
+    rockets is evaluated, every array has a first axis with one entry per design, and per stage arrays are padded at
+    the top with zeros as in RocketBatch. Designs that cannot be evaluated have NaN values and derivatives.
+
+    Attributes
+        ----------
+        parameters - `list`
+            Design parameters, in the order of the last axis of the derivatives.
+        values - `dict`
+            Value of each quantity, {quantity: {loc: value}} for stage_dV, dV, twr and burn_time, and
+            {quantity: value} for adjusted_dV, total_mass and total_cost.
+        gradients - `dict`
+            Derivatives of each quantity with respect to each parameter, with the same keys as values.
+
+    """
+    def __init__(self, parameters, values, gradients):
+        self.parameters = parameters
+        self.values = values
+        self.gradients = gradients
+
+    def _index(self, parameter):
+        parameter = _parameter(parameter)
+        if parameter not in self.parameters:
+            raise KerbalException(f'{parameter} is not one of the evaluated parameters. By default only the parts '
+                                  f'already in each stage are, others must be given in parameters.')
+        return self.parameters.index(parameter)
+
+    def derivative(self, quantity, parameter, loc='atm'):
+        """
+        Derivative of a quantity with respect to one parameter.
+
+        Parameters
+            ----------
+            quantity - `{'stage_dV', 'dV', 'adjusted_dV', 'twr', 'burn_time', 'total_mass', 'total_cost'}`
+                Quantity to be derived.
+            parameter - `string/tuple`
+                Evaluated design parameter.
+            loc - `{'atm', 'vac'}`
+                Location of the quantity. Not used by adjusted_dV, total_mass and total_cost.
+
+        Return
+            ----------
+            derivative - `float/array`
+                Derivative of the quantity, per stage for stage_dV, twr and burn_time.
+
+        """
+        if quantity not in QUANTITIES:
+            raise KerbalException(f'quantity can only be one of {", ".join(QUANTITIES)}, and not {quantity}.')
+        gradient = self.gradients[quantity]
+        if quantity in _PER_LOCATION:
+            gradient = gradient[loc]
+        return gradient[..., self._index(parameter)]
+
+
+def sensitivities(rockets, parameters=None, g=9.81, dV_out=2500):
+    """
+    Evaluates rockets and the derivatives of their delta V, TWR and burn times with respect to design parameters, in
+    a single pass.
+
+    Parameters
+        ----------
+        rockets - `rocket/list of rockets`
+            Rocket, or list of rockets evaluated as a batch.
+        parameters - `list`
+            Design parameters, as described in this submodule. Defaults to every parameter of the rockets.
+        g - `float`
+            Gravity used for the thrust to weight ratio (default for Kerbin).
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+
+    Return
+        ----------
+        result - `SensitivityResult`
+            Values and derivatives of every design.
+
+    """
+    from KSPython.Batch import RocketBatch
+    single = isinstance(rockets, Rocket)
+    rockets = [rockets] if single else list(rockets)
+    if parameters is None:
+        parameters = design_parameters(rockets)
+    batch = RocketBatch.from_rockets(rockets, parameters=parameters)
+
+    values = {'adjusted_dV': batch.adjusted_dV(dV_out=dV_out), 'total_mass': batch.calculate_total_mass(),
+              'total_cost': batch.calculate_total_cost()}
+    gradients = {quantity: batch.gradient(quantity, dV_out=dV_out) for quantity in values}
+    for quantity, method in zip(_PER_LOCATION, (batch.calculate_stage_dV, batch.calculate_dV,
+                                                lambda loc: batch.calculate_twr(g=g, loc=loc), batch.engine_burn_time)):
+        values[quantity] = {loc: method(loc=loc) for loc in ('atm', 'vac')}
+        gradients[quantity] = {loc: batch.gradient(quantity, loc=loc, g=g) for loc in ('atm', 'vac')}
+
+    if single:
+        def squeeze(value):
+            return {loc: squeeze(array) for loc, array in value.items()} if isinstance(value, dict) else value[0]
+        values = {quantity: squeeze(value) for quantity, value in values.items()}
+        gradients = {quantity: squeeze(value) for quantity, value in gradients.items()}
+    return SensitivityResult(batch.parameters, values, gradients)
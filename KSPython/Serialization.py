@@ -0,0 +1,547 @@
+"""
+
+This submodule saves and loads rocket designs, and evaluates files with millions of them.
+
+A design holds everything a rocket calculation depends on: the parts of each stage, extra mass and cost, payload,
+engines scheduled with schedule_engine and fuel flow removed with rem_fuel_flow. Parts are referenced by their id in
+a PartCatalog, such as 'LVT45', and parts that are not in the catalog are written out in full. Stages with the same
+contents are only written once, and the stage order refers to them by position.
+
+Designs can be written as compact JSON, one design per line in JSONL files, or in a binary form about half the size.
+
+Design format (JSON):
+
+* v - version of the format.
+* name - name of the rocket, left out if None.
+* payload - payload of the rocket [ton], left out if 0.
+* stages - distinct stages, as {"parts": [[part_id, count], ...], "extra_mass": float, "extra_cost": float}.
+  Extra mass and cost are left out if 0.
+* order - position in stages of each stage of the rocket, left out if every stage is distinct and in order.
+* schedule - engines fired before their stage, as [[stage_fire, stage_present], ...].
+* restricted - stages with their fuel flow to the next one removed.
+* custom_parts - parts that are not in the catalog, as {part_id: {"class": name, "args": [...]}}.
+
+Example
+    -------
+    >>> text = dumps(rocket)
+    >>> rocket = loads(text)
+    >>> for line_number, report in evaluate_designs('designs.jsonl'):
+    ...     print(report.adjusted_dV)
+
+"""
+
+import json
+import struct
+from itertools import islice
+
+from KSPython.KSPython import KerbalException, Part, RocketFuelTank, LiquidEngine, SolidEngine, Stage, Rocket, _adjusted_dV
+
+VERSION = 1
+MAGIC = b'KSPR'
+ERRORS = ('raise', 'skip', 'keep')
+
+_PART_CLASSES = {cls.__name__: cls for cls in (Part, RocketFuelTank, LiquidEngine, SolidEngine)}
+_default_catalog = None
+
+
+def _catalog(catalog):
+    global _default_catalog
+    if catalog is not None:
+        return catalog
+    if _default_catalog is None:
+        from KSPython.Catalog import PartCatalog
+        _default_catalog = PartCatalog()
+    return _default_catalog
+
+
+def _part_args(part):
+    """Class name and constructor arguments of a part."""
+    cls = type(part)
+    if cls not in _PART_CLASSES.values():
+        raise KerbalException(f'Parts of class {cls.__name__} cannot be saved.')
+    if cls is Part:
+        args = (part.mass, part.cost)
+    elif cls is RocketFuelTank:
+        args = (part.mass, part.mass_empty, part.cost)
+    elif cls is LiquidEngine:
+        args = (part.mass, part.cost, part.thrust_atm, part.thrust_vac, part.isp_atm, part.isp_vac)
+    else:
+        args = (part.mass, part.mass_empty, part.cost, part.thrust_atm, part.thrust_vac, part.isp_atm, part.isp_vac)
+    return cls.__name__, [part.name] + list(args)
+
+
+def rocket_to_dict(rocket, catalog=None):
+    """
+    Design of a rocket as a dictionary of plain values.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be saved.
+        catalog - `PartCatalog`
+            Catalog whose ids are used for the parts. Defaults to every part of the library.
+
+    Return
+        ----------
+        design - `dict`
+            Design of the rocket.
+
+    """
+    if not isinstance(rocket, Rocket):
+        raise KerbalException('Only rockets can be saved.')
+    catalog = _catalog(catalog)
+    custom_ids = {} # {part: part_id} of parts that are not in the catalog
+    custom_parts = {}
+
+    def part_id(part):
+        found = catalog.part_id(part)
+        if found is not None:
+            return found
+        if part not in custom_ids:
+            new_id = part.name
+            number = 1
+            while new_id in custom_parts: # custom parts are looked up before the catalog, so only they must differ
+                number += 1
+                new_id = f'{part.name}#{number}'
+            cls_name, args = _part_args(part)
+            custom_ids[part] = new_id
+            custom_parts[new_id] = {'class': cls_name, 'args': args}
+        return custom_ids[part]
+
+    stages = []
+    positions = {} # {stage contents: position in stages}
+    order = []
+    for stage in rocket.stages:
+        entry = {'parts': [[part_id(part), count] for part, count in stage.part_counts.items()]}
+        if stage.extra_mass:
+            entry['extra_mass'] = stage.extra_mass
+        if stage.extra_cost:
+            entry['extra_cost'] = stage.extra_cost
+        key = json.dumps(entry, sort_keys=True)
+        if key not in positions:
+            positions[key] = len(stages)
+            stages.append(entry)
+        order.append(positions[key])
+
+    design = {'v': VERSION}
+    if rocket.name is not None:
+        design['name'] = rocket.name
+    if rocket.payload:
+        design['payload'] = rocket.payload
+    design['stages'] = stages
+    if order != list(range(len(stages))):
+        design['order'] = order
+    schedule = [[stage_fire, stage_present] for stage_fire, stages_present in rocket.async_engines.items()
+                for stage_present in stages_present]
+    if schedule:
+        design['schedule'] = schedule
+    if rocket.restric_fuel_flow:
+        design['restricted'] = list(rocket.restric_fuel_flow)
+    if custom_parts:
+        design['custom_parts'] = custom_parts
+    return design
+
+
+def rocket_from_dict(design, catalog=None):
+    """
+    Builds a rocket from its design. Every position in the stage order gets its own stage, so stages with the same
+    contents can be changed separately.
+
+    Parameters
+        ----------
+        design - `dict`
+            Design of the rocket, as given by rocket_to_dict.
+        catalog - `PartCatalog`
+            Catalog where the part ids are looked up. Defaults to every part of the library.
+
+    Return
+        ----------
+        rocket - `rocket`
+            Rebuilt rocket.
+
+    """
+    try:
+        return _build_rocket(design, catalog)
+    except (KeyError, TypeError, ValueError) as error: # missing keys or values of the wrong type
+        raise KerbalException(f'Design is not valid: {error!r}')
+
+
+def _build_rocket(design, catalog):
+    if not isinstance(design, dict) or 'stages' not in design:
+        raise KerbalException('A design must be a dictionary with its stages.')
+    if design.get('v', VERSION) > VERSION:
+        raise KerbalException(f'Design version {design["v"]} is newer than the supported version {VERSION}.')
+    catalog = _catalog(catalog)
+    custom_parts = {}
+    for part_id, part in design.get('custom_parts', {}).items():
+        if part.get('class') not in _PART_CLASSES:
+            raise KerbalException(f'Part {part_id} has an unknown class {part.get("class")}.')
+        custom_parts[part_id] = _PART_CLASSES[part['class']](*part['args'])
+
+    def build_stage(entry):
+        stage = Stage()
+        for part_id, count in entry['parts']:
+            stage.add_part(custom_parts[part_id] if part_id in custom_parts else catalog.get(part_id), count)
+        if entry.get('extra_mass'):
+            stage.add_extra_mass(entry['extra_mass'])
+        if entry.get('extra_cost'):
+            stage.add_extra_cost(entry['extra_cost'])
+        return stage
+
+    entries = design['stages']
+    stages = [build_stage(entry) for entry in entries] # every entry is checked, even if the order leaves it out
+    order = design.get('order', range(len(entries)))
+    if any(not 0 <= position < len(entries) for position in order):
+        raise KerbalException('Stage order refers to stages that are not part of the design.')
+    rocket_stages = []
+    for position in order:
+        rocket_stages.append(build_stage(entries[position]) if stages[position] in rocket_stages else stages[position])
+
+    rocket = Rocket(design.get('name'))
+    rocket.add_stages(rocket_stages)
+    if design.get('payload'):
+        rocket.change_payload(design['payload'])
+    for stage_fire, stage_present in design.get('schedule', []):
+        rocket.schedule_engine(stage_fire, stage_present)
+    rocket.restric_fuel_flow = sorted({int(stage_num) for stage_num in design.get('restricted', [])})
+    return rocket
+
+
+def dumps(rocket, catalog=None):
+    """
+    Design of a rocket as compact JSON, on a single line.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be saved.
+        catalog - `PartCatalog`
+            Catalog whose ids are used for the parts. Defaults to every part of the library.
+
+    Return
+        ----------
+        text - `string`
+            JSON of the design.
+
+    """
+    return json.dumps(rocket_to_dict(rocket, catalog), separators=(',', ':'))
+
+
+def loads(text, catalog=None):
+    """
+    Builds a rocket from the JSON given by dumps.
+
+    Parameters
+        ----------
+        text - `string`
+            JSON of the design.
+        catalog - `PartCatalog`
+            Catalog where the part ids are looked up. Defaults to every part of the library.
+
+    Return
+        ----------
+        rocket - `rocket`
+            Rebuilt rocket.
+
+    """
+    try:
+        design = json.loads(text)
+    except ValueError as error:
+        raise KerbalException(f'Design is not valid JSON: {error}')
+    return rocket_from_dict(design, catalog)
+
+
+class _Writer:
+    """Binary encoder: zigzag varints for integers, float64 for numbers, length prefixed UTF-8 for strings."""
+    def __init__(self):
+        self.data = bytearray()
+
+    def int(self, value):
+        value = int(value)
+        value = ~(value << 1) if value < 0 else value << 1
+        while value > 0x7f:
+            self.data.append((value & 0x7f) | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def float(self, value):
+        self.data += struct.pack('<d', value)
+
+    def str(self, value):
+        encoded = value.encode()
+        self.int(len(encoded))
+        self.data += encoded
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def int(self):
+        value = 0
+        shift = 0
+        while True:
+            byte = self.data[self.position]
+            self.position += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        return (value >> 1) ^ -(value & 1)
+
+    def float(self):
+        value, = struct.unpack_from('<d', self.data, self.position)
+        self.position += 8
+        return value
+
+    def str(self):
+        size = self.int()
+        value = bytes(self.data[self.position:self.position + size]).decode()
+        self.position += size
+        return value
+
+
+def to_bytes(rocket, catalog=None):
+    """
+    Design of a rocket in binary form. Holds the same values as the JSON, numbers are stored exactly.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be saved.
+        catalog - `PartCatalog`
+            Catalog whose ids are used for the parts. Defaults to every part of the library.
+
+    Return
+        ----------
+        data - `bytes`
+            Binary design.
+
+    """
+    design = rocket_to_dict(rocket, catalog)
+    writer = _Writer()
+    writer.data += MAGIC
+    writer.int(VERSION)
+    name = design.get('name')
+    writer.int(name is not None)
+    if name is not None:
+        writer.str(str(name))
+    writer.float(design.get('payload', 0.0))
+
+    part_ids = []
+    positions = {}
+    for entry in design['stages']:
+        for part_id, _ in entry['parts']:
+            if part_id not in positions:
+                positions[part_id] = len(part_ids)
+                part_ids.append(part_id)
+    writer.int(len(part_ids))
+    for part_id in part_ids:
+        writer.str(part_id)
+    custom_parts = design.get('custom_parts', {})
+    writer.int(len(custom_parts))
+    for part_id, part in custom_parts.items():
+        writer.str(part_id)
+        writer.str(part['class'])
+        writer.str(part['args'][0])
+        writer.int(len(part['args']) - 1)
+        for value in part['args'][1:]:
+            writer.float(value)
+
+    writer.int(len(design['stages']))
+    for entry in design['stages']:
+        writer.int(len(entry['parts']))
+        for part_id, count in entry['parts']:
+            writer.int(positions[part_id])
+            writer.int(count)
+        writer.float(entry.get('extra_mass', 0.0))
+        writer.float(entry.get('extra_cost', 0.0))
+    for key in ('order', 'restricted'):
+        values = design.get(key, [])
+        writer.int(len(values))
+        for value in values:
+            writer.int(value)
+    schedule = design.get('schedule', [])
+    writer.int(len(schedule))
+    for stage_fire, stage_present in schedule:
+        writer.int(stage_fire)
+        writer.int(stage_present)
+    return bytes(writer.data)
+
+
+def from_bytes(data, catalog=None):
+    """
+    Builds a rocket from the binary design given by to_bytes.
+
+    Parameters
+        ----------
+        data - `bytes`
+            Binary design.
+        catalog - `PartCatalog`
+            Catalog where the part ids are looked up. Defaults to every part of the library.
+
+    Return
+        ----------
+        rocket - `rocket`
+            Rebuilt rocket.
+
+    """
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise KerbalException('Data is not a binary rocket design.')
+    reader = _Reader(data)
+    reader.position = len(MAGIC)
+    try:
+        design = {'v': reader.int()}
+        if reader.int():
+            design['name'] = reader.str()
+        design['payload'] = reader.float()
+        part_ids = [reader.str() for _ in range(reader.int())]
+        custom_parts = {}
+        for _ in range(reader.int()):
+            part_id = reader.str()
+            cls_name = reader.str()
+            part_name = reader.str()
+            custom_parts[part_id] = {'class': cls_name, 'args': [part_name] + [reader.float() for _ in range(reader.int())]}
+        if custom_parts:
+            design['custom_parts'] = custom_parts
+        design['stages'] = []
+        for _ in range(reader.int()):
+            entry = {'parts': [[part_ids[reader.int()], reader.int()] for _ in range(reader.int())]}
+            entry['extra_mass'] = reader.float()
+            entry['extra_cost'] = reader.float()
+            design['stages'].append(entry)
+        for key in ('order', 'restricted'):
+            values = [reader.int() for _ in range(reader.int())]
+            if values:
+                design[key] = values
+        design['schedule'] = [[reader.int(), reader.int()] for _ in range(reader.int())]
+    except (IndexError, struct.error, UnicodeDecodeError):
+        raise KerbalException('Binary rocket design is truncated or corrupted.')
+    return rocket_from_dict(design, catalog)
+
+
+def _lines(file):
+    if isinstance(file, str):
+        with open(file) as lines:
+            yield from lines
+    else:
+        yield from file
+
+
+def read_designs(file, catalog=None, errors='raise', start=1):
+    """
+    Reads rockets from a JSONL file, one design per line, without keeping more than one in memory. Blank lines are
+    skipped.
+
+    Parameters
+        ----------
+        file - `string/file`
+            Path or open file, or any iterable of lines.
+        catalog - `PartCatalog`
+            Catalog where the part ids are looked up. Defaults to every part of the library.
+        errors - `{'raise', 'skip', 'keep'}`
+            What to do with lines that cannot be read: raise an exception, skip them, or yield the exception in
+            place of the rocket.
+        start - `int`
+            Number of the first line, for files read in pieces.
+
+    Return
+        ----------
+        designs - `generator`
+            (line_number, rocket) for every design.
+
+    """
+    if errors not in ERRORS:
+        raise KerbalException(f'errors can only be one of {", ".join(ERRORS)}, and not {errors}.')
+    catalog = _catalog(catalog)
+    for line_number, line in enumerate(_lines(file), start):
+        if not line.strip():
+            continue
+        try:
+            rocket = loads(line, catalog)
+        except (KerbalException, KeyError, TypeError, ValueError) as error:
+            error = error if isinstance(error, KerbalException) else KerbalException(f'Design is not valid: {error!r}')
+            if errors == 'raise':
+                raise KerbalException(f'Line {line_number}: {error.message}')
+            if errors == 'keep':
+                yield line_number, error
+            continue
+        yield line_number, rocket
+
+
+def evaluate_designs(file, batch_size=1024, g=9.81, dV_out=2500, catalog=None, errors='raise', start=1):
+    """
+    Reads and evaluates rockets from a JSONL file in batches, so memory stays bounded by the batch size however
+    many designs the file holds. Each batch is evaluated at once with RocketBatch.
+
+    Parameters
+        ----------
+        file - `string/file`
+            Path or open file, or any iterable of lines.
+        batch_size - `int`
+            Number of designs read and evaluated at a time.
+        g - `float`
+            Gravity used for the thrust to weight ratios (default for Kerbin).
+        dV_out - `int/float`
+            Delta-V required to leave the atmosphere, used for the adjusted delta V [m/s].
+        catalog - `PartCatalog`
+            Catalog where the part ids are looked up. Defaults to every part of the library.
+        errors - `{'raise', 'skip', 'keep'}`
+            What to do with lines that cannot be read and designs that cannot be evaluated: raise an exception, skip
+            them, or yield the exception in place of the report.
+        start - `int`
+            Number of the first line, for files read in pieces.
+
+    Return
+        ----------
+        reports - `generator`
+            (line_number, RocketReport) for every design, in the order of the file.
+
+    Example
+        -------
+        >>> for line_number, report in evaluate_designs('designs.jsonl', errors='skip'):
+        ...     print(line_number, report.adjusted_dV)
+
+    """
+    from KSPython.Batch import RocketBatch
+    from KSPython.Report import RocketReport, StageReport
+    if int(batch_size) < 1:
+        raise KerbalException('Batch size must be at least 1.')
+    designs = read_designs(file, catalog, errors, start)
+    while True:
+        chunk = list(islice(designs, int(batch_size)))
+        if not chunk:
+            return
+        rockets = [(line_number, rocket) for line_number, rocket in chunk if isinstance(rocket, Rocket)]
+        batch = RocketBatch.from_rockets([rocket for _, rocket in rockets])
+        valid = batch.valid('atm') & batch.valid('vac')
+        stage_dV = {loc: batch.calculate_stage_dV(loc) for loc in ('atm', 'vac')}
+        twr = {loc: batch.calculate_twr(g, loc) for loc in ('atm', 'vac')}
+        burn_time = {loc: batch.engine_burn_time(loc) for loc in ('atm', 'vac')}
+        reports = {}
+        for design, (line_number, rocket) in enumerate(rockets):
+            if not valid[design]:
+                reports[line_number] = KerbalException('Design cannot be evaluated, a stage has no engine firing or loses '
+                                                       'all its fuel before being staged.')
+                continue
+            stages = tuple(StageReport(i, float(stage_dV['atm'][design, i]), float(stage_dV['vac'][design, i]),
+                                       float(twr['atm'][design, i]), float(twr['vac'][design, i]),
+                                       float(burn_time['atm'][design, i]), float(burn_time['vac'][design, i]))
+                           for i in range(rocket.num_stages()))
+            dV_atm = sum([stage.dV_atm for stage in stages])
+            dV_vac = sum([stage.dV_vac for stage in stages])
+            if not dV_atm > 0:
+                reports[line_number] = KerbalException('Design cannot be evaluated, it has no stages or no delta V.')
+                continue
+            reports[line_number] = RocketReport(rocket.name, rocket.calculate_total_mass(), rocket.calculate_total_cost(),
+                                                rocket.payload, _adjusted_dV(dV_atm, dV_vac, dV_out),
+                                                dV_atm, dV_vac, g, dV_out, stages)
+        for line_number, rocket in chunk:
+            report = reports.get(line_number, rocket) # unreadable lines keep their exception
+            if isinstance(report, KerbalException):
+                if errors == 'raise':
+                    raise KerbalException(f'Line {line_number}: {report.message}')
+                if errors == 'skip':
+                    continue
+            yield line_number, report
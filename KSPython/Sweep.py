@@ -0,0 +1,166 @@
+"""
+
+This submodule evaluates a rocket for many payloads and extra masses at once.
+
+Payload and extra mass do not change the fuel of any stage, so burn times and the fuel lost before staging stay
+the same. Only the rocket mass at each staging event moves, and all values can be computed with NumPy broadcasting
+from a single staging timeline per location.
+
+Example
+    -------
+    >>> result = rocket.sweep(payload=np.arange(250))
+    >>> result.adjusted_dV()
+
+"""
+
+import numpy as np
+
+from KSPython.KSPython import KerbalException, _adjusted_dV
+
+
+class SweepResult:
+    """Results of a rocket sweep.
+
+    Per stage values have the stage as first axis, followed by the shape of the swept parameters.
+
+    Attributes
+        ----------
+        shape - `tuple`
+            Shape of the swept parameters.
+        payload - `array`
+            Payload of each evaluated point [ton].
+        extra_mass - `dict of arrays`
+            Extra mass added to each swept stage {stage_num: extra_mass} [ton].
+        stage_dV - `dict of arrays`
+            Delta V of each stage {loc: dV} [m/s].
+        twr - `dict of arrays`
+            Thrust to weight ratio at the start of each stage {loc: twr}.
+        burn_time - `dict of arrays`
+            Burn time of each stage {loc: burn_time} [s].
+
+    """
+    def __init__(self, shape, payload, extra_mass, stage_dV, twr, burn_time):
+        self.shape = shape
+        self.payload = payload
+        self.extra_mass = extra_mass
+        self.stage_dV = stage_dV
+        self.twr = twr
+        self.burn_time = burn_time
+
+    def dV(self, loc='atm'):
+        """
+        Delta-V of the rocket for every evaluated point.
+
+        Parameters
+            ----------
+            loc - `{'atm', 'vac'}`
+                Location where the method will be performed.
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of the rocket [m/s].
+
+        """
+        return self.stage_dV[loc].sum(axis=0)
+
+    def adjusted_dV(self, dV_out=2500):
+        """
+        True delta-V of the rocket for every evaluated point, adjusted for leaving the atmosphere.
+
+        Parameters
+            ----------
+            dV_out - `int/float`
+                Delta-V required to leave the atmosphere of a given body [m/s].
+                    * 2500 - Kerbin
+
+        Return
+            ----------
+            dV - `array`
+                Delta V of the rocket [m/s].
+
+        """
+        dV_atm = self.dV('atm')
+        dV_vac = self.dV('vac')
+        return _adjusted_dV(dV_atm, dV_vac, dV_out)
+
+
+def _as_grid(values):
+    """Places each parameter on its own axis, so that broadcasting them produces every combination."""
+    grid = []
+    for axis, value in enumerate(values):
+        shape = [1]*len(values)
+        shape[axis] = value.size
+        grid.append(value.reshape(shape))
+    return grid
+
+
+def sweep(rocket, payload=None, extra_mass=None, grid=False, g=9.81):
+    """
+    Evaluates a rocket for arrays of payloads and stage extra masses at once.
+
+    Parameters
+        ----------
+        rocket - `rocket`
+            Rocket to be evaluated.
+        payload - `float/array`
+            Payloads to be evaluated [ton]. Defaults to the payload of the rocket.
+        extra_mass - `dict`
+            Extra mass to be added on top of each stage {stage_num: float/array} [ton].
+        grid - `bool`
+            If True, every combination of the parameters is evaluated, each one on its own axis, payload first and
+            stages in increasing order. Otherwise parameters are broadcast together.
+        g - `float`
+            Gravity used for the thrust to weight ratio (default for Kerbin).
+
+    Return
+        ----------
+        result - `SweepResult`
+            Delta V, TWR and burn time of every stage for every evaluated point.
+
+    """
+    extra_mass = {} if extra_mass is None else dict(extra_mass)
+    num_stages = rocket.num_stages()
+    stage_nums = sorted(int(stage_num) for stage_num in extra_mass)
+    for stage_num in stage_nums:
+        if not 0 <= stage_num < num_stages:
+            raise KerbalException(f'Stage {stage_num} is not part of the rocket.')
+
+    values = [np.asarray(rocket.payload if payload is None else payload, dtype=float)]
+    values += [np.asarray(extra_mass[stage_num], dtype=float) for stage_num in stage_nums]
+    if grid:
+        values = _as_grid([value.ravel() for value in values])
+    shape = np.broadcast_shapes(*[value.shape for value in values])
+    payload = values[0]
+    stage_extra = [0.0]*num_stages
+    for stage_num, value in zip(stage_nums, values[1:]):
+        stage_extra[stage_num] = value
+
+    full_mass = [stage.calculate_full_mass() for stage in rocket.stages]
+    empty_mass = [stage.calculate_empty_mass() for stage in rocket.stages]
+    extra_above = [0.0]*num_stages # extra mass added to the stages above each stage
+    for stage_num in range(num_stages - 2, -1, -1):
+        extra_above[stage_num] = extra_above[stage_num+1] + stage_extra[stage_num+1]
+
+    stage_dV = {}
+    twr = {}
+    burn_time = {}
+    for loc in ('atm', 'vac'):
+        timeline = rocket.timeline(loc = loc)
+        timeline.check()
+        loc_dV = []
+        loc_twr = []
+        for stage_num in range(num_stages):
+            upper_mass = sum(full_mass[(stage_num+1):]) + payload + extra_above[stage_num]
+            start_mass = full_mass[stage_num] + stage_extra[stage_num] + upper_mass - timeline.total_prestage_mass_loss[stage_num]
+            end_mass = empty_mass[stage_num] + stage_extra[stage_num] + upper_mass - timeline.total_prestage_mass_loss[stage_num+1]
+            loc_dV.append(np.broadcast_to(np.log(start_mass/end_mass)*timeline.isp[stage_num]*9.81, shape))
+            loc_twr.append(np.broadcast_to(timeline.thrust[stage_num]/(g*start_mass), shape))
+        stage_dV[loc] = np.array(loc_dV).reshape((num_stages,) + shape)
+        twr[loc] = np.array(loc_twr).reshape((num_stages,) + shape)
+        burn_time[loc] = np.broadcast_to(np.array(timeline.burn_time).reshape((num_stages,) + (1,)*len(shape)),
+                                         (num_stages,) + shape)
+
+    return SweepResult(shape, np.broadcast_to(payload, shape),
+                       {stage_num: np.broadcast_to(value, shape) for stage_num, value in zip(stage_nums, values[1:])},
+                       stage_dV, twr, burn_time)
@@ -1,4 +1,16 @@
 from .KSPython import *
 # from .LiquidEngineParts import *
 # from .BoosterParts  import *
-# from .RocketFuelTankParts import *
\ No newline at end of file
+# from .RocketFuelTankParts import *
+
+# submodules are only imported when first used, as KSPython.Catalog or KSPython.LiquidEngineParts
+_SUBMODULES = ('LiquidEngineParts', 'BoosterParts', 'RocketFuelTankParts', 'Catalog', 'Report', 'Sweep', 'Batch', 'Parallel', 'Optimizer', 'Ascent', 'Atmosphere', 'Profiler', 'Serialization', 'CLI', 'Craft', 'Sensitivity', 'Inverse', 'Explorer', 'Mission', 'MonteCarlo')
+
+def __getattr__(name):
+    if name == 'profile': # as KSPython.profile, without importing Profiler up front
+        from .Profiler import profile
+        return profile
+    if name in _SUBMODULES:
+        import importlib
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,5 @@
+import sys
+
+from KSPython.CLI import main
+
+sys.exit(main())
@@ -0,0 +1,71 @@
+"""Import time benchmark.
+
+Every statement is timed in a fresh interpreter, so nothing is cached between runs. Part modules build their parts
+on first use, so importing a single part should cost about the same as importing the package alone, while importing
+every part pays for all of them.
+
+Each statement is also timed eagerly, building every part of the part modules it imports, as those modules did on
+import before parts were built lazily. The speedup is the eager median over the lazy one.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 20]
+
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    'package': 'import KSPython',
+    'one part': 'from KSPython.LiquidEngineParts import LVT45',
+    'one part per module': ('from KSPython.LiquidEngineParts import LVT45; from KSPython.BoosterParts import RT10; '
+                            'from KSPython.RocketFuelTankParts import FLT800'),
+    'every part': ('from KSPython.LiquidEngineParts import *; from KSPython.BoosterParts import *; '
+                   'from KSPython.RocketFuelTankParts import *'),
+    'catalog': 'from KSPython.Catalog import PartCatalog; PartCatalog()',
+}
+
+# part modules imported by each statement, fully built for the eager baseline
+PART_MODULES = {
+    'package': (),
+    'one part': ('LiquidEngineParts',),
+    'one part per module': ('LiquidEngineParts', 'BoosterParts', 'RocketFuelTankParts'),
+    'every part': ('LiquidEngineParts', 'BoosterParts', 'RocketFuelTankParts'),
+    'catalog': ('LiquidEngineParts', 'BoosterParts', 'RocketFuelTankParts'),
+}
+
+EAGER = 'import KSPython.{module} as parts; [getattr(parts, name) for name in parts.__all__]'
+
+TIMER = 'import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)'
+
+
+def time_statement(statement, repeat):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', TIMER.format(statement=statement)], env=env,
+                                check=True, capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]))
+    return statistics.median(times), min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time KSPython imports in fresh interpreters.')
+    parser.add_argument('--repeat', type=int, default=20, help='number of interpreters started per statement')
+    args = parser.parse_args()
+    print(f'{"statement":<22}{"lazy median [ms]":>18}{"lazy min [ms]":>15}{"eager median [ms]":>19}{"eager min [ms]":>16}'
+          f'{"speedup":>9}')
+    for name, statement in STATEMENTS.items():
+        median, best = time_statement(statement, args.repeat)
+        eager = '; '.join([statement] + [EAGER.format(module=module) for module in PART_MODULES[name]])
+        eager_median, eager_best = time_statement(eager, args.repeat)
+        print(f'{name:<22}{median*1000:>18.2f}{best*1000:>15.2f}{eager_median*1000:>19.2f}{eager_best*1000:>16.2f}'
+              f'{eager_median/median:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Rocket evaluation scaling benchmark.
+
+Generated asparagus, direct and SRB-assisted designs, built like the ones in examples/rocket_fuel_comparrison.py, are
+evaluated with calculate_dV, adjusted_dV and generate_report for a growing number of stages:
+
+* asparagus - pairs of side stages feeding a core stage, every engine scheduled to fire on the first stage.
+* direct - stages fired one after the other, fuel flowing down through all of them.
+* srb - a ring of boosters fired with the first liquid stage, with the fuel flow of every other stage removed.
+
+For every design and operation the benchmark records the wall time per rocket, the best of a few timings over fresh
+rockets so nothing is cached, the number of KSPython function calls and the peak memory allocated. Calls and memory
+are the same on any machine, wall times are not and are noisy on shared machines, so they get a looser tolerance.
+
+Usage:
+    python benchmarks/rocket_scaling.py [--stages 2 4 8 12 16 20 24] [--repeat 5] [--number 20]
+    python benchmarks/rocket_scaling.py --save benchmarks/rocket_scaling_baseline.json
+    python benchmarks/rocket_scaling.py --compare benchmarks/rocket_scaling_baseline.json
+
+When comparing, the exit code is 1 if any result is worse than the baseline by more than its tolerance.
+
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KSPython as ksp
+from KSPython.RocketFuelTankParts import X20032, FLT800
+from KSPython.LiquidEngineParts import REI5, LVT30
+from KSPython.BoosterParts import RT10
+
+STAGES = (2, 4, 8, 12, 16, 20, 24)
+TOLERANCE = {'time': 2.0, 'calls': 1.0, 'memory': 1.2} # largest ratio to the baseline that is not a regression
+PAYLOAD = 2 # Ton
+PACKAGE = os.path.dirname(os.path.abspath(ksp.__file__))
+
+
+def asparagus(num_stages):
+    rocket = ksp.Rocket(f'Asparagus {num_stages}')
+    side_stage = ksp.Stage()
+    side_stage.add_parts([FLT800]*2 + [LVT30]*2)
+    core_stage = ksp.Stage()
+    core_stage.add_parts([X20032, REI5])
+    rocket.add_stages([side_stage]*(num_stages - 1) + [core_stage])
+    for stage_num in range(1, num_stages):
+        rocket.schedule_engine(0, stage_num)
+    rocket.change_payload(PAYLOAD)
+    return rocket
+
+
+def direct(num_stages):
+    rocket = ksp.Rocket(f'Direct {num_stages}')
+    for stage_num in range(num_stages):
+        stage = ksp.Stage()
+        stage.add_parts([FLT800]*2 + [LVT30]*2 if stage_num < num_stages - 1 else [X20032, REI5])
+        rocket.add_stage(stage)
+    rocket.change_payload(PAYLOAD)
+    return rocket
+
+
+def srb(num_stages):
+    rocket = ksp.Rocket(f'SRB {num_stages}')
+    booster_stage = ksp.Stage()
+    booster_stage.add_parts([RT10]*4)
+    direct_stage = ksp.Stage()
+    direct_stage.add_parts([FLT800]*4 + [LVT30]*4)
+    core_stage = ksp.Stage()
+    core_stage.add_parts([X20032, REI5])
+    rocket.add_stages([booster_stage] + [direct_stage]*(num_stages - 2) + [core_stage])
+    rocket.schedule_engine(0, 1)
+    for stage_num in range(num_stages - 1):
+        rocket.rem_fuel_flow(stage_num)
+    rocket.change_payload(PAYLOAD)
+    return rocket
+
+
+DESIGNS = {'asparagus': asparagus, 'direct': direct, 'srb': srb}
+
+OPERATIONS = {
+    'calculate_dV': lambda rocket: (rocket.calculate_dV('atm'), rocket.calculate_dV('vac')),
+    'adjusted_dV': lambda rocket: rocket.adjusted_dV(),
+    'generate_report': lambda rocket: rocket.generate_report(),
+}
+
+
+def count_calls(operation, rocket):
+    calls = 0
+
+    def profiler(frame, event, arg):
+        nonlocal calls
+        if event == 'call' and frame.f_code.co_filename.startswith(PACKAGE):
+            calls += 1
+
+    sys.setprofile(profiler)
+    try:
+        operation(rocket)
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+def peak_memory(operation, rocket):
+    tracemalloc.start()
+    try:
+        operation(rocket)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(design, num_stages, operation, repeat, number):
+    times = []
+    for _ in range(repeat):
+        rockets = [design(num_stages) for _ in range(number)]
+        start = time.perf_counter()
+        for rocket in rockets:
+            operation(rocket)
+        times.append((time.perf_counter() - start)/number)
+    return {'time': min(times),
+            'calls': count_calls(operation, design(num_stages)),
+            'memory': peak_memory(operation, design(num_stages))}
+
+
+def run(stages, repeat, number):
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()): # reports are not printed
+        for design_name, design in DESIGNS.items():
+            for num_stages in stages:
+                for operation_name, operation in OPERATIONS.items():
+                    key = f'{design_name}/{num_stages}/{operation_name}'
+                    results[key] = measure(design, num_stages, operation, repeat, number)
+    return results
+
+
+def compare(results, baseline):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric, tolerance in TOLERANCE.items():
+            old, new = baseline[key][metric], result[metric]
+            if old > 0 and new/old > tolerance:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark how Rocket evaluation scales with the number of stages.')
+    parser.add_argument('--stages', type=int, nargs='+', default=STAGES, help='numbers of stages of the designs')
+    parser.add_argument('--repeat', type=int, default=5, help='timings per result, the best one is kept')
+    parser.add_argument('--number', type=int, default=20, help='fresh rockets evaluated per timing')
+    parser.add_argument('--save', metavar='FILE', help='store the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results against a JSON baseline')
+    args = parser.parse_args()
+    if min(args.stages) < 2:
+        parser.error('designs need at least 2 stages')
+
+    results = run(args.stages, args.repeat, args.number)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    print(f'{"design":<34}{"time [ms]":>12}{"calls":>10}{"memory [kB]":>14}{"vs baseline":>24}')
+    for key, result in results.items():
+        line = f'{key:<34}{result["time"]*1000:>12.3f}{result["calls"]:>10}{result["memory"]/1024:>14.1f}'
+        if key in baseline:
+            ratios = [result[metric]/baseline[key][metric] if baseline[key][metric] else 1.0 for metric in TOLERANCE]
+            line += '{:>12.2f}x{:>5.2f}x{:>5.2f}x'.format(*ratios)
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+    if args.compare:
+        regressions = compare(results, baseline)
+        for key, metric, old, new in regressions:
+            print(f'REGRESSION {key} {metric}: {old:g} -> {new:g}')
+        print(f'{len(regressions)} regressions against {args.compare}')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
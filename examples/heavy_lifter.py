@@ -20,11 +20,8 @@ rocket.schedule_engine(0,1)
 rocket.schedule_engine(0,2)
 rocket.schedule_engine(0,3)
 
-dVs = []
 payloads = range(250)
-for mass in payloads:
-    rocket.change_payload(mass)
-    dVs.append(rocket.adjusted_dV())
+dVs = rocket.sweep(payload=payloads).adjusted_dV()
 
 plt.plot(payloads, dVs)
 plt.xlabel('Payload [ton]')
@@ -64,3 +64,11 @@ rocket5.generate_report()
 # print(rocket5.restric_fuel_flow)
 # print(rocket5.time_between_stages(0,2))
 # print(rocket5.prestage_mass_loss(2))
+
+# Instead of writing each layout by hand, every firing schedule and fuel restriction of the same stages can be explored
+from KSPython.Explorer import explore
+
+result = explore([booster_stage, asparagus_stage, asparagus_stage, main_stage], payload=payload)
+for configuration in result.configurations:
+    print(configuration)
+result.configurations[0].rocket('Best layout').generate_report()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import KSPython as ksp
+from KSPython.KSPython import KerbalException
+from KSPython.LiquidEngineParts import LVT45
+from KSPython.RocketFuelTankParts import FLT800
+
+
+def _rocket():
+    rocket = ksp.Rocket('Inverse Test')
+    stage = ksp.Stage()
+    stage.add_parts([FLT800, LVT45])
+    rocket.add_stages([stage])
+    return rocket
+
+
+def test_max_payload_unreachable_target_with_min_twr():
+    rocket = _rocket()
+    with pytest.raises(KerbalException):
+        rocket.max_payload(10000, min_twr=1.2)
+
+
+def test_max_payload_batch_unreachable_target_with_min_twr():
+    from KSPython.Inverse import max_payload
+    payload = max_payload([_rocket(), _rocket()], [10000, 1000], min_twr=1.2)
+    assert np.isnan(payload[0])
+    assert payload[1] > 0